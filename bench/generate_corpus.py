@@ -0,0 +1,158 @@
+"""
+Generator corpus sintetis untuk benchmark
+Frekuensi kata mengikuti distribusi Zipf seperti teks asli, jadi panjang
+posting list dan selektivitas query mirip corpus nyata.
+
+Contoh:
+    python bench/generate_corpus.py --docs 100000 --out /tmp/corpus-100k.jsonl --segment /tmp/corpus-100k.seg
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from document_store import write_segment  # noqa: E402
+
+# Suku kata untuk menyusun kosakata buatan (deterministik per seed)
+_ONSETS = ["", "b", "c", "d", "f", "g", "h", "j", "k", "l", "m", "n", "p", "r", "s", "t", "w", "br", "st", "tr"]
+_VOWELS = ["a", "e", "i", "o", "u", "ai", "ea", "ou"]
+_CODAS = ["", "", "n", "r", "s", "t", "l", "m", "ng", "k"]
+
+_CATEGORIES = ["guide", "reference", "tutorial", "news", "faq"]
+_PLATFORMS = ["linux", "macos", "windows", "android", "ios"]
+
+
+def build_vocabulary(size: int, rng: np.random.Generator) -> List[str]:
+    """Unique pseudo-words, shortest (most frequent) first."""
+    words: Dict[str, None] = {}
+    while len(words) < size:
+        syllables = 1 + min(int(rng.exponential(1.2)), 4)
+        word = "".join(
+            _ONSETS[rng.integers(len(_ONSETS))] + _VOWELS[rng.integers(len(_VOWELS))] + _CODAS[rng.integers(len(_CODAS))]
+            for _ in range(syllables)
+        )
+        if len(word) > 1:
+            words.setdefault(word, None)
+    return sorted(words, key=len)
+
+
+def synthetic_metadata(number: int) -> Dict[str, Any]:
+    """
+    Metadata of synthetic document ``number``, with skewed value frequencies.
+
+    Derived from the number alone (not the random stream), so the text of a
+    corpus does not change when fields are added here.
+    """
+    bucket = (number * 7919) % 100
+    language = "en" if bucket < 60 else "id" if bucket < 85 else "de" if bucket < 95 else "ja"
+    return {
+        "category": _CATEGORIES[number % len(_CATEGORIES)],
+        "language": language,
+        "platform": _PLATFORMS[(number * 31) % len(_PLATFORMS)],
+        "version": f"{1 + number % 3}.{(number // 3) % 10}",
+        "source": "synthetic"
+    }
+
+
+def generate_documents(
+    count: int,
+    vocab_size: int = 50000,
+    mean_length: int = 150,
+    zipf_exponent: float = 1.1,
+    seed: int = 42
+) -> Iterator[Dict[str, Any]]:
+    """
+    Generate synthetic documents.
+
+    Args:
+        count: Number of documents
+        vocab_size: Number of distinct words
+        mean_length: Mean document length in words
+        zipf_exponent: Zipf exponent of the word frequency distribution
+        seed: Random seed (same seed, same corpus)
+
+    Yields:
+        Documents in the store format (id, title, text, url, metadata)
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array(build_vocabulary(vocab_size, rng), dtype=object)
+    weights = 1.0 / np.arange(1, vocab_size + 1) ** zipf_exponent
+    probabilities = weights / weights.sum()
+
+    batch = 10000
+    for first in range(0, count, batch):
+        n = min(batch, count - first)
+        lengths = np.maximum(5, rng.poisson(mean_length, n))
+        words = vocab[rng.choice(vocab_size, int(lengths.sum()), p=probabilities)]
+        title_words = vocab[rng.choice(vocab_size, n * 4, p=probabilities)]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        for i in range(n):
+            number = first + i
+            yield {
+                "id": f"syn-{number:07d}",
+                "title": " ".join(title_words[i * 4:(i + 1) * 4]).title(),
+                "text": " ".join(words[offsets[i]:offsets[i + 1]]),
+                "url": f"https://example.com/docs/syn-{number:07d}",
+                "metadata": synthetic_metadata(number)
+            }
+
+
+def generate_queries(count: int, vocab_size: int = 50000, seed: int = 42) -> List[str]:
+    """
+    Query strings of 1-3 words drawn from the same vocabulary.
+
+    Word ranks are log-uniform between 20 and the vocabulary size, giving a
+    mix of common, medium and rare terms without stopword-like queries that
+    match almost everything.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = build_vocabulary(vocab_size, rng)
+    qrng = np.random.default_rng(seed + 1)
+    ranks = np.exp(qrng.uniform(np.log(20), np.log(vocab_size - 1), count * 3)).astype(int)
+    queries = []
+    for i in range(count):
+        words = 1 + int(qrng.integers(3))
+        queries.append(" ".join(vocab[r] for r in ranks[i * 3:i * 3 + words]))
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus for benchmarks")
+    parser.add_argument("--docs", type=int, default=1000, help="Number of documents (e.g. 1000, 100000, 1000000)")
+    parser.add_argument("--out", help="Output JSONL path")
+    parser.add_argument("--segment", help="Also write a segment file (for MCP_CORPUS_SEGMENT)")
+    parser.add_argument("--queries", help="Write query strings, one per line")
+    parser.add_argument("--num-queries", type=int, default=1000)
+    parser.add_argument("--vocab-size", type=int, default=50000)
+    parser.add_argument("--mean-length", type=int, default=150, help="Mean document length in words")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not (args.out or args.segment or args.queries):
+        parser.error("nothing to do: pass --out, --segment and/or --queries")
+
+    def documents() -> Iterator[Dict[str, Any]]:
+        return generate_documents(args.docs, args.vocab_size, args.mean_length, seed=args.seed)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for doc in documents():
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+        print(f"✅ Wrote {args.docs} documents to {args.out}")
+    if args.segment:
+        count = write_segment(documents(), args.segment)
+        print(f"✅ Wrote {count} documents to {args.segment}")
+    if args.queries:
+        with open(args.queries, "w", encoding="utf-8") as f:
+            f.write("\n".join(generate_queries(args.num_queries, args.vocab_size, args.seed)) + "\n")
+        print(f"✅ Wrote {args.num_queries} queries to {args.queries}")
+
+
+if __name__ == "__main__":
+    main()
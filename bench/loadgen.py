@@ -0,0 +1,404 @@
+"""
+Load generator untuk MCP Server (SSE atau streamable HTTP)
+Membuka banyak session MCP bersamaan (client library yang sama dengan
+client/mcp_client.py) dan menjalankan campuran panggilan search/fetch/calculate,
+closed-loop atau dengan rate tetap. URL yang berakhiran /sse memakai transport
+SSE, URL lain (misalnya /mcp) streamable HTTP. Hasil ditulis sebagai JSON supaya
+run bisa dibandingkan untuk mendeteksi regresi.
+
+Contoh:
+    python bench/generate_corpus.py --docs 100000 --segment /tmp/c100k.seg --queries /tmp/q.txt
+    python bench/loadgen.py --launch --segment /tmp/c100k.seg --queries /tmp/q.txt \\
+        --sessions 32 --duration 30 --mix search=70,fetch=20,calculate=10 --output run.json
+    python bench/loadgen.py ... --rate 500 --baseline run.json
+    python bench/loadgen.py --launch --url http://127.0.0.1:6969/mcp ... --output run-http.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from mcp import ClientSession
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_ROOT, "client"))
+
+from mcp_transport import is_sse_url, open_transport  # noqa: E402
+DEFAULT_URL = "http://127.0.0.1:6969/sse"
+DEFAULT_QUERIES = ["mcp server", "python", "fastmcp tools", "docker deployment", "sse transport", "github actions"]
+CALCULATE_OPERATIONS = ["add", "subtract", "multiply", "divide"]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "search=70,fetch=20,calculate=10" into normalized weights."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"search", "fetch", "calculate"}
+    if unknown:
+        raise ValueError(f"Unknown tools in mix: {', '.join(sorted(unknown))}")
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Mix weights must add up to more than 0")
+    return {name: weight / total for name, weight in mix.items() if weight > 0}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Latencies and errors per tool, only counted inside the measured window."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_samples: List[str] = []
+        self.measuring = False
+
+    def record(self, tool: str, latency: float, error: Optional[str] = None) -> None:
+        if not self.measuring:
+            return
+        self.latencies.setdefault(tool, []).append(latency)
+        if error is not None:
+            self.errors[tool] = self.errors.get(tool, 0) + 1
+            if len(self.error_samples) < 20:
+                self.error_samples.append(f"{tool}: {error}")
+
+    @staticmethod
+    def _summary(latencies: List[float], errors: int, duration: float) -> Dict[str, Any]:
+        values = sorted(latencies)
+        return {
+            "calls": len(values),
+            "errors": errors,
+            "error_rate": errors / len(values) if values else 0.0,
+            "throughput": len(values) / duration if duration > 0 else 0.0,
+            "latency_ms": {
+                "mean": 1000 * sum(values) / len(values) if values else 0.0,
+                "p50": 1000 * percentile(values, 50),
+                "p95": 1000 * percentile(values, 95),
+                "p99": 1000 * percentile(values, 99),
+                "max": 1000 * values[-1] if values else 0.0
+            }
+        }
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            "totals": self._summary(all_latencies, sum(self.errors.values()), duration),
+            "tools": {
+                tool: self._summary(values, self.errors.get(tool, 0), duration)
+                for tool, values in sorted(self.latencies.items())
+            },
+            "error_samples": self.error_samples
+        }
+
+
+class Workload:
+    """Pick the next tool call according to the mix."""
+
+    def __init__(self, mix: Dict[str, float], queries: List[str], search_limit: int, seed: int) -> None:
+        self.tools = list(mix)
+        self.weights = [mix[tool] for tool in self.tools]
+        self.queries = queries
+        self.search_limit = search_limit
+        self.rng = random.Random(seed)
+        # ID dari hasil search sebelumnya, dipakai untuk 'fetch'
+        self.known_ids: List[str] = []
+
+    def next_call(self) -> Tuple[str, Dict[str, Any]]:
+        tool = self.rng.choices(self.tools, self.weights)[0]
+        if tool == "fetch" and self.known_ids:
+            return "fetch", {"id": self.rng.choice(self.known_ids)}
+        if tool == "calculate":
+            return "calculate", {
+                "operation": self.rng.choice(CALCULATE_OPERATIONS),
+                "a": self.rng.uniform(-1000, 1000),
+                "b": self.rng.uniform(1, 1000)
+            }
+        # 'fetch' sebelum ada ID yang diketahui dijalankan sebagai search
+        return "search", {"query": self.rng.choice(self.queries), "limit": self.search_limit}
+
+    def learn_ids(self, result) -> None:
+        if len(self.known_ids) >= 10000 or not result.content:
+            return
+        try:
+            data = json.loads(result.content[0].text)
+        except (AttributeError, ValueError):
+            return
+        self.known_ids.extend(item["id"] for item in data.get("results", []))
+
+
+async def call(session: ClientSession, workload: Workload, recorder: Recorder, tool: str, args: Dict[str, Any], started: float) -> None:
+    """Run one tool call; latency counts from ``started`` (the scheduled time)."""
+    error = None
+    try:
+        result = await session.call_tool(tool, args)
+        # mcp 1.x: isError, mcp 2.x: is_error
+        if getattr(result, "is_error", None) or getattr(result, "isError", False):
+            error = result.content[0].text if result.content else "tool error"
+        elif tool == "search":
+            workload.learn_ids(result)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    recorder.record(tool, time.perf_counter() - started, error)
+
+
+async def run_session(
+    url: str,
+    workload: Workload,
+    recorder: Recorder,
+    ready: asyncio.Event,
+    stop: asyncio.Event,
+    opened: List[int],
+    queue: Optional[asyncio.Queue]
+) -> None:
+    """
+    One MCP session. Closed loop: call, wait for the result, repeat.
+    Open loop (``queue`` given): run every scheduled call as soon as it arrives.
+    """
+    async with open_transport(url) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            opened.append(1)
+            await ready.wait()
+
+            if queue is None:
+                while not stop.is_set():
+                    tool, args = workload.next_call()
+                    await call(session, workload, recorder, tool, args, time.perf_counter())
+                return
+
+            pending = set()
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                task = asyncio.ensure_future(call(session, workload, recorder, *item))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+
+
+async def schedule(rate: float, workload: Workload, queues: List[asyncio.Queue], stop: asyncio.Event) -> None:
+    """Open loop: enqueue calls at a fixed total rate, round-robin over sessions."""
+    interval = 1.0 / rate
+    next_time = time.perf_counter()
+    n = 0
+    while not stop.is_set():
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tool, args = workload.next_call()
+        # Latency dihitung dari jadwal, bukan dari saat terkirim (hindari coordinated omission)
+        queues[n % len(queues)].put_nowait((tool, args, next_time))
+        n += 1
+        next_time += interval
+
+
+async def run_benchmark(args: argparse.Namespace, workload: Workload) -> Dict[str, Any]:
+    recorder = Recorder()
+    ready = asyncio.Event()
+    stop = asyncio.Event()
+    opened: List[int] = []
+    queues = [asyncio.Queue() for _ in range(args.sessions)] if args.rate > 0 else None
+
+    sessions = [
+        asyncio.ensure_future(run_session(
+            args.url, workload, recorder, ready, stop, opened, queues[i] if queues else None
+        ))
+        for i in range(args.sessions)
+    ]
+    while len(opened) < args.sessions:
+        failed = [task for task in sessions if task.done()]
+        if failed:
+            failed[0].result()
+        await asyncio.sleep(0.05)
+    print(f"🔗 {args.sessions} sessions open")
+
+    ready.set()
+    scheduler = asyncio.ensure_future(schedule(args.rate, workload, queues, stop)) if queues else None
+    if args.warmup > 0:
+        print(f"🔥 Warmup {args.warmup}s")
+        await asyncio.sleep(args.warmup)
+    recorder.measuring = True
+    started = time.perf_counter()
+    print(f"⏱️  Measuring {args.duration}s")
+    await asyncio.sleep(args.duration)
+    stop.set()
+    if scheduler:
+        await scheduler
+        for queue in queues:
+            queue.put_nowait(None)
+    await asyncio.gather(*sessions, return_exceptions=True)
+    duration = time.perf_counter() - started
+    recorder.measuring = False
+    return recorder.summary(duration)
+
+
+def wait_for_port(host: str, port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start listening on {host}:{port} within {timeout}s")
+
+
+def launch_server(args: argparse.Namespace) -> subprocess.Popen:
+    """Start src/server.py locally with the requested corpus and settings."""
+    env = dict(os.environ)
+    if args.segment:
+        env["MCP_CORPUS_SEGMENT"] = os.path.abspath(args.segment)
+    if not is_sse_url(args.url):
+        # Streamable HTTP di path URL, SSE tetap tersedia di port yang sama
+        env.setdefault("MCP_TRANSPORT", "both")
+        env.setdefault("MCP_HTTP_PATH", urlparse(args.url).path)
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "src", "server.py")],
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT
+    )
+    parsed = urlparse(args.url)
+    started = time.perf_counter()
+    wait_for_port(parsed.hostname, parsed.port or 80, process, args.startup_timeout)
+    print(f"🚀 Server started in {time.perf_counter() - started:.1f}s (pid {process.pid})")
+    return process
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Compare a run with a baseline run.
+
+    Returns:
+        Descriptions of metrics that got worse by more than ``max_regression`` percent
+    """
+    regressions = []
+    changed = [
+        key for key in ("segment", "sessions", "mix", "rate", "queries", "search_limit")
+        if result["config"].get(key) != baseline.get("config", {}).get(key)
+    ]
+    if changed:
+        print(f"⚠️  Baseline was run with a different config ({', '.join(changed)}); numbers may not be comparable")
+    rows = [("totals", result["totals"], baseline.get("totals", {}))]
+    rows += [(tool, stats, baseline.get("tools", {}).get(tool, {})) for tool, stats in result["tools"].items()]
+    print(f"\n{'metric':<28}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, current, previous in rows:
+        if not previous:
+            continue
+        metrics = [("throughput", current["throughput"], previous["throughput"], False)]
+        metrics += [
+            (f"{q} ms", current["latency_ms"][q], previous["latency_ms"][q], True)
+            for q in ("p50", "p95", "p99")
+        ]
+        metrics += [("error_rate", current["error_rate"], previous["error_rate"], True)]
+        for metric, now, before, higher_is_worse in metrics:
+            change = (now - before) / before * 100 if before else 0.0
+            print(f"{name + ' ' + metric:<28}{before:>12.2f}{now:>12.2f}{change:>9.1f}%")
+            worse = change > max_regression if higher_is_worse else change < -max_regression
+            if metric == "error_rate":
+                worse = now > before + 0.001
+            if worse:
+                regressions.append(f"{name} {metric}: {before:.2f} -> {now:.2f}")
+    return regressions
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(f"\n{'tool':<12}{'calls':>8}{'err%':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = list(summary["tools"].items()) + [("TOTAL", summary["totals"])]
+    for tool, stats in rows:
+        latency = stats["latency_ms"]
+        print(
+            f"{tool:<12}{stats['calls']:>8}{100 * stats['error_rate']:>6.1f}%{stats['throughput']:>9.1f}"
+            f"{latency['p50']:>8.1f}m{latency['p95']:>8.1f}m{latency['p99']:>8.1f}m"
+        )
+    for sample in summary["error_samples"][:5]:
+        print(f"   ❌ {sample}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load generator for the MCP SSE server")
+    parser.add_argument("--url", default=DEFAULT_URL, help="SSE (/sse) or streamable HTTP (e.g. /mcp) endpoint")
+    parser.add_argument("--launch", action="store_true", help="Start src/server.py locally for the run")
+    parser.add_argument("--segment", help="Corpus segment for the launched server (MCP_CORPUS_SEGMENT)")
+    parser.add_argument("--env", action="append", default=[], help="Extra KEY=VALUE for the launched server")
+    parser.add_argument("--server-log", help="Write the launched server's output here")
+    parser.add_argument("--startup-timeout", type=float, default=900.0, help="Seconds to wait for the server")
+    parser.add_argument("--sessions", type=int, default=16, help="Concurrent MCP sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--mix", default="search=70,fetch=20,calculate=10", help="Tool weights")
+    parser.add_argument("--rate", type=float, default=0.0, help="Total calls/s (open loop); 0 = closed loop")
+    parser.add_argument("--queries", help="File with one search query per line")
+    parser.add_argument("--search-limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write JSON results here")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    workload = Workload(parse_mix(args.mix), queries, args.search_limit, args.seed)
+
+    process = launch_server(args) if args.launch else None
+    try:
+        summary = asyncio.run(run_benchmark(args, workload))
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    result = {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("url", "segment", "env", "sessions", "duration", "warmup", "mix", "rate", "queries", "search_limit", "seed")
+        },
+        **summary
+    }
+    print_summary(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+        if regressions:
+            print("\n⚠️  Regressions:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark sharded search vs. satu index in-process
+Untuk setiap ukuran corpus: bangun SearchIndex biasa dan ShardedIndex, jalankan
+query yang sama, lalu laporkan latency (p50/p95/p99) dan throughput keduanya.
+
+Contoh:
+    python bench/shard_bench.py --sizes 10000,100000,1000000 --shards 4 --output shards.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from document_store import write_segment  # noqa: E402
+from generate_corpus import generate_documents, generate_queries  # noqa: E402
+from loadgen import percentile  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from sharding import ShardedIndex  # noqa: E402
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "queries": len(values),
+        "qps": len(values) / elapsed if elapsed else 0.0,
+        "p50_ms": 1000 * percentile(values, 50),
+        "p95_ms": 1000 * percentile(values, 95),
+        "p99_ms": 1000 * percentile(values, 99)
+    }
+
+
+def bench_single(index: SearchIndex, queries: List[str], limit: int) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        t = time.perf_counter()
+        index.search(query, limit)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def bench_sharded(index: ShardedIndex, queries: List[str], limit: int, concurrency: int) -> Dict[str, Any]:
+    latencies = []
+    missed = 0
+    pending = iter(queries)
+
+    async def worker() -> None:
+        nonlocal missed
+        for query in pending:
+            stats: Dict[str, int] = {}
+            t = time.perf_counter()
+            await index.search(query, limit, stats=stats)
+            latencies.append(time.perf_counter() - t)
+            missed += stats.get("shards_missed", 0) > 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    result: Dict[str, Any] = summarize(latencies, time.perf_counter() - started)
+    result["partial_results"] = missed
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sharded search against a single in-process index")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated corpus sizes")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent queries against the sharded index")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-shard deadline in seconds")
+    parser.add_argument("--workdir", default="/tmp", help="Where segment files are written")
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args()
+
+    queries = generate_queries(args.queries)
+    runs = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        segment = os.path.join(args.workdir, f"shard-bench-{size}.seg")
+        if not os.path.exists(segment):
+            write_segment(generate_documents(size), segment)
+        print(f"📚 {size} documents")
+
+        from document_store import SegmentDocumentStore
+        t = time.perf_counter()
+        single = SearchIndex.build(SegmentDocumentStore(segment).iter_documents())
+        single_build = time.perf_counter() - t
+        single_result = bench_single(single, queries, args.limit)
+        del single
+
+        t = time.perf_counter()
+        sharded = ShardedIndex(args.shards, segment_path=segment, timeout=args.timeout)
+        sharded_build = time.perf_counter() - t
+        try:
+            sequential = asyncio.run(bench_sharded(sharded, queries, args.limit, 1))
+            concurrent = asyncio.run(bench_sharded(sharded, queries, args.limit, args.concurrency))
+        finally:
+            sharded.close()
+
+        run = {
+            "documents": size,
+            "single": dict(single_result, build_s=single_build),
+            "sharded": dict(sequential, build_s=sharded_build),
+            "sharded_concurrent": concurrent
+        }
+        runs.append(run)
+        for name in ("single", "sharded", "sharded_concurrent"):
+            r = run[name]
+            print(f"   {name:<20} {r['qps']:>8.1f} qps  p50 {r['p50_ms']:>7.2f}ms  p95 {r['p95_ms']:>7.2f}ms  p99 {r['p99_ms']:>7.2f}ms")
+
+    result = {"cpus": os.cpu_count(), "shards": args.shards, "queries": args.queries, "concurrency": args.concurrency, "runs": runs}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Pemilihan transport MCP berdasarkan URL server
+Dipakai bersama oleh client/replay.py dan bench/loadgen.py: URL yang berakhiran
+/sse memakai transport SSE, URL lain (misalnya /mcp) streamable HTTP.
+"""
+
+from urllib.parse import urlparse
+
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamable_http_client
+
+
+def is_sse_url(url: str) -> bool:
+    """Whether the URL points at an SSE endpoint (path ending in /sse)."""
+    return urlparse(url).path.rstrip("/").endswith("/sse")
+
+
+def open_transport(url: str):
+    """SSE client for an /sse URL, streamable HTTP client for any other endpoint."""
+    if is_sse_url(url):
+        return sse_client(url, timeout=30.0)
+    return streamable_http_client(url)
@@ -0,0 +1,247 @@
+"""
+Replay panggilan tool dari file JSONL ke MCP Server
+Membaca file secara streaming (tidak dimuat seluruhnya ke memory), menjalankan
+panggilan lewat beberapa ClientSession secara paralel, dan menulis hasil sebagai
+JSONL, urut sesuai input atau sesuai urutan selesai. Run yang terhenti bisa
+dilanjutkan dengan --resume.
+
+Format input (satu per baris):
+    {"tool": "search", "arguments": {"query": "mcp server"}}
+    {"name": "fetch", "arguments": {"id": "doc-1"}, "id": "optional-tag"}
+
+Format output (satu per baris):
+    {"line": 1, "id": ..., "tool": "search", "ok": true, "result": {...}, "duration_ms": 12.3}
+
+Contoh:
+    python client/replay.py queries.jsonl results.jsonl --url http://127.0.0.1:6969/sse --sessions 8 --concurrency 16
+    python client/replay.py queries.jsonl results.jsonl --resume
+    python client/replay.py queries.jsonl results.jsonl --url http://127.0.0.1:6969/mcp
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, Optional, Set, TextIO, Tuple
+
+from mcp import ClientSession
+
+from mcp_transport import open_transport
+
+# Konfigurasi Server
+MCP_SERVER_URL = "http://103.164.191.212:6969/sse"
+
+# Item antrean: (nomor baris, isi baris)
+Job = Tuple[int, str]
+
+
+def read_jobs(path: str, skip: Set[int], start_line: int) -> Iterator[Job]:
+    """Yield (1-based line number, line) for every non-empty line still to run."""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if number < start_line or number in skip or not line.strip():
+                continue
+            yield number, line
+
+
+def load_done_lines(output_path: str) -> Set[int]:
+    """
+    Line numbers already present in an output file.
+
+    A trailing partial line (from a crash during a write) is cut off so that
+    appending continues on a clean line.
+    """
+    done: Set[int] = set()
+    if not os.path.exists(output_path):
+        return done
+    good_size = 0
+    with open(output_path, "rb") as f:
+        for raw in f:
+            # Baris tanpa newline dipotong, jadi tidak boleh dihitung selesai
+            # meskipun JSON-nya kebetulan utuh
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                done.add(int(json.loads(raw)["line"]))
+            except (ValueError, KeyError, TypeError):
+                break
+            good_size += len(raw)
+    if good_size < os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(good_size)
+    return done
+
+
+def parse_job(line: str) -> Tuple[Optional[str], Dict[str, Any], Any]:
+    """Return (tool name, arguments, caller id) of one input line."""
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("each line must be a JSON object")
+    tool = data.get("tool") or data.get("name")
+    if not tool:
+        raise ValueError("missing 'tool'")
+    arguments = data.get("arguments") or {}
+    if not isinstance(arguments, dict):
+        raise ValueError("'arguments' must be an object")
+    return tool, arguments, data.get("id")
+
+
+class ResultWriter:
+    """
+    Write results either in input order or as they complete.
+
+    In ordered mode finished results wait in a buffer until every earlier line
+    is written. The reader takes a slot of ``window`` per line and the writer
+    returns it once that line is written, so at most ``window`` lines are in
+    memory in either mode.
+    """
+
+    def __init__(self, out: TextIO, ordered: bool, lines: Iterator[int], window: int) -> None:
+        self.out = out
+        self.ordered = ordered
+        self.window = asyncio.Semaphore(window)
+        self._lines = lines
+        self._next: Optional[int] = next(lines, None)
+        self._buffer: Dict[int, str] = {}
+        self.written = 0
+        self.errors = 0
+
+    def write(self, line: int, record: Dict[str, Any]) -> None:
+        if not record["ok"]:
+            self.errors += 1
+        text = json.dumps(record, ensure_ascii=False) + "\n"
+        if not self.ordered:
+            self._emit(text)
+            return
+        self._buffer[line] = text
+        while self._next is not None and self._next in self._buffer:
+            self._emit(self._buffer.pop(self._next))
+            self._next = next(self._lines, None)
+
+    def _emit(self, text: str) -> None:
+        self.out.write(text)
+        self.written += 1
+        self.window.release()
+        # Flush rutin supaya --resume kehilangan sesedikit mungkin hasil
+        if self.written % 100 == 0:
+            self.out.flush()
+
+
+async def run_call(session: ClientSession, line: int, raw: str, retries: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    record: Dict[str, Any] = {"line": line}
+    try:
+        tool, arguments, caller_id = parse_job(raw)
+    except ValueError as e:
+        record.update({"ok": False, "error": f"Invalid input: {e}", "duration_ms": 0.0})
+        return record
+    record.update({"id": caller_id, "tool": tool})
+
+    for attempt in range(retries + 1):
+        try:
+            result = await session.call_tool(tool, arguments)
+            data = result.model_dump(mode="json", by_alias=True, exclude_none=True)
+            record["ok"] = not data.get("isError", False)
+            record["result"] = data
+            break
+        except Exception as e:
+            record["ok"] = False
+            record["error"] = f"{type(e).__name__}: {e}"
+            if attempt < retries:
+                await asyncio.sleep(0.5 * (attempt + 1))
+    record["duration_ms"] = round(1000 * (time.perf_counter() - started), 3)
+    return record
+
+
+async def run_session(
+    url: str,
+    queue: asyncio.Queue,
+    writer: ResultWriter,
+    concurrency: int,
+    retries: int
+) -> None:
+    """One MCP session with ``concurrency`` calls in flight, fed from the queue."""
+    async with open_transport(url) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+
+            async def worker() -> None:
+                while True:
+                    job = await queue.get()
+                    if job is None:
+                        return
+                    line, raw = job
+                    writer.write(line, await run_call(session, line, raw, retries))
+
+            await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+async def replay(args: argparse.Namespace) -> ResultWriter:
+    done = load_done_lines(args.output) if args.resume else set()
+    if done:
+        print(f"↩️  Resuming: {len(done)} lines already in {args.output}", file=sys.stderr)
+
+    workers = args.sessions * args.concurrency
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    mode = "a" if args.resume else "w"
+    with open(args.output, mode, encoding="utf-8") as out:
+        writer = ResultWriter(
+            out,
+            args.order == "input",
+            (line for line, _ in read_jobs(args.input, done, args.start_line)),
+            args.window or workers * 4
+        )
+        sessions = [
+            asyncio.ensure_future(run_session(args.url, queue, writer, args.concurrency, args.retries))
+            for _ in range(args.sessions)
+        ]
+
+        try:
+            for job in read_jobs(args.input, done, args.start_line):
+                await writer.window.acquire()
+                # Jangan menunggu selamanya kalau semua session sudah gagal
+                while True:
+                    try:
+                        await asyncio.wait_for(queue.put(job), 1.0)
+                        break
+                    except asyncio.TimeoutError:
+                        if all(task.done() for task in sessions):
+                            for task in sessions:
+                                task.result()
+            for _ in range(workers):
+                await queue.put(None)
+            await asyncio.gather(*sessions)
+        finally:
+            for task in sessions:
+                task.cancel()
+            out.flush()
+    return writer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay tool calls from a JSONL file against an MCP server")
+    parser.add_argument("input", help="JSONL file with one tool call per line")
+    parser.add_argument("output", help="JSONL file for the results")
+    parser.add_argument("--url", default=MCP_SERVER_URL, help="SSE (/sse) or streamable HTTP (e.g. /mcp) endpoint")
+    parser.add_argument("--sessions", type=int, default=4, help="Number of MCP sessions")
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls in flight per session")
+    parser.add_argument("--order", choices=["input", "completed"], default="input", help="Output order")
+    parser.add_argument("--window", type=int, default=0, help="Max lines buffered (default 4x total concurrency)")
+    parser.add_argument("--retries", type=int, default=0, help="Retries for failed calls (connection errors)")
+    parser.add_argument("--resume", action="store_true", help="Skip lines already in the output file and append")
+    parser.add_argument("--start-line", type=int, default=1, help="First input line to run (1-based)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    writer = asyncio.run(replay(args))
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ {writer.written} calls in {elapsed:.1f}s ({writer.written / elapsed:.0f}/s), {writer.errors} errors",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
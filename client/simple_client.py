@@ -1,169 +1,331 @@
 """
 Simple HTTP Client untuk mengakses MCP Server (tanpa library MCP)
 Menggunakan httpx untuk SSE connection
+
+Satu session = satu stream SSE yang terus terbuka + satu httpx.AsyncClient dengan
+koneksi keep-alive. Banyak request bisa berjalan bersamaan; response dari stream
+SSE dicocokkan ke request lewat JSON-RPC id.
+
+Contoh:
+    async with MCPClient("http://127.0.0.1:6969") as client:
+        tools = await client.list_tools()
+        results = await asyncio.gather(*[
+            client.call_tool("calculate", {"operation": "add", "a": i, "b": 1})
+            for i in range(500)
+        ])
 """
 
-import httpx
+import asyncio
+import itertools
 import json
-import uuid
+import time
+from typing import Any, Dict, Optional, Set
+from urllib.parse import urljoin
+
+import httpx
 
 # Konfigurasi Server
 MCP_SERVER_URL = "http://103.164.191.212:6969"
 
+PROTOCOL_VERSION = "2024-11-05"
+CLIENT_INFO = {"name": "simple-mcp-client", "version": "2.0.0"}
+
+# Kode JSON-RPC untuk request server yang tidak didukung client ini
+METHOD_NOT_FOUND = -32601
+
+
+class MCPError(Exception):
+    """JSON-RPC error returned by the server."""
+
+    def __init__(self, code: int, message: str, data: Any = None) -> None:
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class MCPClient:
+    """
+    Async MCP client over the SSE transport.
+
+    ``connect()`` opens the SSE stream once and keeps reading it in a
+    background task. Requests are POSTed to the session's message endpoint on
+    a pooled keep-alive connection, and each waits on a future that the reader
+    resolves when the response with the same JSON-RPC id arrives. At most
+    ``max_concurrency`` requests are in flight at once; extra calls wait.
 
-def call_tool(session_id: str, tool_name: str, arguments: dict) -> dict:
-    """Call a tool on the MCP server"""
-    
-    message = {
-        "jsonrpc": "2.0",
-        "id": str(uuid.uuid4()),
-        "method": "tools/call",
-        "params": {
-            "name": tool_name,
-            "arguments": arguments
-        }
-    }
-    
-    url = f"{MCP_SERVER_URL}/messages/?session_id={session_id}"
-    
-    response = httpx.post(
-        url,
-        json=message,
-        headers={"Content-Type": "application/json"},
-        timeout=30.0
-    )
-    
-    return response.json()
-
-
-def get_session_id() -> str:
-    """Get session ID from SSE endpoint"""
-    
-    with httpx.stream("GET", f"{MCP_SERVER_URL}/sse", timeout=10.0) as response:
-        for line in response.iter_lines():
-            if line.startswith("data:"):
-                data = line[5:].strip()
-                # Parse session_id dari URL
-                if "session_id=" in data:
-                    return data.split("session_id=")[1]
-    return None
-
-
-def initialize_session(session_id: str) -> dict:
-    """Initialize MCP session"""
-    
-    message = {
-        "jsonrpc": "2.0",
-        "id": str(uuid.uuid4()),
-        "method": "initialize",
-        "params": {
-            "protocolVersion": "2024-11-05",
+    Requests the server sends on the stream have their own id space, so they
+    are never matched against pending calls: ``ping`` is answered, anything
+    else (sampling, roots/list, ...) is rejected with "method not found",
+    since the client declares no capabilities.
+    """
+
+    def __init__(
+        self,
+        base_url: str = MCP_SERVER_URL,
+        max_concurrency: int = 64,
+        timeout: float = 30.0,
+        max_connections: int = 16
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session_id: Optional[str] = None
+        self.server_info: Dict[str, Any] = {}
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, read=None),
+            limits=httpx.Limits(max_connections=max_connections + 1, max_keepalive_connections=max_connections)
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._replies: Set[asyncio.Task] = set()
+        self._endpoint: Optional[asyncio.Future] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._stream_context = None
+
+    async def __aenter__(self) -> "MCPClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def connect(self) -> Dict[str, Any]:
+        """
+        Open the SSE stream and initialize the MCP session.
+
+        Returns:
+            The server's initialize result
+        """
+        loop = asyncio.get_running_loop()
+        self._endpoint = loop.create_future()
+        self._stream_context = self._http.stream("GET", f"{self.base_url}/sse", headers={"Accept": "text/event-stream"})
+        response = await self._stream_context.__aenter__()
+        response.raise_for_status()
+        self._reader = asyncio.ensure_future(self._read_events(response))
+
+        # Endpoint event berisi URL messages dengan session_id
+        self._message_url = await asyncio.wait_for(self._endpoint, self.timeout)
+        self.session_id = self._message_url.split("session_id=")[-1]
+
+        result = await self.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
             "capabilities": {},
-            "clientInfo": {
-                "name": "simple-mcp-client",
-                "version": "1.0.0"
-            }
-        }
-    }
-    
-    url = f"{MCP_SERVER_URL}/messages/?session_id={session_id}"
-    
-    response = httpx.post(
-        url,
-        json=message,
-        headers={"Content-Type": "application/json"},
-        timeout=30.0
-    )
-    
-    return response.json()
-
-
-def list_tools(session_id: str) -> dict:
-    """List available tools"""
-    
-    message = {
-        "jsonrpc": "2.0",
-        "id": str(uuid.uuid4()),
-        "method": "tools/list",
-        "params": {}
-    }
-    
-    url = f"{MCP_SERVER_URL}/messages/?session_id={session_id}"
-    
-    response = httpx.post(
-        url,
-        json=message,
-        headers={"Content-Type": "application/json"},
-        timeout=30.0
-    )
-    
-    return response.json()
-
-
-def main():
+            "clientInfo": CLIENT_INFO
+        })
+        self.server_info = result.get("serverInfo", {})
+        await self.notify("notifications/initialized")
+        return result
+
+    async def _read_events(self, response) -> None:
+        """Parse the SSE stream and dispatch events until it ends."""
+        event, data = "message", []
+        error: Exception = ConnectionError("SSE stream closed")
+        try:
+            async for line in response.aiter_lines():
+                if line == "":
+                    if data:
+                        self._dispatch(event, "\n".join(data))
+                    event, data = "message", []
+                elif line.startswith(":"):
+                    continue  # komentar / ping
+                else:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        event = value
+                    elif field == "data":
+                        data.append(value)
+        except Exception as e:
+            error = e
+        finally:
+            if self._endpoint and not self._endpoint.done():
+                self._endpoint.set_exception(error)
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    def _dispatch(self, event: str, data: str) -> None:
+        if event == "endpoint":
+            if not self._endpoint.done():
+                self._endpoint.set_result(urljoin(f"{self.base_url}/", data))
+            return
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        if "method" in message:
+            # Request dari server dijawab; notifikasi (tanpa id) diabaikan
+            if "id" in message:
+                self._answer(message)
+            return
+        if "result" not in message and "error" not in message:
+            return
+        future = self._pending.get(message.get("id"))
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def _answer(self, request: Dict[str, Any]) -> None:
+        """Reply to a server-initiated request in the background."""
+        if request["method"] == "ping":
+            reply = {"jsonrpc": "2.0", "id": request["id"], "result": {}}
+        else:
+            reply = {"jsonrpc": "2.0", "id": request["id"], "error": {
+                "code": METHOD_NOT_FOUND,
+                "message": f"Method not supported by this client: {request['method']}"
+            }}
+        task = asyncio.ensure_future(self._send_reply(reply))
+        self._replies.add(task)
+        task.add_done_callback(self._replies.discard)
+
+    async def _send_reply(self, reply: Dict[str, Any]) -> None:
+        try:
+            await self._post(reply)
+        except Exception:
+            # Server yang menunggu jawaban akan timeout sendiri
+            pass
+
+    async def _post(self, message: Dict[str, Any]) -> None:
+        response = await self._http.post(self._message_url, json=message)
+        if response.status_code >= 400:
+            raise MCPError(response.status_code, response.text.strip())
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request and wait for its response.
+
+        Args:
+            method: JSON-RPC method, e.g. "tools/call"
+            params: Method parameters
+
+        Returns:
+            The response's 'result'
+
+        Raises:
+            MCPError: If the server returns a JSON-RPC error
+            asyncio.TimeoutError: If no response arrives within the timeout
+            ConnectionError: If the SSE stream closes first
+        """
+        async with self._semaphore:
+            if self._reader is None or self._reader.done():
+                raise ConnectionError("SSE stream closed")
+            request_id = next(self._ids)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            try:
+                await self._post({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+                message = await asyncio.wait_for(future, self.timeout)
+            finally:
+                self._pending.pop(request_id, None)
+
+        if "error" in message:
+            error = message["error"]
+            raise MCPError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return message.get("result", {})
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Send a JSON-RPC notification (no response expected)."""
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params:
+            message["params"] = params
+        await self._post(message)
+
+    async def list_tools(self) -> list:
+        """List available tools"""
+        result = await self.request("tools/list")
+        return result.get("tools", [])
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a tool on the MCP server"""
+        return await self.request("tools/call", {"name": tool_name, "arguments": arguments})
+
+    async def close(self) -> None:
+        """Close the SSE stream and the connection pool."""
+        for task in list(self._replies):
+            task.cancel()
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._stream_context:
+            try:
+                await self._stream_context.__aexit__(None, None, None)
+            except Exception:
+                pass
+            self._stream_context = None
+        await self._http.aclose()
+
+
+def result_text(result: Dict[str, Any]) -> str:
+    """First text content of a tool result."""
+    return result.get("content", [{}])[0].get("text", "No result")
+
+
+async def main():
     print(f"🔗 Connecting to MCP Server: {MCP_SERVER_URL}")
     print("=" * 50)
-    
-    # 1. Get session ID
-    print("📡 Getting session ID...")
-    session_id = get_session_id()
-    if not session_id:
-        print("❌ Failed to get session ID")
-        return
-    print(f"   Session ID: {session_id[:20]}...")
-    print()
-    
-    # 2. Initialize session
-    print("🔧 Initializing session...")
-    init_result = initialize_session(session_id)
-    print(f"   Server: {init_result.get('result', {}).get('serverInfo', {}).get('name', 'Unknown')}")
-    print()
-    
-    # 3. List tools
-    print("📦 Available Tools:")
-    print("-" * 30)
-    tools_result = list_tools(session_id)
-    tools = tools_result.get("result", {}).get("tools", [])
-    for tool in tools:
-        print(f"  • {tool['name']}: {tool.get('description', '')}")
-    print()
-    
-    # 4. Test 'hello' tool
-    print("🧪 Testing 'hello' tool...")
-    result = call_tool(session_id, "hello", {"name": "World"})
-    content = result.get("result", {}).get("content", [{}])[0].get("text", "No result")
-    print(f"   Result: {content}")
-    print()
-    
-    # 5. Test 'calculate' tool
-    print("🧪 Testing 'calculate' tool...")
-    operations = [
-        {"operation": "add", "a": 10, "b": 5},
-        {"operation": "multiply", "a": 7, "b": 8},
-    ]
-    for op in operations:
-        result = call_tool(session_id, "calculate", op)
-        content = result.get("result", {}).get("content", [{}])[0].get("text", "No result")
-        print(f"   {op['a']} {op['operation']} {op['b']} = {content}")
-    print()
-    
-    # 6. Test 'get_time' tool
-    print("🧪 Testing 'get_time' tool...")
-    result = call_tool(session_id, "get_time", {"timezone": "Asia/Jakarta"})
-    content = result.get("result", {}).get("content", [{}])[0].get("text", "No result")
-    print(f"   Result: {content}")
-    print()
-    
-    # 7. Test 'server_info' tool
-    print("🧪 Testing 'server_info' tool...")
-    result = call_tool(session_id, "server_info", {})
-    content = result.get("result", {}).get("content", [{}])[0].get("text", "No result")
-    print(f"   Result: {content}")
-    print()
-    
+
+    async with MCPClient(MCP_SERVER_URL) as client:
+        # 1. Session
+        print(f"📡 Session ID: {client.session_id[:20]}...")
+        print(f"   Server: {client.server_info.get('name', 'Unknown')}")
+        print()
+
+        # 2. List tools
+        print("📦 Available Tools:")
+        print("-" * 30)
+        for tool in await client.list_tools():
+            print(f"  • {tool['name']}: {tool.get('description', '')}")
+        print()
+
+        # 3. Test 'hello' tool
+        print("🧪 Testing 'hello' tool...")
+        result = await client.call_tool("hello", {"name": "World"})
+        print(f"   Result: {result_text(result)}")
+        print()
+
+        # 4. Test 'calculate' tool
+        print("🧪 Testing 'calculate' tool...")
+        operations = [
+            {"operation": "add", "a": 10, "b": 5},
+            {"operation": "multiply", "a": 7, "b": 8},
+        ]
+        for op in operations:
+            result = await client.call_tool("calculate", op)
+            print(f"   {op['a']} {op['operation']} {op['b']} = {result_text(result)}")
+        print()
+
+        # 5. Test 'get_time' tool
+        print("🧪 Testing 'get_time' tool...")
+        result = await client.call_tool("get_time", {"timezone": "Asia/Jakarta"})
+        print(f"   Result: {result_text(result)}")
+        print()
+
+        # 6. Test 'server_info' tool
+        print("🧪 Testing 'server_info' tool...")
+        result = await client.call_tool("server_info", {})
+        print(f"   Result: {result_text(result)}")
+        print()
+
+        # 7. Banyak panggilan bersamaan dalam satu session
+        print("🧪 Testing 200 concurrent 'calculate' calls...")
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            client.call_tool("calculate", {"operation": "add", "a": i, "b": 1})
+            for i in range(200)
+        ])
+        elapsed = time.perf_counter() - started
+        print(f"   {200 / elapsed:.0f} calls/s")
+        print()
+
     print("=" * 50)
     print("✅ All tests completed!")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
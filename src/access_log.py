@@ -0,0 +1,328 @@
+"""
+Logging non-blocking dan access log terstruktur untuk tools MCP
+Semua record logging masuk ke antrean berbatas lewat QueueHandler dan baru
+diformat (JSON per baris atau teks) lalu ditulis ke stderr oleh satu thread
+writer, jadi thread event loop tidak pernah menunggu I/O. Setiap tools/call
+menghasilkan satu record access (tool, request id, durasi, jumlah hasil, ...)
+dengan sampling dan batas laju per tool; call yang error atau lambat selalu
+dicatat.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Optional
+
+from fastmcp.server.middleware import Middleware
+
+from admission import TokenBucket
+
+# Logger untuk record access (satu per tools/call)
+ACCESS_LOGGER = "access"
+
+# Atribut bawaan LogRecord; atribut lain (dari extra=...) ditulis sebagai field.
+# "color_message" adalah versi berwarna pesan dari uvicorn
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "color_message"}
+
+# Field tambahan call yang sedang berjalan (diisi tool lewat ``annotate``)
+_call_fields: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("access_log_fields", default=None)
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS}
+
+
+def _timestamp(record: logging.LogRecord) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, the extra fields and exc."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": _timestamp(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """``ts LEVEL logger: msg key=value ...`` for reading in a terminal."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{_timestamp(record)} {record.levelname} {record.name}: {record.getMessage()}"
+        extra = _extra_fields(record)
+        if extra:
+            line += " " + " ".join(f"{key}={json.dumps(value, ensure_ascii=False, default=str)}" for key, value in extra.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks and never formats.
+
+    The stdlib ``prepare`` formats the message in the logging thread; here the
+    record is queued as is and formatted by the writer thread. When the queue
+    is full the record is dropped and counted instead of waiting.
+    """
+
+    def __init__(self, log_queue: queue.Queue, owner: "QueueLogging") -> None:
+        super().__init__(log_queue)
+        self.owner = owner
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.owner.dropped += 1
+
+    def close(self) -> None:
+        # logging.shutdown (atexit, atau worker sebelum os._exit) menutup handler:
+        # tulis dulu semua record yang masih di antrean
+        self.owner.stop()
+        super().close()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Menunggu bila antrean penuh; writer sedang mengosongkannya
+        self.queue.put(self._sentinel)
+
+
+class QueueLogging:
+    """
+    Root logging through a bounded queue and one background writer thread.
+
+    Replaces ``logging.basicConfig``: the root logger gets a single handler
+    that puts records on a queue (a few microseconds, no I/O, no formatting)
+    and a ``QueueListener`` thread formats and writes them to stderr. A full
+    queue drops records rather than stall the caller (``dropped``). The writer
+    thread is paused around every fork, so it never holds a lock (of the
+    stream or the queue) that the child would inherit; forked children
+    (workers, shard processes) get a fresh queue and writer automatically.
+    """
+
+    def __init__(self, level: str = "INFO", fmt: str = "json", queue_size: int = 10000) -> None:
+        self.queue_size = queue_size
+        self.dropped = 0
+        # Dibuat sebelum QueueHandler: logging.shutdown menutup handler dari yang
+        # terbaru, jadi antrean dikosongkan sebelum stream ini ditutup
+        self.stream = logging.StreamHandler(sys.stderr)
+        self.stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        self.handler = _DroppingQueueHandler(queue.Queue(queue_size), self)
+        self.listener: Optional[QueueListener] = None
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level.upper())
+        self._paused = False
+        self.start()
+        os.register_at_fork(before=self._before_fork, after_in_parent=self._after_fork_parent, after_in_child=self._after_fork)
+
+    def start(self) -> None:
+        self.listener = _Listener(self.handler.queue, self.stream)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Write the queued records and stop the writer thread."""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+
+    def _before_fork(self) -> None:
+        # Record yang masuk selama fork tetap di antrean dan ditulis setelahnya
+        self._paused = self.listener is not None
+        self.stop()
+
+    def _after_fork_parent(self) -> None:
+        if self._paused:
+            self._paused = False
+            self.start()
+
+    def _after_fork(self) -> None:
+        self._paused = False
+        # Lock antrean lama bisa saja sedang dipegang thread lain saat fork, dan
+        # isinya milik parent: child memakai antrean dan writer baru
+        self.handler.queue = queue.Queue(self.queue_size)
+        self.dropped = 0
+        self.start()
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self.handler.queue.qsize(), "dropped": self.dropped}
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", queue_size: int = 10000) -> QueueLogging:
+    """
+    Route all logging through a ``QueueLogging`` pipeline.
+
+    Args:
+        level: Root log level name
+        fmt: "json" (one object per line) or "text"
+        queue_size: Records buffered before new ones are dropped
+
+    Returns:
+        The pipeline (for its ``stats``)
+    """
+    if fmt not in ("json", "text"):
+        raise ValueError(f"Unknown log format '{fmt}'. Use: json, text")
+    return QueueLogging(level, fmt, queue_size)
+
+
+def annotate(**fields: Any) -> None:
+    """
+    Add fields (result count, document id, ...) to the access record of the current call.
+
+    Cheap enough for the hot path: one context variable lookup and a dict
+    update. Works in offloaded threads too, since they run in a copy of the
+    caller's context. Does nothing outside a tools/call.
+    """
+    current = _call_fields.get()
+    if current is not None:
+        current.update(fields)
+
+
+def parse_rates(spec: str, maximum: Optional[float] = None) -> Dict[str, float]:
+    """
+    Parse "search=0.1,*=1" into {tool: rate}.
+
+    Used for the sampling probabilities (``maximum`` 1) and the records per
+    second of ``AccessLog``.
+
+    Raises:
+        ValueError: If an entry is not "tool=number", or a rate is negative or
+            above ``maximum``
+    """
+    rates = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        tool, sep, value = item.partition("=")
+        tool = tool.strip()
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = float("nan")
+        if not sep or not tool or not rate >= 0 or (maximum is not None and rate > maximum):
+            limit = f"0-{maximum:g}" if maximum is not None else ">= 0"
+            raise ValueError(f"Invalid rate '{item.strip()}': expected tool=number ({limit})")
+        rates[tool] = rate
+    return rates
+
+
+class AccessLog:
+    """
+    Decides which tools/call records are written, per tool.
+
+    A successful call is kept with probability ``sample[tool]`` and then only
+    while the tool's token bucket (``rates[tool]`` records per second, burst of
+    one second) has a token. Failed calls and calls slower than ``slow_ms``
+    skip both checks. The "*" entry of ``sample`` and ``rates`` is the default
+    for tools not listed (sample 1, rate 0 = unlimited otherwise).
+
+    Buckets exist only for the registered ``tools`` and "*": calls to any
+    other name (client-chosen) share the "*" bucket, so they cannot grow the
+    bucket table.
+    """
+
+    def __init__(
+        self,
+        sample: Dict[str, float],
+        rates: Dict[str, float],
+        slow_ms: float = 1000.0,
+        tools: Iterable[str] = ()
+    ) -> None:
+        self.sample = sample
+        self.rates = rates
+        self.slow_ms = slow_ms
+        self.logger = logging.getLogger(ACCESS_LOGGER)
+        self._buckets: Dict[str, Optional[TokenBucket]] = {
+            tool: self._new_bucket(self.rates.get(tool, self.rates.get("*", 0.0))) for tool in tools
+        }
+        self._buckets["*"] = self._new_bucket(self.rates.get("*", 0.0))
+        self.logged = 0
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    @staticmethod
+    def _new_bucket(rate: float) -> Optional[TokenBucket]:
+        return TokenBucket(rate, max(rate, 1.0)) if rate > 0 else None
+
+    def _bucket(self, tool: str) -> Optional[TokenBucket]:
+        return self._buckets[tool] if tool in self._buckets else self._buckets["*"]
+
+    def keep(self, tool: str, duration_ms: float, error: bool) -> bool:
+        """Whether the record of a finished call is written (updates the counters)."""
+        if not error and duration_ms < self.slow_ms:
+            rate = self.sample.get(tool, self.sample.get("*", 1.0))
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return False
+            bucket = self._bucket(tool)
+            if bucket is not None and bucket.take() > 0:
+                self.rate_limited += 1
+                return False
+        self.logged += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"logged": self.logged, "sampled_out": self.sampled_out, "rate_limited": self.rate_limited}
+
+
+class AccessLogMiddleware(Middleware):
+    """Write one structured record per tools/call, subject to ``AccessLog`` sampling."""
+
+    def __init__(self, access_log: AccessLog) -> None:
+        self.access_log = access_log
+
+    async def on_call_tool(self, context, call_next):
+        if not self.access_log.logger.isEnabledFor(logging.INFO):
+            return await call_next(context)
+        fields: Dict[str, Any] = {}
+        token = _call_fields.set(fields)
+        started = time.perf_counter()
+        error = None
+        try:
+            return await call_next(context)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _call_fields.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            tool = context.message.name
+            if self.access_log.keep(tool, duration_ms, error is not None):
+                # Record baru dibangun setelah lolos sampling; format JSON di thread writer
+                record = {"tool": tool, "request_id": None, "session_id": None}
+                ctx = context.fastmcp_context
+                if ctx is not None and ctx.request_context is not None:
+                    record["request_id"] = ctx.request_id
+                    record["session_id"] = ctx.session_id
+                record["duration_ms"] = round(duration_ms, 3)
+                record["status"] = "ok" if error is None else "error"
+                if error is not None:
+                    record["error"] = f"{type(error).__name__}: {error}"
+                record.update(fields)
+                # makeRecord + handle, tanpa findCaller (menelusuri stack): lokasi
+                # kode tidak berguna di record access
+                logger = self.access_log.logger
+                level = logging.WARNING if error is not None else logging.INFO
+                logger.handle(logger.makeRecord(logger.name, level, "", 0, "tools/call", None, None, extra=record))
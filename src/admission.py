@@ -0,0 +1,362 @@
+"""
+Admission control untuk tools/call
+Membatasi jumlah call yang berjalan (global dan per session), panjang antrean
+beserta batas waktu tunggunya, laju call per session (token bucket), dan jumlah
+session MCP (stream SSE dan session streamable HTTP) yang hidup. Call yang tidak
+bisa dilayani langsung ditolak dengan error JSON-RPC, sehingga latency tetap
+terprediksi saat server kelebihan beban.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from fastmcp.server.middleware import Middleware
+from mcp.shared.exceptions import MCPError
+
+logger = logging.getLogger(__name__)
+
+# Kode error JSON-RPC untuk penolakan (rentang "server error" -32000..-32099);
+# alasan dan saran waktu retry ada di 'data'
+OVERLOADED_ERROR = -32000
+
+# Alasan penolakan (juga nama counter)
+REJECT_REASONS = ("rate_limited", "queue_full", "queue_timeout", "sessions")
+
+# Session tanpa call aktif dibersihkan setiap sekian admission
+SWEEP_EVERY = 1000
+
+# Session streamable HTTP tanpa request selama ini dianggap sudah ditutup
+# (sama dengan idle timeout default session manager SDK MCP, 30 menit)
+HTTP_SESSION_IDLE_TIMEOUT = 1800.0
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``burst`` stored."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """
+        Take one token.
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class _Session:
+    """Admission state of one MCP session."""
+
+    def __init__(self, max_concurrent: int, bucket: Optional[TokenBucket]) -> None:
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.bucket = bucket
+        self.active = 0
+        self.queued = 0
+
+
+class _LiveSession:
+    """Activity of one streamable HTTP session, for the session cap."""
+
+    __slots__ = ("last_seen", "active")
+
+    def __init__(self) -> None:
+        self.last_seen = time.monotonic()
+        self.active = 0
+
+
+class AdmissionController:
+    """
+    Decides whether a tool call may run now, wait, or must be rejected.
+
+    A call first takes a token from its session's bucket (when a rate is
+    set), then waits for a per-session slot and a global slot. Waiting calls
+    are bounded globally (``max_queued``) and per session
+    (``max_session_queued``), and may wait at most ``queue_timeout`` seconds;
+    beyond any of these limits the call is rejected at once. All state lives
+    on the event loop, so no locks are needed; with MCP_WORKERS > 1 every
+    worker enforces the limits separately.
+
+    ``max_sessions`` caps the live MCP sessions counted by
+    ``StreamLimitMiddleware``: open streams without a session id (``/sse``)
+    plus streamable HTTP sessions from their initialize response until
+    DELETE, a 404 for their id, or ``session_idle_timeout`` seconds without
+    a request.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 64,
+        max_session_concurrent: int = 8,
+        max_queued: int = 256,
+        max_session_queued: int = 32,
+        queue_timeout: float = 5.0,
+        session_rate: float = 0.0,
+        session_burst: float = 0.0,
+        max_sessions: int = 0,
+        session_idle_timeout: float = HTTP_SESSION_IDLE_TIMEOUT
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_session_concurrent = max_session_concurrent
+        self.max_queued = max_queued
+        self.max_session_queued = max_session_queued
+        self.queue_timeout = queue_timeout
+        self.session_rate = session_rate
+        self.session_burst = session_burst or max(1.0, session_rate)
+        self.max_sessions = max_sessions
+        self.session_idle_timeout = session_idle_timeout
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._sessions: Dict[str, _Session] = {}
+        self._admissions = 0
+        self.active = 0
+        self.queued = 0
+        self.streams_open = 0
+        self.http_sessions: Dict[bytes, _LiveSession] = {}
+        self.admitted = 0
+        self.rejected = dict.fromkeys(REJECT_REASONS, 0)
+
+    def _session(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            bucket = TokenBucket(self.session_rate, self.session_burst) if self.session_rate > 0 else None
+            session = self._sessions[session_id] = _Session(self.max_session_concurrent, bucket)
+        return session
+
+    def _reject(self, reason: str, message: str, retry_after: float) -> MCPError:
+        self.rejected[reason] += 1
+        return MCPError(
+            OVERLOADED_ERROR,
+            message,
+            {"reason": reason, "retry_after": round(retry_after, 3)}
+        )
+
+    def _sweep(self) -> None:
+        """Forget idle sessions whose bucket has refilled (nothing left to remember)."""
+        for session_id, session in list(self._sessions.items()):
+            if not session.active and not session.queued and (session.bucket is None or session.bucket.is_full()):
+                del self._sessions[session_id]
+
+    async def acquire(self, session_id: str) -> None:
+        """
+        Admit one call of a session, waiting in the queue if needed.
+
+        Every successful ``acquire`` must be paired with ``release``.
+
+        Args:
+            session_id: MCP session of the call
+
+        Raises:
+            MCPError: If the call is rate limited, the queue is full, or it
+                waited longer than the queue-time budget
+        """
+        if self._slots is None:
+            # Dibuat di event loop yang benar (bukan saat import)
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._admissions += 1
+        if self._admissions % SWEEP_EVERY == 0:
+            self._sweep()
+
+        session = self._session(session_id)
+        if session.bucket is not None:
+            wait = session.bucket.take()
+            if wait:
+                raise self._reject("rate_limited", "Rate limit exceeded for this session", wait)
+
+        # Jalur cepat: ada slot kosong, tidak perlu antre
+        if not session.slots.locked() and not self._slots.locked():
+            await session.slots.acquire()
+            await self._slots.acquire()
+        else:
+            if self.queued >= self.max_queued or session.queued >= self.max_session_queued:
+                raise self._reject("queue_full", "Server is overloaded, too many calls waiting", self.queue_timeout)
+            self.queued += 1
+            session.queued += 1
+            started = time.monotonic()
+            holds_session_slot = False
+            try:
+                await asyncio.wait_for(session.slots.acquire(), self.queue_timeout)
+                holds_session_slot = True
+                await asyncio.wait_for(self._slots.acquire(), max(0.0, self.queue_timeout - (time.monotonic() - started)))
+            except asyncio.TimeoutError:
+                if holds_session_slot:
+                    session.slots.release()
+                raise self._reject("queue_timeout", "Server is overloaded, call waited too long", self.queue_timeout)
+            except BaseException:
+                if holds_session_slot:
+                    session.slots.release()
+                raise
+            finally:
+                self.queued -= 1
+                session.queued -= 1
+
+        self.active += 1
+        session.active += 1
+        self.admitted += 1
+
+    def release(self, session_id: str) -> None:
+        session = self._sessions[session_id]
+        session.active -= 1
+        self.active -= 1
+        session.slots.release()
+        self._slots.release()
+
+    @property
+    def sessions_open(self) -> int:
+        """Live sessions counted against ``max_sessions``."""
+        return self.streams_open + len(self.http_sessions)
+
+    def expire_sessions(self, now: Optional[float] = None) -> int:
+        """Forget streamable HTTP sessions idle for ``session_idle_timeout``; returns how many."""
+        cutoff = (time.monotonic() if now is None else now) - self.session_idle_timeout
+        expired = [
+            session_id for session_id, session in self.http_sessions.items()
+            if not session.active and session.last_seen < cutoff
+        ]
+        for session_id in expired:
+            del self.http_sessions[session_id]
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "streams_open": self.streams_open,
+            "http_sessions": len(self.http_sessions),
+            "sessions_tracked": len(self._sessions),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected)
+        }
+
+
+class AdmissionMiddleware(Middleware):
+    """Apply an ``AdmissionController`` to every tools/call."""
+
+    def __init__(self, controller: AdmissionController) -> None:
+        self.controller = controller
+
+    async def on_call_tool(self, context, call_next):
+        ctx = context.fastmcp_context
+        session_id = ctx.session_id if ctx is not None else ""
+        try:
+            await self.controller.acquire(session_id)
+        except MCPError as e:
+            logger.warning("Rejected '%s' call: %s", context.message.name, e.data["reason"])
+            raise
+        try:
+            return await call_next(context)
+        finally:
+            self.controller.release(session_id)
+
+
+class StreamLimitMiddleware:
+    """
+    ASGI middleware capping the number of live MCP sessions.
+
+    ``paths`` are the MCP endpoints: ``/sse`` and the streamable HTTP path.
+    A request there without an ``Mcp-Session-Id`` header opens a session: a
+    ``GET`` stream (``/sse``) counts while it stays open, and a ``POST``
+    (initialize) counts while in flight and, once the response assigns a
+    session id, as a live streamable HTTP session until that session ends
+    (see ``AdmissionController``). Opening requests beyond ``max_sessions``
+    live sessions get 503 with Retry-After. Requests of existing sessions
+    pass through and only keep their session alive.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths: Sequence[str] = ("/sse",)) -> None:
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(path.rstrip("/") or "/" for path in paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or (scope["path"].rstrip("/") or "/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        session_id = _header(scope["headers"], b"mcp-session-id")
+        if session_id is not None:
+            await self._session_request(scope, receive, send, session_id)
+        elif scope["method"] in ("GET", "POST"):
+            await self._open_session(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _open_session(self, scope, receive, send) -> None:
+        controller = self.controller
+        controller.expire_sessions()
+        if controller.max_sessions and controller.sessions_open >= controller.max_sessions:
+            controller.rejected["sessions"] += 1
+            retry_after = max(1, round(controller.queue_timeout))
+            body = json.dumps({"error": "Too many open sessions", "retry_after": retry_after}).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", str(retry_after).encode("ascii"))
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def track(message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                # Initialize streamable HTTP: session hidup sejak id-nya dikirim
+                new_id = _header(message.get("headers", []), b"mcp-session-id")
+                if new_id is not None:
+                    controller.http_sessions[new_id] = _LiveSession()
+            await send(message)
+
+        controller.streams_open += 1
+        try:
+            await self.app(scope, receive, track)
+        finally:
+            controller.streams_open -= 1
+
+    async def _session_request(self, scope, receive, send, session_id: bytes) -> None:
+        controller = self.controller
+        live = controller.http_sessions.get(session_id)
+        status = 0
+
+        async def track(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        if live is not None:
+            live.active += 1
+        try:
+            await self.app(scope, receive, track)
+        finally:
+            if live is not None:
+                live.active -= 1
+                live.last_seen = time.monotonic()
+            # DELETE berhasil atau 404 (session sudah tidak ada di server): session selesai
+            if status == 404 or (scope["method"] == "DELETE" and 200 <= status < 300):
+                controller.http_sessions.pop(session_id, None)
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
@@ -0,0 +1,126 @@
+"""
+Cache in-process untuk hasil tool (LRU + TTL)
+Entry otomatis dibuang saat versi document store berubah.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Size-bounded LRU cache with optional TTL and version-based invalidation.
+
+    Every lookup passes the corpus version of the caller's snapshot. A newer
+    version drops the whole cache, so a reload can never serve stale results.
+    Callers still holding an older snapshot neither read nor write entries.
+    With ``max_bytes`` the cache also keeps the sum of the sizes passed to
+    ``put`` within that budget. Hit, miss, eviction, expiration and
+    invalidation counters are kept for sizing the cache.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None, max_bytes: int = 0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl or None
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._version = -1
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: int) -> bool:
+        """Invalidate on a newer version; return False for an outdated caller."""
+        if version > self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+                self.bytes = 0
+            self._version = version
+        return version == self._version
+
+    def get(self, key: Hashable, version: int = 0) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+            version: Corpus version of the caller's snapshot
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: int = 0, size: int = 0) -> None:
+        """
+        Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            version: Corpus version the value was computed against
+            size: Approximate memory of the value in bytes (for ``max_bytes``)
+        """
+        if self.max_entries <= 0 or (self.max_bytes and size > self.max_bytes):
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            previous = self._entries.get(key)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self._entries.move_to_end(key)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self.bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Current size and counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,101 @@
+"""
+Kernel kalkulasi batch untuk tool 'calculate_batch'
+Operand diubah menjadi array NumPy float64 dan setiap jenis operasi dihitung untuk
+semua elemennya sekaligus (satu ufunc per operasi), bukan satu lambda per pasangan.
+Pembagian dengan nol dan hasil yang tidak berhingga dilaporkan per elemen tanpa
+menggagalkan seluruh batch.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy hanya wajib untuk calculate_batch
+    np = None
+
+# Operasi yang didukung; posisi di tuple = kode operasi di array
+OPERATIONS = ("add", "subtract", "multiply", "divide")
+_OPERATION_CODES = {name: code for code, name in enumerate(OPERATIONS)}
+_DIVIDE = _OPERATION_CODES["divide"]
+
+
+def _kernel(code: int):
+    return (np.add, np.subtract, np.multiply, np.divide)[code]
+
+
+def _unknown_operation(operation: Any, index: Optional[int] = None) -> ValueError:
+    where = f" at index {index}" if index is not None else ""
+    return ValueError(f"Unknown operation '{operation}'{where}. Use: {', '.join(OPERATIONS)}")
+
+
+def evaluate_batch(
+    a: Sequence[float],
+    b: Sequence[float],
+    operation: Optional[str] = None,
+    operations: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate many arithmetic operations in one vectorized pass.
+
+    Either one ``operation`` is applied to every pair ``(a[i], b[i])``, or
+    ``operations`` gives the operation of each pair. An operand list with a
+    single value is broadcast to the length of the other.
+
+    Args:
+        a: First operands
+        b: Second operands
+        operation: Operation for all pairs (one of ``OPERATIONS``)
+        operations: Operation per pair, instead of ``operation``
+
+    Returns:
+        {"count": n, "results": [float or None, ...], "errors": [{"index": i,
+        "error": message}, ...]}; a result is None exactly when its pair is
+        listed in "errors" (division by zero or a non-finite result)
+
+    Raises:
+        ValueError: If the operations or operand lengths are invalid
+        RuntimeError: If NumPy is not installed
+    """
+    if np is None:
+        raise RuntimeError("calculate_batch requires numpy (pip install numpy)")
+    if (operation is None) == (operations is None):
+        raise ValueError("Pass either 'operation' or 'operations'")
+
+    x = np.asarray(a, dtype=np.float64)
+    y = np.asarray(b, dtype=np.float64)
+    if len(x) != len(y) and min(len(x), len(y)) != 1:
+        raise ValueError("'a' and 'b' must have the same length, or one of them a single value")
+    n = max(len(x), len(y))
+    x, y = np.broadcast_to(x, n), np.broadcast_to(y, n)
+
+    if operation is not None:
+        code = _OPERATION_CODES.get(operation)
+        if code is None:
+            raise _unknown_operation(operation)
+        with np.errstate(all="ignore"):
+            result = _kernel(code)(x, y)
+        zero_division = (y == 0) if code == _DIVIDE else None
+    else:
+        if len(operations) != n:
+            raise ValueError("'operations' must have one entry per pair of operands")
+        codes = np.array([_OPERATION_CODES.get(op, -1) for op in operations], dtype=np.int8)
+        if n and codes.min() < 0:
+            index = int(np.argmin(codes))
+            raise _unknown_operation(operations[index], index)
+        result = np.empty(n, dtype=np.float64)
+        # Paling banyak satu ufunc per jenis operasi, masing-masing atas semua elemennya
+        with np.errstate(all="ignore"):
+            for code in np.unique(codes).tolist():
+                mask = codes == code
+                result[mask] = _kernel(code)(x[mask], y[mask])
+        zero_division = (codes == _DIVIDE) & (y == 0)
+
+    values: List[Optional[float]] = result.tolist()
+    errors = []
+    for index in np.flatnonzero(~np.isfinite(result)).tolist():
+        values[index] = None
+        if zero_division is not None and zero_division[index]:
+            errors.append({"index": index, "error": "Division by zero"})
+        else:
+            errors.append({"index": index, "error": "Result is not a finite number"})
+    return {"count": n, "results": values, "errors": errors}
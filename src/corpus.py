@@ -0,0 +1,203 @@
+"""
+Corpus snapshot dan hot reload
+Menggabungkan document store + search index menjadi satu snapshot immutable,
+lalu memantau direktori corpus dan menerapkan perubahan secara incremental.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from document_store import DocumentStore, OverlayDocumentStore, normalize_document
+from search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Ekstensi file yang dibaca dari direktori corpus
+CORPUS_FILE_EXTENSIONS = (".json", ".jsonl")
+
+
+class Corpus:
+    """
+    Consistent, immutable snapshot of the document store and its search index.
+
+    Tools read ``LiveCorpus.snapshot`` once per call and use only that object,
+    so a concurrent reload can never mix documents from one version with index
+    entries from another.
+    """
+
+    def __init__(self, store: DocumentStore, index: SearchIndex) -> None:
+        self.store = store
+        self.index = index
+
+    @property
+    def version(self) -> int:
+        """Version of the underlying document store."""
+        return self.store.version
+
+    def apply(self, upserts: List[Dict[str, Any]], deletes: List[str]) -> "Corpus":
+        """
+        Return a new snapshot with documents added, replaced or removed.
+
+        Args:
+            upserts: New or changed documents
+            deletes: IDs of removed documents (ignored for IDs also upserted)
+
+        Returns:
+            New ``Corpus``; this one is left untouched
+        """
+        upserted = {doc["id"] for doc in upserts}
+        deletes = [doc_id for doc_id in deletes if doc_id not in upserted]
+        store = self.store
+        if not isinstance(store, OverlayDocumentStore):
+            store = OverlayDocumentStore(store, version=store.version)
+        return Corpus(store.apply(upserts, deletes), self.index.apply(upserts, deletes))
+
+
+class LiveCorpus:
+    """
+    Holder for the current ``Corpus`` snapshot.
+
+    Readers just read ``snapshot`` (a single attribute load, atomic under the
+    GIL) and never take a lock. Writers are serialized by a lock, build the next
+    snapshot off to the side and publish it with one assignment.
+    """
+
+    def __init__(self, snapshot: Corpus) -> None:
+        self.snapshot = snapshot
+        self._write_lock = threading.Lock()
+
+    def apply(self, upserts: List[Dict[str, Any]], deletes: List[str]) -> Corpus:
+        """
+        Apply changes and publish the resulting snapshot.
+
+        Args:
+            upserts: New or changed documents
+            deletes: IDs of removed documents
+
+        Returns:
+            The newly published snapshot
+        """
+        with self._write_lock:
+            if upserts or deletes:
+                self.snapshot = self.snapshot.apply(upserts, deletes)
+            return self.snapshot
+
+
+def read_corpus_file(path: str) -> List[Dict[str, Any]]:
+    """
+    Read documents from a corpus file.
+
+    ``.jsonl`` files hold one document per line. ``.json`` files hold either
+    one document object or a list of them.
+
+    Args:
+        path: Path to a .json or .jsonl file
+
+    Returns:
+        Normalized documents
+
+    Raises:
+        ValueError: If the file is not valid JSON or a document is malformed
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            raw = data if isinstance(data, list) else [data]
+    return [normalize_document(doc) for doc in raw]
+
+
+class CorpusWatcher:
+    """
+    Poll a corpus directory and apply changed files to a ``LiveCorpus``.
+
+    Every poll compares the (mtime, size) of each .json/.jsonl file with the
+    previous poll. Only changed files are re-read, and only documents whose
+    content actually differs are re-indexed. Documents of deleted files are
+    removed. Document IDs are expected to be unique across files.
+    """
+
+    def __init__(self, live: LiveCorpus, directory: str, interval: float = 2.0) -> None:
+        self.live = live
+        self.directory = directory
+        self.interval = interval
+        self._file_stats: Dict[str, Tuple[int, int]] = {}
+        self._file_docs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan_files(self) -> Dict[str, Tuple[int, int]]:
+        stats = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return stats
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(CORPUS_FILE_EXTENSIONS):
+                st = entry.stat()
+                stats[entry.path] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def poll(self) -> Tuple[int, int]:
+        """
+        Check the directory once and apply any changes.
+
+        Returns:
+            (number of upserted documents, number of deleted documents)
+        """
+        stats = self._scan_files()
+        upserts: List[Dict[str, Any]] = []
+        deletes: List[str] = []
+
+        for path in set(self._file_stats) - set(stats):
+            deletes.extend(self._file_docs.pop(path, {}))
+            logger.info("Corpus file removed: %s", path)
+
+        for path, stat in stats.items():
+            if self._file_stats.get(path) == stat:
+                continue
+            try:
+                docs = {doc["id"]: doc for doc in read_corpus_file(path)}
+            except (OSError, ValueError) as e:
+                # File mungkin sedang ditulis; coba lagi saat mtime berubah
+                logger.warning("Skipping corpus file %s: %s", path, e)
+                continue
+
+            previous = self._file_docs.get(path, {})
+            upserts.extend(doc for doc_id, doc in docs.items() if previous.get(doc_id) != doc)
+            deletes.extend(doc_id for doc_id in previous if doc_id not in docs)
+            self._file_docs[path] = docs
+            logger.info("Corpus file loaded: %s (%d documents)", path, len(docs))
+
+        self._file_stats = stats
+        if upserts or deletes:
+            snapshot = self.live.apply(upserts, deletes)
+            logger.info(
+                "Corpus reloaded: %d upserted, %d deleted (version %d)",
+                len(upserts), len(deletes), snapshot.version
+            )
+        return len(upserts), len(deletes)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Corpus reload failed")
+
+    def start(self) -> None:
+        """Start polling in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,761 @@
+"""
+Document store untuk tools 'search' dan 'fetch'
+Menyediakan abstraksi DocumentStore dengan dua implementasi:
+- InMemoryDocumentStore: membungkus dict dokumen (sample data)
+- SegmentDocumentStore: file segment di disk yang dibaca lewat mmap
+- OverlayDocumentStore: perubahan (add/update/delete) di atas store lain
+
+Build segment dari JSONL (teks dikompres per blok, default zlib):
+    python src/document_store.py import corpus.jsonl corpus.seg [--codec lzma]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import lzma
+import mmap
+import os
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from cache import LRUCache
+
+try:
+    import zstandard
+except ImportError:  # codec zstd opsional, zlib/lzma selalu tersedia
+    zstandard = None
+
+# Format segment:
+#   header  : magic, format version, jumlah dokumen, offset tabel
+#   text    : (v2) codec, ukuran blok, jumlah blok, offset tabel blok
+#   records : per dokumen -> id (UTF-8), meta JSON (UTF-8), text (UTF-8, hanya v1)
+#   blocks  : (v2) teks semua dokumen disambung, dipotong per TEXT_BLOCK_SIZE byte,
+#             lalu tiap blok dikompres sendiri; diselipkan di antara records
+#   table   : per dokumen -> offset record, panjang id, panjang meta, panjang text
+#             (v2: + offset text di aliran teks yang disambung)
+#   id_sort : ordinal dokumen diurutkan berdasarkan id (untuk binary search)
+#   bl_tab  : (v2) per blok -> offset file, panjang terkompres
+#   digest  : magic + SHA-256 semua byte setelah header (records sampai tabel
+#             terakhir); opsional, segment lama tidak punya
+SEGMENT_MAGIC = b"MCPSEG01"
+SEGMENT_VERSION = 2
+DIGEST_MAGIC = b"MCPSUM01"
+_HEADER = struct.Struct("<8sIIQ")
+_TEXT_HEADER = struct.Struct("<IIQQ")
+_ENTRY_V1 = struct.Struct("<QIII")
+_ENTRY = struct.Struct("<QIIIQ")
+_ORD = struct.Struct("<I")
+_BLOCK = struct.Struct("<QI")
+_DIGEST = struct.Struct("<8s32s")
+
+# Ukuran blok teks sebelum kompresi. Lebih besar = rasio lebih baik, tetapi
+# snippet/fetch kecil harus mendekompres lebih banyak byte
+TEXT_BLOCK_SIZE = 16 * 1024
+
+# Codec blok teks. "none" menulis format v1 (teks tidak dikompres)
+TEXT_CODECS = ("none", "zlib", "lzma", "zstd")
+
+# Bacaan yang melewati lebih dari sekian blok (teks dokumen besar utuh) tidak
+# dimasukkan ke cache, supaya satu fetch besar tidak mengusir blok yang sering dipakai
+_CACHE_MAX_SPAN = 2
+
+# Satu karakter UTF-8 paling banyak 4 byte
+_MAX_UTF8_BYTES = 4
+
+# Potongan file yang di-hash sekaligus saat segment tidak punya digest
+_HASH_CHUNK = 16 * 1024 * 1024
+
+
+def _codec(name: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """
+    Compress and decompress functions of a text block codec.
+
+    Raises:
+        ValueError: If the codec is unknown
+        RuntimeError: If the codec needs a package that is not installed
+    """
+    if name == "zlib":
+        return (lambda data: zlib.compress(data, 6)), zlib.decompress
+    if name == "lzma":
+        return lzma.compress, lzma.decompress
+    if name == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Codec 'zstd' requires the zstandard package (pip install zstandard)")
+        # Objek (de)compressor zstd tidak thread-safe: buat per blok
+        return (lambda data: zstandard.ZstdCompressor(level=3).compress(data)), (lambda data: zstandard.ZstdDecompressor().decompress(data))
+    raise ValueError(f"Unknown text codec '{name}'. Use: {', '.join(TEXT_CODECS)}")
+
+
+def normalize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a raw document and fill in optional fields.
+
+    Args:
+        doc: Raw document with 'id', 'title' and 'text' ('url' and 'metadata'
+            are optional)
+
+    Returns:
+        Document dict with id, title, text, url and metadata
+
+    Raises:
+        ValueError: If a required field is missing
+    """
+    for field in ("id", "title", "text"):
+        if field not in doc:
+            raise ValueError(f"Document is missing required field '{field}'")
+    return {
+        "id": str(doc["id"]),
+        "title": doc["title"],
+        "text": doc["text"],
+        "url": doc.get("url", ""),
+        "metadata": doc.get("metadata")
+    }
+
+
+class DocumentStore(ABC):
+    """
+    Read interface used by the 'search' and 'fetch' tools.
+
+    Documents are dicts with 'id', 'title', 'text', 'url' and 'metadata'.
+    Iteration order is the store order, which the search index uses for
+    document ordinals. ``version`` changes whenever the content changes.
+    """
+
+    version = 0
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of documents in the store."""
+
+    @abstractmethod
+    def __contains__(self, doc_id: object) -> bool:
+        """Whether a document with this ID exists."""
+
+    @abstractmethod
+    def ids(self) -> Iterator[str]:
+        """Iterate over document IDs in store order."""
+
+    @abstractmethod
+    def get_meta(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a document without its text.
+
+        Args:
+            doc_id: Document ID
+
+        Returns:
+            Dict with id, title, url and metadata, or None if not found
+        """
+
+    @abstractmethod
+    def get_text(self, doc_id: str, max_chars: Optional[int] = None) -> Optional[str]:
+        """
+        Get the text of a document, optionally only its first characters.
+
+        Args:
+            doc_id: Document ID
+            max_chars: Return at most this many characters (default: full text)
+
+        Returns:
+            Document text, or None if not found
+        """
+
+    @abstractmethod
+    def get_text_bytes(self, doc_id: str, start: int, end: int) -> Optional[bytes]:
+        """
+        Get part of a document's UTF-8 encoded text.
+
+        Args:
+            doc_id: Document ID
+            start: Start byte offset
+            end: End byte offset (exclusive, clamped to the text size)
+
+        Returns:
+            Raw bytes (may cut through a multi-byte character), or None if
+            not found
+        """
+
+    @abstractmethod
+    def text_size(self, doc_id: str) -> Optional[int]:
+        """
+        Size of a document's UTF-8 encoded text in bytes.
+
+        Args:
+            doc_id: Document ID
+
+        Returns:
+            Byte size, or None if not found
+        """
+
+    def get_text_slice(self, doc_id: str, start: int, end: int) -> Optional[str]:
+        """
+        Get part of a document's text by UTF-8 byte offsets.
+
+        Used for snippets, whose passage boundaries the search index stores as
+        byte offsets, so a segment store can slice its mapping directly.
+
+        Args:
+            doc_id: Document ID
+            start: Start byte offset in the UTF-8 encoded text
+            end: End byte offset (exclusive)
+
+        Returns:
+            Decoded text slice, or None if not found
+        """
+        data = self.get_text_bytes(doc_id, start, end)
+        return None if data is None else data.decode("utf-8", errors="ignore")
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a complete document.
+
+        Args:
+            doc_id: Document ID
+
+        Returns:
+            Document dict including text, or None if not found
+        """
+        doc = self.get_meta(doc_id)
+        if doc is None:
+            return None
+        doc["text"] = self.get_text(doc_id)
+        return doc
+
+    def iter_documents(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over complete documents in store order."""
+        for doc_id in self.ids():
+            yield self.get(doc_id)
+
+    def fingerprint(self) -> bytes:
+        """
+        SHA-256 identifying the store's documents and their order.
+
+        Used to tell whether an index snapshot was built from this store. The
+        default hashes every document; stores backed by a file override it
+        with something cheaper.
+        """
+        digest = hashlib.sha256()
+        for doc in self.iter_documents():
+            digest.update(json.dumps(doc, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            digest.update(b"\n")
+        return digest.digest()
+
+
+class InMemoryDocumentStore(DocumentStore):
+    """
+    Document store backed by a dict of document dicts keyed by ID.
+
+    Texts are also kept UTF-8 encoded so byte-offset slices are O(slice).
+    """
+
+    def __init__(self, documents: Dict[str, Dict[str, Any]]) -> None:
+        self._documents = documents
+        self._texts = {doc_id: doc["text"].encode("utf-8") for doc_id, doc in documents.items()}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._documents
+
+    def ids(self) -> Iterator[str]:
+        return iter(self._documents)
+
+    def get_meta(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._documents.get(doc_id)
+        if doc is None:
+            return None
+        return {
+            "id": doc["id"],
+            "title": doc["title"],
+            "url": doc["url"],
+            "metadata": doc.get("metadata")
+        }
+
+    def get_text(self, doc_id: str, max_chars: Optional[int] = None) -> Optional[str]:
+        doc = self._documents.get(doc_id)
+        if doc is None:
+            return None
+        return doc["text"] if max_chars is None else doc["text"][:max_chars]
+
+    def get_text_bytes(self, doc_id: str, start: int, end: int) -> Optional[bytes]:
+        text = self._texts.get(doc_id)
+        return None if text is None else text[start:end]
+
+    def text_size(self, doc_id: str) -> Optional[int]:
+        text = self._texts.get(doc_id)
+        return None if text is None else len(text)
+
+
+class OverlayDocumentStore(DocumentStore):
+    """
+    Immutable view of a base store with changed documents layered on top.
+
+    ``apply`` never mutates the overlay; it returns a new one with a higher
+    ``version``. Only the overlay dict is copied, so the cost of an update
+    depends on the number of changed documents, not on the size of the base.
+    """
+
+    def __init__(
+        self,
+        base: DocumentStore,
+        upserts: Optional[Dict[str, Dict[str, Any]]] = None,
+        hidden: FrozenSet[str] = frozenset(),
+        version: int = 0,
+        texts: Optional[Dict[str, bytes]] = None
+    ) -> None:
+        self.base = base
+        self.version = version
+        self._upserts = upserts if upserts is not None else {}
+        self._texts = texts if texts is not None else {}
+        # ID di base yang sudah dihapus atau diganti oleh overlay
+        self._hidden = hidden
+
+    def apply(self, upserts: List[Dict[str, Any]], deletes: Iterable[str]) -> "OverlayDocumentStore":
+        """
+        Return a new overlay with documents added, replaced or removed.
+
+        Args:
+            upserts: New or changed documents
+            deletes: IDs of removed documents
+
+        Returns:
+            New ``OverlayDocumentStore``; this one is left untouched
+        """
+        overlay = dict(self._upserts)
+        texts = dict(self._texts)
+        hidden = set(self._hidden)
+        for doc in upserts:
+            overlay[doc["id"]] = doc
+            texts[doc["id"]] = doc["text"].encode("utf-8")
+            if doc["id"] in self.base:
+                hidden.add(doc["id"])
+        for doc_id in deletes:
+            overlay.pop(doc_id, None)
+            texts.pop(doc_id, None)
+            if doc_id in self.base:
+                hidden.add(doc_id)
+        return OverlayDocumentStore(self.base, overlay, frozenset(hidden), self.version + 1, texts)
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self._hidden) + len(self._upserts)
+
+    def __contains__(self, doc_id: object) -> bool:
+        if doc_id in self._upserts:
+            return True
+        return doc_id not in self._hidden and doc_id in self.base
+
+    def ids(self) -> Iterator[str]:
+        for doc_id in self.base.ids():
+            if doc_id not in self._hidden:
+                yield doc_id
+        yield from self._upserts
+
+    def get_meta(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._upserts.get(doc_id)
+        if doc is not None:
+            return {
+                "id": doc["id"],
+                "title": doc["title"],
+                "url": doc["url"],
+                "metadata": doc.get("metadata")
+            }
+        if doc_id in self._hidden:
+            return None
+        return self.base.get_meta(doc_id)
+
+    def get_text(self, doc_id: str, max_chars: Optional[int] = None) -> Optional[str]:
+        doc = self._upserts.get(doc_id)
+        if doc is not None:
+            return doc["text"] if max_chars is None else doc["text"][:max_chars]
+        if doc_id in self._hidden:
+            return None
+        return self.base.get_text(doc_id, max_chars)
+
+    def get_text_bytes(self, doc_id: str, start: int, end: int) -> Optional[bytes]:
+        text = self._texts.get(doc_id)
+        if text is not None:
+            return text[start:end]
+        if doc_id in self._hidden:
+            return None
+        return self.base.get_text_bytes(doc_id, start, end)
+
+    def text_size(self, doc_id: str) -> Optional[int]:
+        text = self._texts.get(doc_id)
+        if text is not None:
+            return len(text)
+        if doc_id in self._hidden:
+            return None
+        return self.base.text_size(doc_id)
+
+
+class SegmentDocumentStore(DocumentStore):
+    """
+    Read-only document store backed by a memory-mapped segment file.
+
+    Only the mapping is kept open; nothing is loaded up front. A lookup binary
+    searches the sorted ID table and slices the record straight out of the
+    mapping, so resident memory does not grow with corpus size and several
+    worker processes share the same page cache.
+
+    In a compressed (v2) segment, text is read by decompressing only the
+    blocks that overlap the requested bytes. Recently decompressed blocks are
+    kept in a small LRU (``block_cache_size`` blocks), so snippets of hot
+    documents cost a dict lookup instead of a decompression.
+    """
+
+    def __init__(self, path: str, block_cache_size: int = 64) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, table_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"'{path}' is not a document segment file")
+        if version not in (1, SEGMENT_VERSION):
+            raise ValueError(f"Unsupported segment version {version} in '{path}'")
+
+        self._count = count
+        self._table_offset = table_offset
+        self.codec = "none"
+        self._decompress: Optional[Callable[[bytes], bytes]] = None
+        self._block_size = 0
+        self._n_blocks = 0
+        self._block_table_offset = 0
+        self._header_size = _HEADER.size
+        self._entry_struct = _ENTRY_V1
+        if version >= 2:
+            codec_no, self._block_size, self._n_blocks, self._block_table_offset = _TEXT_HEADER.unpack_from(self._mm, _HEADER.size)
+            self.codec = TEXT_CODECS[codec_no]
+            self._decompress = _codec(self.codec)[1]
+            self._header_size += _TEXT_HEADER.size
+            self._entry_struct = _ENTRY
+        self._id_sort_offset = table_offset + count * self._entry_struct.size
+        self._tables_end = self._id_sort_offset + count * _ORD.size
+        if self._decompress is not None:
+            self._tables_end = self._block_table_offset + self._n_blocks * _BLOCK.size
+        self._blocks = LRUCache(block_cache_size)
+
+    def close(self) -> None:
+        """Release the memory mapping."""
+        self._mm.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, doc_id: object) -> bool:
+        return isinstance(doc_id, str) and self._find(doc_id) is not None
+
+    def _entry(self, ordinal: int) -> Tuple[int, int, int, int, int]:
+        """(record offset, id length, meta length, text length, text offset) of a document."""
+        entry = self._entry_struct.unpack_from(self._mm, self._table_offset + ordinal * self._entry_struct.size)
+        if self._decompress is None:
+            # v1: teks langsung setelah meta di dalam record
+            offset, id_len, meta_len, text_len = entry
+            return offset, id_len, meta_len, text_len, offset + id_len + meta_len
+        return entry
+
+    def _id_bytes(self, ordinal: int) -> bytes:
+        offset, id_len, _, _, _ = self._entry(ordinal)
+        return self._mm[offset:offset + id_len]
+
+    def _find(self, doc_id: str) -> Optional[int]:
+        """Binary search the sorted ID table, returning the document ordinal."""
+        key = doc_id.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            ordinal = _ORD.unpack_from(self._mm, self._id_sort_offset + mid * _ORD.size)[0]
+            probe = self._id_bytes(ordinal)
+            if probe == key:
+                return ordinal
+            if probe < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _block(self, block_no: int, cache: bool = True) -> bytes:
+        """Decompressed text block, from the LRU when possible."""
+        data = self._blocks.get(block_no) if cache else None
+        if data is None:
+            start, length = _BLOCK.unpack_from(self._mm, self._block_table_offset + block_no * _BLOCK.size)
+            data = self._decompress(self._mm[start:start + length])
+            if cache:
+                self._blocks.put(block_no, data)
+        return data
+
+    def _read_text(self, text_offset: int, start: int, end: int) -> bytes:
+        """Bytes [start, end) of the text at ``text_offset`` (end already clamped)."""
+        if start >= end:
+            return b""
+        if self._decompress is None:
+            return self._mm[text_offset + start:text_offset + end]
+        size = self._block_size
+        first, last = (text_offset + start) // size, (text_offset + end - 1) // size
+        cache = last - first < _CACHE_MAX_SPAN
+        parts = []
+        for block_no in range(first, last + 1):
+            base = block_no * size
+            parts.append(self._block(block_no, cache)[max(0, text_offset + start - base):text_offset + end - base])
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def ids(self) -> Iterator[str]:
+        for ordinal in range(self._count):
+            yield self._id_bytes(ordinal).decode("utf-8")
+
+    def _meta(self, doc_id: str, offset: int, id_len: int, meta_len: int) -> Dict[str, Any]:
+        start = offset + id_len
+        meta = json.loads(self._mm[start:start + meta_len])
+        return {
+            "id": doc_id,
+            "title": meta["title"],
+            "url": meta["url"],
+            "metadata": meta.get("metadata")
+        }
+
+    def get_meta(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        ordinal = self._find(doc_id)
+        if ordinal is None:
+            return None
+        offset, id_len, meta_len, _, _ = self._entry(ordinal)
+        return self._meta(doc_id, offset, id_len, meta_len)
+
+    def get_text(self, doc_id: str, max_chars: Optional[int] = None) -> Optional[str]:
+        ordinal = self._find(doc_id)
+        if ordinal is None:
+            return None
+        _, _, _, text_len, text_offset = self._entry(ordinal)
+        if max_chars is None:
+            return self._read_text(text_offset, 0, text_len).decode("utf-8")
+
+        # Cukup baca byte sebanyak max_chars karakter terpanjang; karakter terakhir
+        # yang terpotong dibuang oleh errors="ignore"
+        size = min(text_len, max_chars * _MAX_UTF8_BYTES)
+        return self._read_text(text_offset, 0, size).decode("utf-8", errors="ignore")[:max_chars]
+
+    def get_text_bytes(self, doc_id: str, start: int, end: int) -> Optional[bytes]:
+        ordinal = self._find(doc_id)
+        if ordinal is None:
+            return None
+        _, _, _, text_len, text_offset = self._entry(ordinal)
+        return self._read_text(text_offset, start, min(end, text_len))
+
+    def text_size(self, doc_id: str) -> Optional[int]:
+        ordinal = self._find(doc_id)
+        return None if ordinal is None else self._entry(ordinal)[3]
+
+    def iter_documents(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over complete documents in store order.
+
+        Reads the file front to back: each block is decompressed once and
+        bypasses the LRU, so building an index does not flush hot blocks.
+        """
+        current_no, current = -1, b""
+        for ordinal in range(self._count):
+            offset, id_len, meta_len, text_len, text_offset = self._entry(ordinal)
+            doc = self._meta(self._mm[offset:offset + id_len].decode("utf-8"), offset, id_len, meta_len)
+            if self._decompress is None:
+                text = self._mm[text_offset:text_offset + text_len]
+            else:
+                parts = []
+                position, end = text_offset, text_offset + text_len
+                while position < end:
+                    block_no = position // self._block_size
+                    if block_no != current_no:
+                        current_no, current = block_no, self._block(block_no, cache=False)
+                    base = block_no * self._block_size
+                    parts.append(current[position - base:end - base])
+                    position = base + self._block_size
+                text = b"".join(parts)
+            doc["text"] = text.decode("utf-8")
+            yield doc
+
+    def block_stats(self) -> Dict[str, Any]:
+        """Codec, block layout and decompressed-block cache counters."""
+        return dict(
+            self._blocks.stats(),
+            codec=self.codec,
+            block_size=self._block_size,
+            blocks=self._n_blocks,
+            file_bytes=len(self._mm)
+        )
+
+    def content_digest(self) -> bytes:
+        """
+        SHA-256 of every byte after the headers: records, text blocks and tables.
+
+        Read from the digest trailer that ``write_segment`` appends; segments
+        written before the trailer existed are hashed in full instead.
+        """
+        trailer = self._mm[self._tables_end:self._tables_end + _DIGEST.size]
+        if len(trailer) == _DIGEST.size:
+            magic, digest = _DIGEST.unpack(trailer)
+            if magic == DIGEST_MAGIC:
+                return digest
+        digest = hashlib.sha256()
+        for start in range(self._header_size, self._tables_end, _HASH_CHUNK):
+            digest.update(self._mm[start:min(start + _HASH_CHUNK, self._tables_end)])
+        return digest.digest()
+
+    def fingerprint(self) -> bytes:
+        """
+        Hash of the file size, headers and content digest.
+
+        The content digest covers every record (ID, meta and text) and text
+        block, so any edit changes the fingerprint, including one that keeps
+        every length the same. With the digest trailer this takes
+        microseconds; older segments are read once in full.
+        """
+        digest = hashlib.sha256()
+        digest.update(str(len(self._mm)).encode("ascii"))
+        digest.update(self._mm[:self._header_size])
+        digest.update(self.content_digest())
+        return digest.digest()
+
+
+def write_segment(
+    documents: Iterable[Dict[str, Any]],
+    path: str,
+    codec: str = "zlib",
+    block_size: int = TEXT_BLOCK_SIZE
+) -> int:
+    """
+    Write documents to a segment file.
+
+    The file is written next to ``path`` and renamed into place, so readers
+    never see a half-written segment. A SHA-256 of the content is appended
+    as a trailer (see ``SegmentDocumentStore.content_digest``). With a codec, document text is
+    concatenated and compressed in independent blocks of ``block_size``
+    bytes (format v2); ``codec="none"`` writes uncompressed text (format v1).
+
+    Args:
+        documents: Documents with 'id', 'title' and 'text' ('url' and
+            'metadata' are optional)
+        path: Destination segment path
+        codec: "zlib" (default), "lzma", "zstd" (needs zstandard) or "none"
+        block_size: Uncompressed bytes per text block
+
+    Returns:
+        Number of documents written
+
+    Raises:
+        ValueError: If a document is missing a required field, an ID repeats,
+            or the codec is unknown
+    """
+    compressed = codec != "none"
+    compress = _codec(codec)[0] if compressed else None
+    header_size = _HEADER.size + (_TEXT_HEADER.size if compressed else 0)
+    tmp_path = f"{path}.tmp"
+    entries = bytearray()
+    block_offsets = bytearray()
+    id_keys = []
+    seen = set()
+    content = hashlib.sha256()
+
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * header_size)
+            offset = header_size
+
+            def write(data: bytes) -> None:
+                content.update(data)
+                f.write(data)
+
+            # Teks yang belum cukup untuk satu blok penuh, dan offset-nya di aliran teks
+            pending = bytearray()
+            text_offset = 0
+
+            def flush_block(data: bytes) -> None:
+                nonlocal offset
+                block = compress(bytes(data))
+                block_offsets.extend(_BLOCK.pack(offset, len(block)))
+                write(block)
+                offset += len(block)
+
+            for doc in documents:
+                doc = normalize_document(doc)
+                doc_id = doc["id"]
+                if doc_id in seen:
+                    raise ValueError(f"Duplicate document ID '{doc_id}'")
+                seen.add(doc_id)
+
+                id_bytes = doc_id.encode("utf-8")
+                meta_bytes = json.dumps({
+                    "title": doc["title"],
+                    "url": doc["url"],
+                    "metadata": doc["metadata"]
+                }, ensure_ascii=False).encode("utf-8")
+                text_bytes = doc["text"].encode("utf-8")
+
+                write(id_bytes)
+                write(meta_bytes)
+                if compressed:
+                    entries += _ENTRY.pack(offset, len(id_bytes), len(meta_bytes), len(text_bytes), text_offset)
+                    offset += len(id_bytes) + len(meta_bytes)
+                    text_offset += len(text_bytes)
+                    pending += text_bytes
+                    while len(pending) >= block_size:
+                        flush_block(pending[:block_size])
+                        del pending[:block_size]
+                else:
+                    write(text_bytes)
+                    entries += _ENTRY_V1.pack(offset, len(id_bytes), len(meta_bytes), len(text_bytes))
+                    offset += len(id_bytes) + len(meta_bytes) + len(text_bytes)
+                id_keys.append(id_bytes)
+
+            if compressed and pending:
+                flush_block(pending)
+            n_blocks = len(block_offsets) // _BLOCK.size
+
+            table_offset = offset
+            write(entries)
+            write(b"".join(_ORD.pack(ordinal) for ordinal in sorted(range(len(id_keys)), key=id_keys.__getitem__)))
+            block_table_offset = table_offset + len(entries) + len(id_keys) * _ORD.size
+            if compressed:
+                write(block_offsets)
+            f.write(_DIGEST.pack(DIGEST_MAGIC, content.digest()))
+
+            f.seek(0)
+            f.write(_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION if compressed else 1, len(id_keys), table_offset))
+            if compressed:
+                f.write(_TEXT_HEADER.pack(TEXT_CODECS.index(codec), block_size, n_blocks, block_table_offset))
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, path)
+    return len(id_keys)
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream documents from a JSONL file, skipping blank lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Document store tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="Build a segment file from JSONL")
+    import_cmd.add_argument("source", help="JSONL file, one document per line")
+    import_cmd.add_argument("segment", help="Output segment path")
+    import_cmd.add_argument("--codec", choices=TEXT_CODECS, default="zlib", help="Text block compression")
+    import_cmd.add_argument("--block-size", type=int, default=TEXT_BLOCK_SIZE, help="Uncompressed bytes per text block")
+
+    args = parser.parse_args()
+    if args.command == "import":
+        count = write_segment(read_jsonl(args.source), args.segment, args.codec, args.block_size)
+        print(f"✅ Wrote {count} documents to {args.segment} ({os.path.getsize(args.segment) / 1e6:.1f} MB, codec {args.codec})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,700 @@
+"""
+Snapshot index untuk cold start cepat
+Index hasil build (posting list, statistik term, panjang dokumen, offset passage,
+dan vector) disimpan dalam satu file biner berversi dengan checksum per bagian.
+Saat startup file dibuka lewat mmap dan dipakai langsung: posting list baru dibaca
+saat sebuah term di-query, jadi tidak ada parsing atau alokasi sebesar corpus.
+
+Build snapshot dari segment:
+    python src/index_snapshot.py build corpus.seg corpus.idx [--vector-dim 256]
+    python src/index_snapshot.py info corpus.idx
+"""
+
+import argparse
+import contextlib
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, chain
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from document_store import DocumentStore, SegmentDocumentStore
+from metadata_index import _BITMAP_DENSITY, _SCALARS, MetadataIndex
+from offload import check_cancelled
+from search_index import _TERM_RE, BM25_B, BM25_K1, SNIPPET_CHARS, InvertedIndex, SearchIndex
+from term_dictionary import TermDictionary
+from vector_index import HashingEmbedder, VectorIndex, np
+
+logger = logging.getLogger(__name__)
+
+# Format snapshot:
+#   header   : magic, versi, jumlah dokumen/term, total panjang dokumen, dimensi
+#              vector, hash sumber (document store) dan hash parameter index
+#   sections : tabel (offset, panjang, crc32) untuk setiap bagian di SECTIONS
+#   data     : bagian-bagian, masing-masing rata 64 byte, berisi array little-endian
+SNAPSHOT_MAGIC = b"MCPIDX01"
+SNAPSHOT_VERSION = 4
+_HEADER = struct.Struct("<8sIIIQI32s32s")
+_SECTION = struct.Struct("<QQI")
+_ALIGN = 64
+
+SECTIONS = (
+    "doc_ids",           # ID dokumen (UTF-8) berurutan
+    "doc_id_offsets",    # Q[n + 1] offset byte ke doc_ids
+    "doc_id_sort",       # I[n] ordinal diurutkan berdasarkan ID (binary search)
+    "doc_lengths",       # I[n] jumlah token per dokumen
+    "passage_offsets",   # Q[n + 1] indeks elemen ke passages
+    "passages",          # I[...] triple (byte awal, byte akhir, posisi token pertama)
+    "vocab",             # term (UTF-8) terurut, dipisah "\n"
+    "vocab_starts",      # I[t + 1] offset byte setiap term di vocab (+ panjang vocab + 1)
+    "term_offsets",      # Q[t + 1] indeks posting pertama setiap term
+    "posting_docs",      # I[p] ordinal dokumen per posting, naik per term
+    "position_offsets",  # Q[p + 1] indeks elemen ke positions
+    "positions",         # I[...] posisi token
+    "vector_matrix",     # f32[n, dim]
+    "vector_ords",       # i64[n]
+    "vector_centroids",  # f32[c, dim] (IVF)
+    "vector_offsets",    # i64[c + 1] (IVF)
+    "metadata",          # MetadataIndex.to_bytes() (filter dan facet)
+    "grams",             # trigram TermDictionary (UTF-8) terurut, disambung
+    "gram_key_offsets",  # Q[g + 1] offset byte ke grams
+    "gram_offsets",      # Q[g + 1] indeks nomor term pertama setiap trigram
+    "gram_terms"         # I[...] nomor term per trigram, naik
+)
+
+
+def index_params(vector_dim: int) -> bytes:
+    """Hash of every setting that changes what the index contains."""
+    params = f"token={_TERM_RE.pattern};snippet={SNIPPET_CHARS};vector_dim={vector_dim}"
+    # Aturan index metadata: tipe nilai yang diindex dan kapan bitmap dipakai
+    params += f";metadata={','.join(t.__name__ for t in _SCALARS)}/{_BITMAP_DENSITY}"
+    return hashlib.sha256(params.encode("utf-8")).digest()
+
+
+def _require_little_endian() -> None:
+    # Array ditulis dan dibaca dalam urutan byte native
+    if sys.byteorder != "little":
+        raise ValueError("Index snapshots require a little-endian machine")
+
+
+# ============================================================================
+# Menulis snapshot
+# ============================================================================
+
+def _postings_of(segment: InvertedIndex, term: str) -> List[Tuple[int, Any]]:
+    return sorted(segment.postings[term].items())
+
+
+def write_snapshot(index: SearchIndex, path: str, source: bytes) -> int:
+    """
+    Write a freshly built index to a snapshot file.
+
+    The file is written next to ``path`` and renamed into place, so readers
+    never see a half-written snapshot.
+
+    Args:
+        index: Single-segment index without deletions (``SearchIndex.build``)
+        path: Destination snapshot path
+        source: Fingerprint of the document store the index was built from
+
+    Returns:
+        Size of the snapshot in bytes
+
+    Raises:
+        ValueError: If the index has more than one segment or deleted documents
+    """
+    if len(index.segments) != 1 or index.deleted[0]:
+        raise ValueError("Only a freshly built single-segment index can be snapshotted")
+    _require_little_endian()
+    segment = index.segments[0]
+    terms = segment._vocab_terms
+    vectors = segment.vectors
+    vector_dim = index.embedder.dim if index.embedder is not None and vectors is not None else 0
+
+    id_bytes = [doc_id.encode("utf-8") for doc_id in segment.doc_ids]
+    term_bytes = [term.encode("utf-8") for term in terms]
+    grams = sorted(segment._dictionary._grams.items())
+    gram_bytes = [gram.encode("utf-8") for gram, _ in grams]
+    empty = (b"",)
+
+    def position_counts() -> Iterator[int]:
+        for term in terms:
+            for _, positions in _postings_of(segment, term):
+                yield len(positions)
+
+    sections = {
+        "doc_ids": (b"".join(id_bytes),),
+        "doc_id_offsets": (array("Q", accumulate(chain((0,), map(len, id_bytes)))).tobytes(),),
+        "doc_id_sort": (array("I", sorted(range(len(id_bytes)), key=id_bytes.__getitem__)).tobytes(),),
+        "doc_lengths": (array("I", segment.doc_lengths).tobytes(),),
+        "passage_offsets": (array("Q", accumulate(chain((0,), map(len, segment.passages)))).tobytes(),),
+        "passages": (passages.tobytes() for passages in segment.passages),
+        "vocab": (b"\n".join(term_bytes),),
+        "vocab_starts": (array("I", accumulate(chain((0,), (len(term) + 1 for term in term_bytes)))).tobytes(),),
+        "term_offsets": (array("Q", accumulate(chain((0,), (len(segment.postings[t]) for t in terms)))).tobytes(),),
+        "posting_docs": (array("I", (doc_ord for doc_ord, _ in _postings_of(segment, t))).tobytes() for t in terms),
+        "position_offsets": (array("Q", accumulate(chain((0,), position_counts()))).tobytes(),),
+        "positions": (
+            array("I", chain.from_iterable(positions for _, positions in _postings_of(segment, t))).tobytes()
+            for t in terms
+        ),
+        "vector_matrix": (vectors.matrix.astype("<f4").tobytes(),) if vector_dim else empty,
+        "vector_ords": (vectors.ords.astype("<i8").tobytes(),) if vector_dim else empty,
+        "vector_centroids": (vectors.centroids.astype("<f4").tobytes(),) if vector_dim and vectors.centroids is not None else empty,
+        "vector_offsets": (vectors.offsets.astype("<i8").tobytes(),) if vector_dim and vectors.offsets is not None else empty,
+        "metadata": (segment.metadata.to_bytes(),),
+        "grams": (b"".join(gram_bytes),),
+        "gram_key_offsets": (array("Q", accumulate(chain((0,), map(len, gram_bytes)))).tobytes(),),
+        "gram_offsets": (array("Q", accumulate(chain((0,), (len(term_nos) for _, term_nos in grams)))).tobytes(),),
+        "gram_terms": (array("I", term_nos).tobytes() for _, term_nos in grams)
+    }
+
+    # Nama sementara per process: beberapa worker bisa menulis bersamaan
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    table = []
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * (_HEADER.size + len(SECTIONS) * _SECTION.size))
+            for name in SECTIONS:
+                f.write(b"\0" * (-f.tell() % _ALIGN))
+                offset = f.tell()
+                crc = 0
+                for chunk in sections[name]:
+                    f.write(chunk)
+                    crc = zlib.crc32(chunk, crc)
+                table.append(_SECTION.pack(offset, f.tell() - offset, crc))
+            size = f.tell()
+
+            f.seek(0)
+            f.write(_HEADER.pack(
+                SNAPSHOT_MAGIC,
+                SNAPSHOT_VERSION,
+                len(id_bytes),
+                len(terms),
+                segment.total_length,
+                vector_dim,
+                source,
+                index_params(vector_dim)
+            ))
+            f.write(b"".join(table))
+    except BaseException:
+        # open() mungkin gagal sebelum file dibuat: error aslinya yang dilaporkan
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, path)
+    return size
+
+
+# ============================================================================
+# Membaca snapshot (lazy, lewat mmap)
+# ============================================================================
+
+class _StringList:
+    """Read-only sequence of strings stored as one blob plus offsets."""
+
+    # Byte pemisah di akhir setiap string (lihat _TermList)
+    _END = 0
+
+    def __init__(self, blob: memoryview, offsets: memoryview) -> None:
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+    def raw(self, i: int) -> bytes:
+        return self._blob[self._offsets[i]:self._offsets[i + 1] - self._END].tobytes()
+
+    def find(self, key: bytes) -> int:
+        """Position of ``key`` in a list sorted by its UTF-8 bytes, or -1."""
+        blob, offsets, end = self._blob, self._offsets, self._END
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = blob[offsets[mid]:offsets[mid + 1] - end].tobytes()
+            if probe == key:
+                return mid
+            if probe < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return -1
+
+
+class _TermList(_StringList):
+    """
+    The sorted vocabulary: terms separated by "\n" in one blob.
+
+    ``starts`` holds one offset more than there are terms, as if the last
+    term were also followed by "\n".
+    """
+
+    _END = 1
+
+
+class _VocabBlob:
+    """
+    The vocabulary blob searched in place, in UTF-8 byte offsets.
+
+    Stands in for the decoded ``str`` blob of a built segment: ``find`` and
+    ``in`` search the mapping directly. A UTF-8 encoded fragment can only
+    match at character boundaries, so the result is the same.
+    """
+
+    def __init__(self, mm: mmap.mmap, offset: int, length: int) -> None:
+        self._mm = mm
+        self._offset = offset
+        self._end = offset + length
+
+    def find(self, fragment: str, start: int = 0) -> int:
+        pos = self._mm.find(fragment.encode("utf-8"), self._offset + start, self._end)
+        return pos if pos < 0 else pos - self._offset
+
+    def __contains__(self, fragment: str) -> bool:
+        return self.find(fragment) >= 0
+
+
+class _IdLookup:
+    """Document ID -> ordinal, by binary search over the sorted ID table."""
+
+    def __init__(self, ids: _StringList, order: memoryview) -> None:
+        self._ids = ids
+        self._order = order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return isinstance(doc_id, str) and self.get(doc_id) is not None
+
+    def get(self, doc_id: str, default: Optional[int] = None) -> Optional[int]:
+        key = doc_id.encode("utf-8")
+        lo, hi = 0, len(self._order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self._ids.raw(self._order[mid])
+            if probe == key:
+                return self._order[mid]
+            if probe < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return default
+
+
+class _GramTable:
+    """
+    Trigram -> term numbers of a stored ``TermDictionary``.
+
+    The trigrams are sorted, so a lookup is a binary search over the mapping
+    and returns a slice of it; nothing is rebuilt when the snapshot loads.
+    """
+
+    def __init__(self, grams: _StringList, offsets: memoryview, term_nos: memoryview) -> None:
+        self._grams = grams
+        self._offsets = offsets
+        self._term_nos = term_nos
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def get(self, gram: str, default: Any = None) -> Any:
+        i = self._grams.find(gram.encode("utf-8"))
+        return default if i < 0 else self._term_nos[self._offsets[i]:self._offsets[i + 1]]
+
+
+class _SliceList:
+    """Sequence of variable-length slices of one flat array (e.g. passages per document)."""
+
+    def __init__(self, values: memoryview, offsets: memoryview) -> None:
+        self._values = values
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> memoryview:
+        return self._values[self._offsets[i]:self._offsets[i + 1]]
+
+
+class _TermPostings(Mapping):
+    """
+    Postings of one term: document ordinal -> token positions.
+
+    Nothing is decoded up front: the length is known from the offsets, keys
+    are iterated straight from the mapping, and a single document is found by
+    binary search over its (ascending) ordinals.
+    """
+
+    __slots__ = ("_docs", "_offsets", "_positions")
+
+    def __init__(self, docs: memoryview, offsets: memoryview, positions: memoryview) -> None:
+        self._docs = docs
+        self._offsets = offsets
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._docs)
+
+    def _find(self, doc_ord: object) -> int:
+        i = bisect_left(self._docs, doc_ord) if isinstance(doc_ord, int) else len(self._docs)
+        return i if i < len(self._docs) and self._docs[i] == doc_ord else -1
+
+    def __contains__(self, doc_ord: object) -> bool:
+        return self._find(doc_ord) >= 0
+
+    def __getitem__(self, doc_ord: int) -> memoryview:
+        i = self._find(doc_ord)
+        if i < 0:
+            raise KeyError(doc_ord)
+        return self._positions[self._offsets[i]:self._offsets[i + 1]]
+
+    def get(self, doc_ord: int, default: Any = None) -> Any:
+        i = self._find(doc_ord)
+        return default if i < 0 else self._positions[self._offsets[i]:self._offsets[i + 1]]
+
+    def frequencies(self) -> Iterator[Tuple[int, int]]:
+        """(document ordinal, term frequency) pairs, read from the offsets alone."""
+        offsets = self._offsets
+        return zip(self._docs, map(int.__rsub__, offsets, offsets[1:]))
+
+    def frequencies_for(self, doc_ords: Iterable[int]) -> List[Tuple[int, int]]:
+        """(ordinal, term frequency) of those given documents that contain the term."""
+        offsets = self._offsets
+        pairs = []
+        for doc_ord in doc_ords:
+            i = self._find(doc_ord)
+            if i >= 0:
+                pairs.append((doc_ord, offsets[i + 1] - offsets[i]))
+        return pairs
+
+    def items(self) -> Iterator[Tuple[int, memoryview]]:
+        offsets = self._offsets
+        positions = self._positions
+        return zip(self._docs, (positions[offsets[i]:offsets[i + 1]] for i in range(len(self._docs))))
+
+
+class _LazyPostings(Mapping):
+    """
+    Term -> ``_TermPostings``, sliced out of the flat posting arrays on access.
+
+    A term's number is found by binary search over the sorted vocabulary in
+    the mapping, so loading builds no per-term structure.
+    """
+
+    def __init__(self, terms: _TermList, term_offsets: memoryview, docs: memoryview, position_offsets: memoryview, positions: memoryview) -> None:
+        self._terms = terms
+        self._term_offsets = term_offsets
+        self._docs = docs
+        self._position_offsets = position_offsets
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._terms)
+
+    def _term_no(self, term: object) -> int:
+        return self._terms.find(term.encode("utf-8")) if isinstance(term, str) else -1
+
+    def __contains__(self, term: object) -> bool:
+        return self._term_no(term) >= 0
+
+    def df(self, term: str) -> int:
+        i = self._term_no(term)
+        return 0 if i < 0 else self._term_offsets[i + 1] - self._term_offsets[i]
+
+    def _postings(self, i: int) -> _TermPostings:
+        start, end = self._term_offsets[i], self._term_offsets[i + 1]
+        return _TermPostings(self._docs[start:end], self._position_offsets[start:end + 1], self._positions)
+
+    def __getitem__(self, term: str) -> _TermPostings:
+        i = self._term_no(term)
+        if i < 0:
+            raise KeyError(term)
+        return self._postings(i)
+
+    def get(self, term: str, default: Any = None) -> Any:
+        i = self._term_no(term)
+        return default if i < 0 else self._postings(i)
+
+    def items(self) -> Iterator[Tuple[str, _TermPostings]]:
+        return ((term, self._postings(i)) for i, term in enumerate(self._terms))
+
+
+class _SnapshotSegment(InvertedIndex):
+    """``InvertedIndex`` whose data are views over a mapped snapshot."""
+
+    def df(self, term: str) -> int:
+        # Langsung dari offset, tanpa membuat objek posting
+        return self.postings.df(term)
+
+    def score_matches(
+        self,
+        matched: Set[int],
+        term_weights: Dict[str, float],
+        idfs: Dict[str, float],
+        avgdl: float
+    ) -> Dict[int, float]:
+        # Sama dengan InvertedIndex.score_matches, tetapi tf dihitung dari
+        # selisih offset sehingga posisi token tidak perlu di-slice
+        scores = dict.fromkeys(matched, 0.0)
+        doc_lengths = self.doc_lengths
+        for term, weight in term_weights.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            check_cancelled()
+            idf = idfs[term] * weight
+            entries = postings.frequencies_for(scores) if len(scores) < len(postings) else postings.frequencies()
+            for doc_ord, tf in entries:
+                if doc_ord not in scores:
+                    continue
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lengths[doc_ord] / avgdl)
+                scores[doc_ord] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+
+
+class IndexSnapshot:
+    """
+    An open snapshot file.
+
+    ``load`` validates the header, optionally verifies every section
+    checksum, and wraps the mapped sections in read-only views that the
+    index code uses like its usual lists and dicts. The mapping stays open
+    for the life of the process and is shared by forked workers.
+    """
+
+    def __init__(self, path: str) -> None:
+        _require_little_endian()
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+        if len(self._mm) < _HEADER.size + len(SECTIONS) * _SECTION.size:
+            raise ValueError(f"'{path}' is too small to be an index snapshot")
+        (magic, version, self.n_docs, self.n_terms, self.total_length,
+         self.vector_dim, self.source, self.params) = _HEADER.unpack_from(self._mm, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"'{path}' is not an index snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} in '{path}'")
+        self.sections = {
+            name: _SECTION.unpack_from(self._mm, _HEADER.size + i * _SECTION.size)
+            for i, name in enumerate(SECTIONS)
+        }
+        for name, (offset, length, _) in self.sections.items():
+            if offset + length > len(self._mm):
+                raise ValueError(f"Section '{name}' of '{path}' is truncated")
+
+    def verify(self) -> None:
+        """
+        Check every section against its CRC32.
+
+        Raises:
+            ValueError: If a section is corrupt
+        """
+        for name, (offset, length, crc) in self.sections.items():
+            if zlib.crc32(self._view[offset:offset + length]) != crc:
+                raise ValueError(f"Checksum mismatch in section '{name}' of '{self.path}'")
+
+    def _section(self, name: str, fmt: Optional[str] = None) -> memoryview:
+        offset, length, _ = self.sections[name]
+        view = self._view[offset:offset + length]
+        return view.cast(fmt) if fmt else view
+
+    def _array(self, name: str, dtype: str) -> "np.ndarray":
+        offset, length, _ = self.sections[name]
+        return np.frombuffer(self._mm, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+    def load(self, embedder: Optional[HashingEmbedder] = None) -> SearchIndex:
+        """
+        Build a ``SearchIndex`` over the mapped snapshot.
+
+        Args:
+            embedder: Embedder for vector search; its dimension must match the
+                snapshot's vectors
+
+        Returns:
+            Single-segment index whose data stays in the mapping
+        """
+        segment = _SnapshotSegment(embedder)
+        doc_ids = _StringList(self._section("doc_ids"), self._section("doc_id_offsets", "Q"))
+        segment.doc_ids = doc_ids
+        segment.doc_ords = _IdLookup(doc_ids, self._section("doc_id_sort", "I"))
+        segment.doc_lengths = self._section("doc_lengths", "I")
+        segment.passages = _SliceList(self._section("passages", "I"), self._section("passage_offsets", "Q"))
+        segment.total_length = self.total_length
+
+        vocab_offset, vocab_length, _ = self.sections["vocab"]
+        segment._vocab_blob = _VocabBlob(self._mm, vocab_offset, vocab_length)
+        segment._vocab_starts = self._section("vocab_starts", "I")
+        segment._vocab_terms = _TermList(self._section("vocab"), segment._vocab_starts)
+        segment._dictionary = TermDictionary(segment._vocab_terms, _GramTable(
+            _StringList(self._section("grams"), self._section("gram_key_offsets", "Q")),
+            self._section("gram_offsets", "Q"),
+            self._section("gram_terms", "I")
+        ))
+        segment.postings = _LazyPostings(
+            segment._vocab_terms,
+            self._section("term_offsets", "Q"),
+            self._section("posting_docs", "I"),
+            self._section("position_offsets", "Q"),
+            self._section("positions", "I")
+        )
+
+        if embedder is not None and self.vector_dim:
+            matrix = self._array("vector_matrix", "<f4").reshape(-1, self.vector_dim)
+            centroids = self._array("vector_centroids", "<f4")
+            segment.vectors = VectorIndex(
+                matrix,
+                self._array("vector_ords", "<i8"),
+                centroids.reshape(-1, self.vector_dim) if len(centroids) else None,
+                self._array("vector_offsets", "<i8") if len(centroids) else None
+            )
+        segment.metadata = MetadataIndex.from_buffer(self._section("metadata"))
+        return SearchIndex((segment,), embedder=embedder)
+
+
+def load_or_build_index(
+    path: str,
+    store: DocumentStore,
+    embedder: Optional[HashingEmbedder] = None,
+    verify: bool = True,
+    mapped: bool = False
+) -> SearchIndex:
+    """
+    Load the index from a snapshot, or rebuild it when the snapshot is unusable.
+
+    A snapshot is used only if it was built from the same documents (store
+    fingerprint) with the same index settings. Otherwise, or when it is
+    missing or corrupt, the index is built from the store and the snapshot is
+    rewritten so the next start is fast again.
+
+    Args:
+        path: Snapshot file
+        store: Document store the index must match
+        embedder: Embedder for vector search, if enabled
+        verify: Check section checksums (reads the whole file once)
+        mapped: After a rebuild, return the index mapped from the rewritten
+            snapshot instead of the built one (for forked workers, which
+            share a mapping but not Python objects)
+
+    Returns:
+        Index ready for queries
+    """
+    vector_dim = embedder.dim if embedder is not None else 0
+    source = store.fingerprint()
+    reason = "missing"
+    if os.path.exists(path):
+        try:
+            snapshot = IndexSnapshot(path)
+            if snapshot.source != source:
+                reason = "built from different documents"
+            elif snapshot.params != index_params(vector_dim):
+                reason = "built with different index settings"
+            else:
+                started = time.perf_counter()
+                if verify:
+                    snapshot.verify()
+                index = snapshot.load(embedder)
+                logger.info("Loaded index snapshot %s (%d documents) in %.2fs", path, index.n_docs, time.perf_counter() - started)
+                return index
+        except (OSError, ValueError) as e:
+            reason = str(e)
+
+    logger.info("Index snapshot %s not used (%s); rebuilding", path, reason)
+    started = time.perf_counter()
+    index = SearchIndex.build(store.iter_documents(), embedder)
+    logger.info("Built index (%d documents) in %.2fs", index.n_docs, time.perf_counter() - started)
+    try:
+        write_snapshot(index, path, source)
+        logger.info("Wrote index snapshot %s", path)
+    except OSError as e:
+        logger.warning("Could not write index snapshot %s: %s", path, e)
+        return map_index(index, embedder) if mapped else index
+    return IndexSnapshot(path).load(embedder) if mapped else index
+
+
+def map_index(index: SearchIndex, embedder: Optional[HashingEmbedder] = None) -> SearchIndex:
+    """
+    Move a freshly built index into an anonymous snapshot mapping.
+
+    Objects of the built index live on the Python heap, and every read of
+    one updates its reference count, so after a fork each worker gradually
+    copies the pages it touches. The mapped copy is shared through the page
+    cache instead. The temporary file is unlinked right after it is mapped.
+
+    Args:
+        index: Single-segment index without deletions (``SearchIndex.build``)
+        embedder: Embedder for vector search, if enabled
+
+    Returns:
+        Index whose data stays in the mapping
+    """
+    fd, path = tempfile.mkstemp(prefix="mcp-index-", suffix=".idx")
+    os.close(fd)
+    try:
+        write_snapshot(index, path, bytes(32))
+        return IndexSnapshot(path).load(embedder)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search index snapshot tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="Build a snapshot from a document segment")
+    build_cmd.add_argument("segment", help="Document segment file")
+    build_cmd.add_argument("snapshot", help="Output snapshot path")
+    build_cmd.add_argument("--vector-dim", type=int, default=0, help="Also store document vectors (needs numpy)")
+
+    info_cmd = commands.add_parser("info", help="Show and verify a snapshot")
+    info_cmd.add_argument("snapshot", help="Snapshot path")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        store = SegmentDocumentStore(args.segment)
+        embedder = HashingEmbedder(args.vector_dim) if args.vector_dim else None
+        started = time.perf_counter()
+        index = SearchIndex.build(store.iter_documents(), embedder)
+        size = write_snapshot(index, args.snapshot, store.fingerprint())
+        print(f"✅ Wrote {index.n_docs} documents ({size / 1e6:.1f} MB) to {args.snapshot} in {time.perf_counter() - started:.1f}s")
+    elif args.command == "info":
+        snapshot = IndexSnapshot(args.snapshot)
+        print(f"📦 {args.snapshot}: {snapshot.n_docs} documents, {snapshot.n_terms} terms, vector dim {snapshot.vector_dim}")
+        for name, (offset, length, _) in snapshot.sections.items():
+            print(f"   {name:<18} {length:>14,} bytes")
+        try:
+            snapshot.verify()
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print("✅ Checksums OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Index metadata untuk filter dan facet di tool 'search'
+Setiap pasangan (field, nilai) metadata dipetakan ke dokumen satu segment index:
+nilai yang sering muncul disimpan sebagai bitmap (int Python, bit i = ordinal i),
+nilai yang jarang sebagai array ordinal terurut. Filter AND/OR dievaluasi dengan
+operasi bitmap, lalu hanya ordinal yang lolos yang dipakai saat scoring teks.
+"""
+
+import json
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+# Operator gabungan filter; key lain adalah nama field metadata
+FILTER_OPERATORS = ("$and", "$or")
+# Batas ukuran filter, supaya satu request tidak bisa membuat evaluasi yang mahal
+MAX_FILTER_CLAUSES = 64
+# Jumlah nilai teratas per field di hasil facet
+FACET_LIMIT = 20
+
+# Nilai yang bisa difilter; list diindex per elemen, dict/None diabaikan
+_SCALARS = (str, int, float, bool)
+# Nilai yang muncul di >= 1/32 dokumen: bitmap (n/8 byte) lebih kecil dari array (4 byte/dokumen)
+_BITMAP_DENSITY = 32
+
+_ONE_RE = re.compile("1")
+_LENGTH = struct.Struct("<I")
+
+# Node filter: ("field", nama, (nilai, ...)), ("and", (node, ...)) atau ("or", (node, ...))
+Filter = Tuple[Any, ...]
+# Isi index per nilai: bitmap (int) atau ordinal terurut (array / memoryview "I")
+_Entry = Union[int, Sequence[int]]
+
+
+def parse_filter(spec: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """
+    Validate a 'filters' argument and turn it into a filter tree.
+
+    Every plain key is a metadata field that must equal the given value, or
+    one of the values when a list is given. "$and" and "$or" take a list of
+    nested filters. All keys of one object must hold together (AND). At most
+    ``MAX_FILTER_CLAUSES`` values and operators in total.
+
+    Examples:
+        {"category": "tutorial", "language": ["id", "en"]}
+        {"$or": [{"category": "info"}, {"version": "1.0.0"}]}
+
+    Args:
+        spec: Filter object from the client (None or empty = no filter)
+
+    Returns:
+        Hashable, picklable filter tree, or None
+
+    Raises:
+        ValueError: If the filter is malformed or too large
+    """
+    if not spec:
+        return None
+    clauses = [0]
+    return _parse(spec, clauses)
+
+
+def _parse(spec: Any, clauses: List[int]) -> Filter:
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("A filter must be a non-empty object")
+    children = []
+    for key, value in spec.items():
+        if key in FILTER_OPERATORS:
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"'{key}' needs a non-empty list of filters")
+            # Operator juga dihitung, jadi kedalaman nesting ikut terbatas
+            _count_clauses(clauses, 1)
+            nodes = tuple(_parse(item, clauses) for item in value)
+            children.append(nodes[0] if len(nodes) == 1 else ("and" if key == "$and" else "or", nodes))
+            continue
+        if key.startswith("$"):
+            raise ValueError(f"Unknown filter operator '{key}'. Use: {', '.join(FILTER_OPERATORS)}")
+        values = value if isinstance(value, list) else [value]
+        if not values or not all(isinstance(v, _SCALARS) for v in values):
+            raise ValueError(f"Filter on '{key}' needs a value or a non-empty list of values")
+        # Setiap nilai satu kondisi: {"f": [v1, ..., v1000]} sama mahalnya dengan 1000 klausa
+        _count_clauses(clauses, len(values))
+        children.append(("field", key, tuple(values)))
+    return children[0] if len(children) == 1 else ("and", tuple(children))
+
+
+def _count_clauses(clauses: List[int], n: int) -> None:
+    clauses[0] += n
+    if clauses[0] > MAX_FILTER_CLAUSES:
+        raise ValueError(f"Filter has more than {MAX_FILTER_CLAUSES} conditions")
+
+
+def merge_facets(parts: Iterable[Dict[str, Dict[Any, int]]]) -> Dict[str, Dict[Any, int]]:
+    """Sum the facet counts of several segments or shards."""
+    merged: Dict[str, Dict[Any, int]] = {}
+    for part in parts:
+        for field, counts in part.items():
+            target = merged.setdefault(field, {})
+            for value, count in counts.items():
+                target[value] = target.get(value, 0) + count
+    return merged
+
+
+def top_facets(counts: Dict[str, Dict[Any, int]], limit: int = FACET_LIMIT) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Format facet counts for a response: the ``limit`` most frequent values per field.
+
+    Returns:
+        {field: [{"value": ..., "count": ...}, ...]}, most frequent first
+    """
+    return {
+        field: [
+            {"value": value, "count": count}
+            for value, count in sorted(values.items(), key=lambda item: (-item[1], str(item[0])))[:limit]
+        ]
+        for field, values in counts.items()
+    }
+
+
+def _to_bitmap(ords: Iterable[int]) -> int:
+    """Bitmap with the bits of the given ordinals set."""
+    ords = ords if isinstance(ords, (list, array, memoryview, set, frozenset)) else list(ords)
+    if not len(ords):
+        return 0
+    buf = bytearray((max(ords) >> 3) + 1)
+    for doc_ord in ords:
+        buf[doc_ord >> 3] |= 1 << (doc_ord & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _ords_of(bitmap: int) -> List[int]:
+    """Ordinals of the set bits (highest first); O(size) in C plus O(bits set) in Python."""
+    bits = bin(bitmap)
+    top = len(bits) - 1
+    return [top - match.start() for match in _ONE_RE.finditer(bits)]
+
+
+def _contains(ords: Sequence[int], doc_ord: int) -> bool:
+    i = bisect_left(ords, doc_ord)
+    return i < len(ords) and ords[i] == doc_ord
+
+
+class MetadataIndex:
+    """
+    (field, value) -> documents of one index segment, for filters and facets.
+
+    While documents are added each value collects its ordinals in an
+    ``array``. ``finalize`` turns values found in at least 1/32 of the
+    documents into int bitmaps, which are smaller at that density; rarer
+    values stay sorted arrays, so a high-cardinality field costs about four
+    bytes per document instead of a bitmap per value.
+
+    A filter is evaluated bottom-up as bitmaps, so AND/OR over whole fields
+    are single big-int operations, and only the surviving ordinals are turned
+    into a set. The cost therefore shrinks with the number of matching
+    documents.
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Dict[Any, _Entry]] = {}
+        self.n_docs = 0
+
+    def add(self, doc_ord: int, metadata: Any) -> None:
+        """Index the metadata dict of the document with this ordinal (must be ascending)."""
+        if not isinstance(metadata, dict):
+            return
+        for field, value in metadata.items():
+            for v in value if isinstance(value, list) else (value,):
+                if isinstance(v, _SCALARS):
+                    ords = self.fields.setdefault(field, {}).setdefault(v, array("I"))
+                    if not ords or ords[-1] != doc_ord:
+                        ords.append(doc_ord)
+
+    def finalize(self, n_docs: int) -> None:
+        """Convert dense values to bitmaps once all documents are added."""
+        self.n_docs = n_docs
+        for values in self.fields.values():
+            for value, entry in values.items():
+                if not isinstance(entry, int) and len(entry) * _BITMAP_DENSITY >= n_docs:
+                    values[value] = _to_bitmap(entry)
+
+    @classmethod
+    def merge(cls, parts: Iterable[Tuple["MetadataIndex", Dict[int, int]]], n_docs: int) -> "MetadataIndex":
+        """
+        Merge the metadata of several segments.
+
+        Args:
+            parts: (metadata, old ordinal -> new ordinal) pairs in corpus
+                order; ordinals missing from the mapping are dropped
+            n_docs: Number of documents of the merged segment
+
+        Returns:
+            Finalized merged index
+        """
+        merged = cls()
+        for metadata, remap in parts:
+            for field, values in metadata.fields.items():
+                target = merged.fields.setdefault(field, {})
+                for value, entry in values.items():
+                    ords = sorted(_ords_of(entry)) if isinstance(entry, int) else entry
+                    new_ords = [remap[doc_ord] for doc_ord in ords if doc_ord in remap]
+                    if new_ords:
+                        target.setdefault(value, array("I")).extend(new_ords)
+        merged.finalize(n_docs)
+        return merged
+
+    def _bitmap(self, node: Filter) -> int:
+        kind = node[0]
+        if kind == "field":
+            values = self.fields.get(node[1], {})
+            bitmap = 0
+            for value in node[2]:
+                entry = values.get(value)
+                if entry is not None:
+                    bitmap |= entry if isinstance(entry, int) else _to_bitmap(entry)
+            return bitmap
+        children = node[1]
+        bitmap = self._bitmap(children[0])
+        for child in children[1:]:
+            if kind == "and":
+                if not bitmap:
+                    break
+                bitmap &= self._bitmap(child)
+            else:
+                bitmap |= self._bitmap(child)
+        return bitmap
+
+    def matching(self, node: Filter) -> Set[int]:
+        """
+        Ordinals of the documents matching a filter.
+
+        Args:
+            node: Filter tree from ``parse_filter``
+
+        Returns:
+            Set of matching ordinals
+        """
+        if node[0] == "field" and len(node[2]) == 1:
+            # Satu nilai: langsung dari index tanpa lewat bitmap
+            entry = self.fields.get(node[1], {}).get(node[2][0])
+            if entry is None:
+                return set()
+            return set(_ords_of(entry)) if isinstance(entry, int) else set(entry)
+        return set(_ords_of(self._bitmap(node)))
+
+    def facet_counts(self, docs: Collection[int], fields: Iterable[str]) -> Dict[str, Dict[Any, int]]:
+        """
+        Count the given documents per value of each field.
+
+        Args:
+            docs: Ordinals to count (e.g. all matches of a query)
+            fields: Metadata fields to count
+
+        Returns:
+            {field: {value: count}}, without zero counts
+        """
+        docs = docs if isinstance(docs, (set, frozenset)) else set(docs)
+        mask: Optional[int] = None
+        counts: Dict[str, Dict[Any, int]] = {}
+        for field in fields:
+            field_counts: Dict[Any, int] = {}
+            for value, entry in self.fields.get(field, {}).items():
+                if isinstance(entry, int):
+                    if mask is None:
+                        mask = _to_bitmap(docs)
+                    count = (entry & mask).bit_count()
+                elif len(entry) <= len(docs):
+                    count = sum(1 for doc_ord in entry if doc_ord in docs)
+                else:
+                    count = sum(1 for doc_ord in docs if _contains(entry, doc_ord))
+                if count:
+                    field_counts[value] = count
+            counts[field] = field_counts
+        return counts
+
+    # ------------------------------------------------------------------
+    # Serialisasi (snapshot index)
+    # ------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """Serialize as a JSON directory followed by the bitmaps and arrays."""
+        directory = []
+        payload = bytearray()
+        for field, values in self.fields.items():
+            entries = []
+            for value, entry in values.items():
+                if isinstance(entry, int):
+                    data = entry.to_bytes((entry.bit_length() + 7) // 8, "little")
+                    kind = "bitmap"
+                else:
+                    data = array("I", entry).tobytes()
+                    kind = "ords"
+                entries.append([value, kind, len(payload), len(data)])
+                payload += data
+                payload += b"\0" * (-len(payload) % 4)
+            directory.append([field, entries])
+        head = json.dumps({"n_docs": self.n_docs, "fields": directory}, ensure_ascii=False).encode("utf-8")
+        head += b" " * (-(len(head) + _LENGTH.size) % 4)
+        return _LENGTH.pack(len(head)) + head + bytes(payload)
+
+    @classmethod
+    def from_buffer(cls, data: memoryview) -> "MetadataIndex":
+        """
+        Load an index written by ``to_bytes``.
+
+        Sparse values stay views into ``data`` (no copy); bitmaps are
+        decoded into ints.
+        """
+        index = cls()
+        if not len(data):
+            return index
+        (head_len,) = _LENGTH.unpack_from(data, 0)
+        head = json.loads(bytes(data[_LENGTH.size:_LENGTH.size + head_len]))
+        payload = data[_LENGTH.size + head_len:]
+        index.n_docs = head["n_docs"]
+        for field, entries in head["fields"]:
+            values = index.fields[field] = {}
+            for value, kind, offset, length in entries:
+                chunk = payload[offset:offset + length]
+                values[value] = int.from_bytes(chunk, "little") if kind == "bitmap" else chunk.cast("I")
+        return index
@@ -0,0 +1,220 @@
+"""
+Metrics untuk tools MCP (format text Prometheus)
+Counter, histogram latency/ukuran respons, dan gauge in-flight per tool,
+ditambah statistik khusus 'search'. Dipasang sebagai middleware FastMCP.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastmcp.server.middleware import Middleware
+
+# Batas bucket histogram (Prometheus: "le", kumulatif)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+
+# Label untuk call ke tool yang tidak terdaftar (nama dari client, tidak dipakai
+# sebagai label supaya jumlah series tetap terbatas)
+UNKNOWN_TOOL = "unknown"
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format (backslash, quote, newline)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is one bisect and two additions."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6g}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class ToolStats:
+    """Counters of one tool."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+
+
+class Metrics:
+    """
+    Registry of per-tool and search metrics.
+
+    Only the ``tools`` given at construction get their own series; calls to
+    any other name (the client picks it) are counted under
+    ``tool="unknown"``, so memory and scrape size stay bounded.
+
+    Updates take one uncontended lock, so recording a call costs a few
+    microseconds. ``render`` produces the Prometheus text exposition format.
+    Extra gauges (e.g. cache sizes) can be added with ``add_gauges``; they are
+    evaluated only when metrics are scraped.
+    """
+
+    def __init__(self, tools: Iterable[str] = ()) -> None:
+        self.tools: Dict[str, ToolStats] = {name: ToolStats() for name in tools}
+        self.search_candidates = Histogram(COUNT_BUCKETS)
+        self.search_results = Histogram(COUNT_BUCKETS)
+        self.search_cache_hits = 0
+        self._gauges: List[Tuple[str, Callable[[], Dict[str, float]]]] = []
+        self._lock = threading.Lock()
+
+    def _tool(self, name: str) -> ToolStats:
+        stats = self.tools.get(name)
+        if stats is None:
+            stats = self.tools.setdefault(UNKNOWN_TOOL, ToolStats())
+        return stats
+
+    def start_call(self, tool: str) -> None:
+        with self._lock:
+            stats = self._tool(tool)
+            stats.calls += 1
+            stats.in_flight += 1
+
+    def end_call(self, tool: str, seconds: float, response_bytes: Optional[int], error: bool) -> None:
+        with self._lock:
+            stats = self._tool(tool)
+            stats.in_flight -= 1
+            stats.latency.observe(seconds)
+            if error:
+                stats.errors += 1
+            elif response_bytes is not None:
+                stats.response_bytes.observe(response_bytes)
+
+    def record_search(self, candidates: Optional[int], results: int) -> None:
+        """
+        Record one search.
+
+        Args:
+            candidates: Documents scored by the index, or None for a cache hit
+            results: Results returned to the client
+        """
+        with self._lock:
+            if candidates is None:
+                self.search_cache_hits += 1
+            else:
+                self.search_candidates.observe(candidates)
+            self.search_results.observe(results)
+
+    def add_gauges(self, collect: Callable[[], Dict[str, float]]) -> None:
+        """Register a callback returning {metric name: value} at scrape time."""
+        self._gauges.append(("gauge", collect))
+
+    def add_counters(self, collect: Callable[[], Dict[str, float]]) -> None:
+        """Like ``add_gauges``, for monotonically increasing values kept elsewhere."""
+        self._gauges.append(("counter", collect))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            tools: List[Tuple[str, ToolStats]] = [(escape_label(name), s) for name, s in sorted(self.tools.items())]
+            lines = [
+                "# HELP mcp_tool_calls_total Tool calls started.",
+                "# TYPE mcp_tool_calls_total counter"
+            ]
+            lines += [f'mcp_tool_calls_total{{tool="{name}"}} {s.calls}' for name, s in tools]
+            lines += [
+                "# HELP mcp_tool_errors_total Tool calls that raised an error.",
+                "# TYPE mcp_tool_errors_total counter"
+            ]
+            lines += [f'mcp_tool_errors_total{{tool="{name}"}} {s.errors}' for name, s in tools]
+            lines += [
+                "# HELP mcp_tool_in_flight Tool calls currently running.",
+                "# TYPE mcp_tool_in_flight gauge"
+            ]
+            lines += [f'mcp_tool_in_flight{{tool="{name}"}} {s.in_flight}' for name, s in tools]
+            lines += [
+                "# HELP mcp_tool_duration_seconds Tool call latency.",
+                "# TYPE mcp_tool_duration_seconds histogram"
+            ]
+            for name, s in tools:
+                lines += s.latency.render("mcp_tool_duration_seconds", f'tool="{name}"')
+            lines += [
+                "# HELP mcp_tool_response_bytes Size of successful tool responses (UTF-8 text content).",
+                "# TYPE mcp_tool_response_bytes histogram"
+            ]
+            for name, s in tools:
+                lines += s.response_bytes.render("mcp_tool_response_bytes", f'tool="{name}"')
+            lines += [
+                "# HELP mcp_search_candidates Documents scored per search (cache misses only).",
+                "# TYPE mcp_search_candidates histogram"
+            ]
+            lines += self.search_candidates.render("mcp_search_candidates", "")
+            lines += [
+                "# HELP mcp_search_results Results returned per search.",
+                "# TYPE mcp_search_results histogram"
+            ]
+            lines += self.search_results.render("mcp_search_results", "")
+            lines += [
+                "# HELP mcp_search_cache_hits_total Searches answered from the result cache.",
+                "# TYPE mcp_search_cache_hits_total counter",
+                f"mcp_search_cache_hits_total {self.search_cache_hits}"
+            ]
+
+        for kind, collect in self._gauges:
+            for name, value in collect().items():
+                lines += [f"# TYPE {name} {kind}", f"{name} {value:.6g}"]
+        return "\n".join(lines) + "\n"
+
+
+def _response_bytes(result) -> Optional[int]:
+    content = getattr(result, "content", None)
+    if content is None:
+        return None
+    size = 0
+    for block in content:
+        text = getattr(block, "text", None)
+        if text is not None:
+            size += len(text) if text.isascii() else len(text.encode("utf-8"))
+    return size
+
+
+class MetricsMiddleware(Middleware):
+    """Record calls, errors, latency, response size and in-flight count of every tool."""
+
+    def __init__(self, metrics: Metrics) -> None:
+        self.metrics = metrics
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        self.metrics.start_call(tool)
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await call_next(context)
+            return result
+        finally:
+            self.metrics.end_call(
+                tool,
+                time.perf_counter() - started,
+                _response_bytes(result),
+                error=result is None
+            )
@@ -0,0 +1,267 @@
+"""
+Eksekusi tool berat di luar event loop
+Bagian CPU-bound dari tool (scoring search, membaca batch dokumen) dijalankan di
+thread pool terbatas. Batas waktu per tool berlaku untuk seluruh tools/call
+(DeadlineMiddleware); pekerjaan yang sudah tidak ditunggu (timeout, client putus,
+request dibatalkan) dihentikan secara kooperatif lewat CancelToken yang dicek oleh
+index di antara langkah-langkahnya.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware
+
+logger = logging.getLogger(__name__)
+
+# Token milik pekerjaan yang sedang berjalan di thread ini (None = tidak dibatasi)
+_current_token: contextvars.ContextVar[Optional["CancelToken"]] = contextvars.ContextVar("cancel_token", default=None)
+# Deadline (time.monotonic) tools/call yang sedang berjalan; diisi DeadlineMiddleware
+_call_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("call_deadline", default=None)
+
+
+class ToolCancelled(Exception):
+    """Raised inside offloaded work once its caller no longer waits for it."""
+
+
+class CancelToken:
+    """Cancellation flag plus deadline shared by a tool call and its worker thread."""
+
+    def __init__(self, deadline: Optional[float] = None) -> None:
+        self.deadline = deadline
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self.deadline is not None and time.monotonic() > self.deadline)
+
+    def check(self) -> None:
+        """Raise ToolCancelled if the work was cancelled or ran past its deadline."""
+        if self.cancelled:
+            raise ToolCancelled()
+
+
+def check_cancelled() -> None:
+    """
+    Cancellation point for long-running work.
+
+    Cheap enough to call per segment, per term or per result. A no-op outside
+    ``ToolExecutor.run`` (e.g. in shard processes or at startup).
+
+    Raises:
+        ToolCancelled: If the current tool call was cancelled or timed out
+    """
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """Parse "search=5,fetch_many=10" into {tool: seconds}."""
+    timeouts = {}
+    for item in spec.split(","):
+        if item.strip():
+            tool, _, seconds = item.partition("=")
+            timeouts[tool.strip()] = float(seconds)
+    return timeouts
+
+
+class ToolExecutor:
+    """
+    Runs the CPU-bound part of selected tools on a bounded thread pool.
+
+    Tools named in ``offloaded`` run on at most ``max_workers`` threads, so the
+    event loop keeps serving other sessions while a heavy search runs. Other
+    tools run inline, exactly as before. ``timeouts`` (else
+    ``default_timeout``; 0 disables it) holds the per-tool time limits; the
+    limit of a whole call is enforced by ``DeadlineMiddleware``, and work run
+    here inherits that call's deadline (or starts its own outside one) and
+    checks it cooperatively. When an offloaded call times out or its request
+    is cancelled (client disconnect, MCP cancellation), the caller returns at
+    once and the thread stops at its next ``check_cancelled``.
+    """
+
+    def __init__(
+        self,
+        offloaded: Iterable[str],
+        max_workers: int = 4,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 30.0
+    ) -> None:
+        self.offloaded = frozenset(offloaded)
+        self.max_workers = max_workers
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._lock = threading.Lock()
+        self.counters = {"submitted": 0, "queued": 0, "running": 0, "timeouts": 0, "cancelled": 0}
+
+    def timeout_for(self, tool: str) -> Optional[float]:
+        seconds = self.timeouts.get(tool, self.default_timeout)
+        return seconds if seconds > 0 else None
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += delta
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(counters, threads=self.max_workers, tools=sorted(self.offloaded))
+
+    async def run(self, tool: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` for ``tool``, in the pool if the tool is offloaded.
+
+        Args:
+            tool: Tool name, used to pick the pool and the timeout
+            fn: Synchronous function to run
+            *args: Arguments for fn
+
+        Returns:
+            The function's result
+
+        Raises:
+            ToolError: If the call exceeded the tool's time limit
+        """
+        limit = self.timeout_for(tool)
+        deadline = _call_deadline.get()
+        if deadline is None and limit:
+            deadline = time.monotonic() + limit
+        timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        token = CancelToken(deadline)
+        context = contextvars.copy_context()
+        context.run(_current_token.set, token)
+
+        if tool not in self.offloaded:
+            try:
+                return context.run(fn, *args)
+            except ToolCancelled:
+                self._count("timeouts")
+                raise ToolError(f"Tool '{tool}' exceeded its time limit of {limit:g}s")
+
+        def job() -> Any:
+            self._count("queued", -1)
+            # Dibatalkan selagi masih antre: tidak perlu mulai sama sekali
+            token.check()
+            self._count("running")
+            try:
+                return context.run(fn, *args)
+            finally:
+                self._count("running", -1)
+
+        self._count("submitted")
+        self._count("queued")
+        future = asyncio.wrap_future(self._pool.submit(job))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            token.cancel()
+            self._count("timeouts")
+            logger.warning("Tool '%s' timed out after %gs", tool, limit)
+            raise ToolError(f"Tool '{tool}' exceeded its time limit of {limit:g}s")
+        except asyncio.CancelledError:
+            token.cancel()
+            # Dibatalkan DeadlineMiddleware tepat di deadline: dihitung di sana sebagai timeout
+            if deadline is None or time.monotonic() < deadline:
+                self._count("cancelled")
+                logger.info("Tool '%s' cancelled by the client", tool)
+            raise
+        except ToolCancelled:
+            # Deadline terlewati di dalam thread sebelum wait_for sempat habis
+            self._count("timeouts")
+            raise ToolError(f"Tool '{tool}' exceeded its time limit of {limit:g}s")
+        finally:
+            if not future.done():
+                # Hasil yang tidak ditunggu lagi tetap harus diambil supaya
+                # asyncio tidak mencatat "exception was never retrieved"
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class DeadlineMiddleware(Middleware):
+    """
+    Enforce the per-tool time limit of ``ToolExecutor`` on every tools/call.
+
+    The deadline covers everything the tool does, including what it awaits
+    outside the executor (sharded scatter-gather, progress notifications of
+    a streamed fetch, ...), and work run through ``ToolExecutor.run`` checks
+    the same deadline. A call still running at its deadline is cancelled and
+    answered with a ToolError; it counts as a timeout in the executor stats.
+    """
+
+    def __init__(self, executor: ToolExecutor) -> None:
+        self.executor = executor
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        limit = self.executor.timeout_for(tool)
+        if limit is None:
+            return await call_next(context)
+        reset = _call_deadline.set(time.monotonic() + limit)
+        try:
+            async with asyncio.timeout(limit) as scope:
+                return await call_next(context)
+        except TimeoutError:
+            if not scope.expired():
+                raise
+            self.executor._count("timeouts")
+            logger.warning("Tool '%s' timed out after %gs", tool, limit)
+            raise ToolError(f"Tool '{tool}' exceeded its time limit of {limit:g}s")
+        finally:
+            _call_deadline.reset(reset)
+
+
+class SingleFlight:
+    """
+    Share one run of an async computation among concurrent callers.
+
+    Identical searches that arrive while the first is still running on the
+    pool wait for its result instead of each scoring the query again (without
+    this, offloading turns a burst of one popular query into a burst of
+    duplicate work, since none of them finds the cache filled yet). The
+    shared run is cancelled only when every caller has gone away.
+    """
+
+    def __init__(self) -> None:
+        # key -> [task, jumlah pemanggil yang menunggu]
+        self._flights: Dict[Hashable, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: Hashable, start: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``start()``, or the run already in flight for ``key``.
+
+        Args:
+            key: Identity of the computation (include a version if the
+                result depends on mutable state)
+            start: Starts the computation; called only by the first caller
+
+        Returns:
+            The computation's result
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight[0].done():
+            flight = self._flights[key] = [asyncio.ensure_future(start()), 0]
+            flight[0].add_done_callback(lambda _: self._flights.get(key) is flight and self._flights.pop(key))
+        task = flight[0]
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            flight[1] -= 1
+            if flight[1] == 0 and not task.done():
+                task.cancel()
@@ -0,0 +1,69 @@
+"""
+Cache respons tool yang immutable (sudah ter-encode)
+Hasil tool seperti 'fetch' satu dokumen dan 'server_info' hanya bergantung pada
+argumennya dan versi corpus. Hasil pertama disimpan sebagai ToolResult jadi (teks
+JSON sudah di-encode), sehingga call berikutnya dengan argumen yang sama tidak
+membangun dict atau meng-encode ulang. Memory dibatasi dengan budget byte dan
+eviction LRU (lihat src/cache.py).
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastmcp.server.middleware import Middleware
+
+from access_log import annotate
+from cache import LRUCache
+
+# Fungsi kunci per tool: argumen call -> kunci cache, atau None bila call ini
+# tidak boleh di-cache (misalnya fetch dengan range)
+KeyFunction = Callable[[Dict[str, Any]], Optional[Hashable]]
+
+
+def result_size(result) -> int:
+    """
+    Approximate memory of a cached tool result in bytes.
+
+    The encoded text content is counted twice: the structured content holds
+    the same strings again.
+    """
+    size = 0
+    for block in result.content:
+        text = getattr(block, "text", None)
+        if text is not None:
+            size += len(text)
+    return 2 * size if result.structured_content is not None else size
+
+
+class ResponseCacheMiddleware(Middleware):
+    """
+    Answer repeated calls of immutable tools with the result built the first time.
+
+    Only tools listed in ``keys`` are cached, and only when their key function
+    returns a key for the call's arguments. A cached result is returned as is
+    (the tool, argument validation and result conversion are skipped). Entries
+    are tagged with ``version()`` (the corpus version), so a reload drops
+    them; failed calls are never cached.
+    """
+
+    def __init__(self, cache: LRUCache, keys: Dict[str, KeyFunction], version: Callable[[], int]) -> None:
+        self.cache = cache
+        self.keys = keys
+        self.version = version
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        key_function = self.keys.get(tool)
+        key = key_function(context.message.arguments or {}) if key_function else None
+        if key is None:
+            return await call_next(context)
+
+        key = (tool, key)
+        version = self.version()
+        cached = self.cache.get(key, version)
+        if cached is not None:
+            annotate(cached=True)
+            return cached
+        result = await call_next(context)
+        if not result.is_error:
+            self.cache.put(key, result, version, result_size(result))
+        return result
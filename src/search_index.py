@@ -0,0 +1,1132 @@
+"""
+Inverted index untuk tool 'search'
+Dibangun sekali saat startup dari document store, lalu dipakai untuk menjawab query
+tanpa scan linear ke seluruh dokumen.
+"""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from metadata_index import Filter, MetadataIndex, merge_facets
+from offload import check_cancelled
+from term_dictionary import TermDictionary, best_terms, max_edits
+from vector_index import HashingEmbedder, VectorIndex, np, top_k
+
+# Token = run karakter \w (huruf, angka, underscore), disimpan lowercase
+_TOKEN_RE = re.compile(r"\w+")
+# Run simbol = karakter selain \w dan spasi ("+", "->", "→"). Diindex sebagai term
+# tersendiri (tidak ikut panjang dokumen atau vector) supaya kata query tanpa
+# karakter \w tetap bisa dicocokkan sebagai substring, seperti scan lama
+_TERM_RE = re.compile(r"(\w+)|[^\w\s]+")
+
+# Parameter BM25 standar (Robertson/Sparck Jones)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Mode 'search': keyword (BM25), vector (cosine), hybrid (gabungan keduanya)
+SEARCH_MODES = ("keyword", "vector", "hybrid")
+# Bobot BM25 (sudah dinormalisasi ke 0..1) pada mode hybrid; sisanya bobot cosine
+HYBRID_ALPHA = 0.5
+# Kandidat per mode pada hybrid = (offset + limit) * faktor ini
+HYBRID_CANDIDATE_FACTOR = 4
+# Vector search terfilter: sampai sekian dokumen lolos filter, cosine dihitung
+# langsung untuk dokumen itu saja (exact) alih-alih scan seluruh segment lalu disaring
+FILTER_EXACT_VECTORS = 4096
+
+# Fragmen kata yang lebih pendek dari ini hanya dicocokkan sebagai term utuh atau
+# prefix: sebagai substring, "a" atau "ai" memuat hampir seluruh kosakata
+MIN_SUBSTRING_CHARS = 3
+# Batas ekspansi satu fragmen per segment: jumlah term dan total posting-nya
+# (term terpendek, yaitu bobot tertinggi, didahulukan)
+MAX_EXPANSION_TERMS = 64
+MAX_EXPANSION_POSTINGS = 100000
+
+# Panjang maksimum satu passage snippet (karakter teks asli)
+SNIPPET_CHARS = 200
+# Batas kerja pemilihan snippet per hasil: jumlah term dan posisi per term
+MAX_SNIPPET_TERMS = 16
+MAX_SNIPPET_POSITIONS = 32
+
+
+class Passage(NamedTuple):
+    """Snippet window of a document text, as UTF-8 byte offsets."""
+    start: int
+    end: int
+    is_first: bool
+    is_last: bool
+
+
+class SearchHit(NamedTuple):
+    """One ranked search result."""
+    doc_id: str
+    score: float
+    passage: Optional[Passage]
+
+
+class CorpusStats(NamedTuple):
+    """
+    Corpus-wide BM25 statistics for the terms of one query.
+
+    When the corpus is split into shards, every shard scores with the same
+    merged statistics, so scores are comparable across shards and identical
+    to scoring the whole corpus in one index.
+
+    ``fuzzy`` holds the fuzzy expansions (term -> weight) of query fragments
+    that no indexed term contains; after merging, a fragment is only fuzzy
+    when no shard contains it.
+    """
+    dfs: Dict[str, int]
+    n_docs: int
+    total_length: int
+    fuzzy: Dict[str, Dict[str, float]]
+
+
+def merge_stats(parts: Iterable[CorpusStats]) -> CorpusStats:
+    """Sum the statistics of several shards."""
+    dfs: Dict[str, int] = {}
+    n_docs = 0
+    total_length = 0
+    fuzzy: Optional[Dict[str, Dict[str, float]]] = None
+    for part in parts:
+        for term, df in part.dfs.items():
+            dfs[term] = dfs.get(term, 0) + df
+        n_docs += part.n_docs
+        total_length += part.total_length
+        if fuzzy is None:
+            fuzzy = {fragment: dict(terms) for fragment, terms in part.fuzzy.items()}
+        else:
+            # Fragmen yang ditemukan persis di salah satu shard tidak di-fuzzy di mana pun
+            fuzzy = {fragment: dict(terms, **part.fuzzy[fragment]) for fragment, terms in fuzzy.items() if fragment in part.fuzzy}
+    return CorpusStats(dfs, n_docs, total_length, fuzzy or {})
+
+
+def fuse_hybrid(components: Dict[Any, Tuple[float, float]]) -> Dict[Any, float]:
+    """
+    Combine (BM25, cosine) pairs into hybrid scores.
+
+    BM25 is divided by the best BM25 score among the candidates so both
+    signals lie in 0..1, then combined as
+    ``HYBRID_ALPHA * bm25 + (1 - HYBRID_ALPHA) * cosine``.
+    """
+    best_keyword = max((keyword for keyword, _ in components.values()), default=0.0)
+    if best_keyword <= 0:
+        best_keyword = 1.0
+    return {
+        key: HYBRID_ALPHA * keyword / best_keyword + (1.0 - HYBRID_ALPHA) * cosine
+        for key, (keyword, cosine) in components.items()
+    }
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text: Raw text (title or body)
+
+    Returns:
+        List of lowercase tokens in document order
+    """
+    return [token.lower() for token in _TOKEN_RE.findall(text)]
+
+
+def query_fragments(word: str) -> List[str]:
+    """
+    Fragments of one lowercase query word that are looked up in the vocabulary.
+
+    The word's runs of word characters, or the whole word when it has none
+    (e.g. "+" or "->"), which then matches indexed symbol runs.
+    """
+    return _TOKEN_RE.findall(word) or [word]
+
+
+def _scan_text(text: str, first_position: int) -> Tuple[List[str], "array", List[Tuple[str, int]]]:
+    """
+    Tokenize a document text and cut it into snippet passages.
+
+    A passage is a run of whole tokens spanning at most ``SNIPPET_CHARS``
+    characters. Passages are returned as flat (start byte, end byte, first token
+    position) triples so snippet text can be sliced from the UTF-8 encoded
+    document without decoding anything else. Symbol runs between tokens are
+    returned separately, each with the position of the token that follows it.
+
+    Args:
+        text: Document text
+        first_position: Position of the first text token (after the title)
+
+    Returns:
+        (lowercase tokens, passage triples, lowercase symbol runs with positions)
+    """
+    tokens: List[str] = []
+    symbols: List[Tuple[str, int]] = []
+    passages = array("I")
+    char_pos = byte_pos = 0
+
+    def to_bytes(char_offset: int) -> int:
+        nonlocal char_pos, byte_pos
+        byte_pos += len(text[char_pos:char_offset].encode("utf-8"))
+        char_pos = char_offset
+        return byte_pos
+
+    passage_start = passage_end = passage_token = -1
+    for match in _TERM_RE.finditer(text):
+        if match.group(1) is None:
+            symbols.append((match.group().lower(), first_position + len(tokens)))
+            continue
+        start, end = match.span()
+        if passage_start < 0:
+            passage_start, passage_token = start, len(tokens)
+        elif end - passage_start > SNIPPET_CHARS:
+            passages.extend((to_bytes(passage_start), to_bytes(passage_end), first_position + passage_token))
+            passage_start, passage_token = start, len(tokens)
+        passage_end = end
+        tokens.append(match.group().lower())
+    if passage_start >= 0:
+        passages.extend((to_bytes(passage_start), to_bytes(passage_end), first_position + passage_token))
+    return tokens, passages, symbols
+
+
+def _passage_of(passages: "array", n_passages: int, position: int) -> int:
+    """Binary search the passage containing a token position (-1 = title)."""
+    lo, hi = 0, n_passages
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if passages[3 * mid + 2] <= position:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo - 1
+
+
+class InvertedIndex:
+    """
+    Token -> posting list index over the document store.
+
+    Each posting list maps a document ordinal (insertion order in the store) to
+    the token positions of that term inside the document. Title and text are
+    indexed as one position stream, title first.
+
+    Matching semantics follow the old linear scan in ``search``: a document
+    matches when any whitespace-separated query word occurs as a substring of its
+    lowercase title or text. Substring matching is answered from a vocabulary
+    blob, so a query word like "calc" still finds "calculator". Runs of symbol
+    characters ("+", "->", "→") are indexed as terms of their own, outside
+    the document length and vectors, so a query word with no word characters
+    matches exactly the documents the old scan found.
+
+    Documented differences from the old scan:
+
+    - A query word mixing both (e.g. "server.py") matches documents that
+      contain all of its word fragments, not only the exact character
+      sequence. This is a superset of the old result.
+    - A word fragment shorter than ``MIN_SUBSTRING_CHARS`` matches whole
+      terms and term prefixes only ("ai" finds "aim", not "said").
+    - One fragment expands to at most ``MAX_EXPANSION_TERMS`` terms with
+      at most ``MAX_EXPANSION_POSTINGS`` postings together, the exact term
+      and then the shortest terms first. A fragment contained in very many
+      terms therefore matches only the best of them, so query cost stays
+      bounded for any input.
+
+    For fragments of ``MIN_SUBSTRING_CHARS`` or more characters whose
+    expansion stays under both caps, the result is a superset of the old
+    scan.
+
+    Query fragments that no indexed term contains can instead be matched to
+    near terms (typos) from the segment's ``TermDictionary``; which
+    expansions apply is decided for the whole index by ``SearchIndex`` and
+    passed in, so every segment and shard expands a fragment the same way.
+
+    Matches are ranked with BM25 over the precomputed document frequencies
+    (posting list sizes) and document lengths. A term reached through substring
+    expansion contributes in proportion to how much of it the fragment covers,
+    so an exact token match always outweighs a partial one.
+
+    For snippets, each document's text is cut into passages at index time.
+    Their byte offsets and first token positions are kept, so a query-aware
+    snippet is picked from the term positions without reading the full text.
+
+    With an ``embedder`` the segment also keeps a ``VectorIndex`` of document
+    embeddings, computed from the same token stream during indexing.
+
+    Document metadata goes into a ``MetadataIndex`` for filters and facets.
+    A filtered query passes the allowed ordinals down, so matching and
+    scoring probe only those documents when that is cheaper than walking
+    whole posting lists.
+
+    An ``InvertedIndex`` is one segment of a ``SearchIndex`` and is not
+    modified after ``finalize``.
+    """
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None) -> None:
+        self.embedder = embedder
+        self.vectors: Optional[VectorIndex] = None
+        self._pending_vectors: List["np.ndarray"] = []
+        self.doc_ids: List[str] = []
+        self.doc_ords: Dict[str, int] = {}
+        self.doc_lengths: List[int] = []
+        self.passages: List["array"] = []
+        self.total_length = 0
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self._vocab_blob = ""
+        self._vocab_terms: List[str] = []
+        self._vocab_starts: List[int] = []
+        self._dictionary: Optional[TermDictionary] = None
+        self.metadata = MetadataIndex()
+
+    @classmethod
+    def build(
+        cls,
+        documents: Iterable[Dict[str, Any]],
+        embedder: Optional[HashingEmbedder] = None
+    ) -> "InvertedIndex":
+        """
+        Build an index from an iterable of documents.
+
+        Args:
+            documents: Documents with at least 'id', 'title' and 'text' keys
+            embedder: Also build document vectors with this embedder
+
+        Returns:
+            Finalized index ready for queries
+        """
+        index = cls(embedder)
+        for doc in documents:
+            index.add_document(doc)
+        index.finalize()
+        return index
+
+    def add_document(self, doc: Dict[str, Any]) -> int:
+        """
+        Add one document to the posting lists.
+
+        Args:
+            doc: Document with 'id', 'title' and 'text'
+
+        Returns:
+            Ordinal assigned to the document
+        """
+        doc_ord = len(self.doc_ids)
+        self.doc_ids.append(doc["id"])
+        self.doc_ords[doc["id"]] = doc_ord
+
+        title_tokens, _, title_symbols = _scan_text(doc["title"], 0)
+        text_tokens, passages, text_symbols = _scan_text(doc["text"], len(title_tokens))
+        tokens = title_tokens + text_tokens
+        self.passages.append(passages)
+        self.metadata.add(doc_ord, doc.get("metadata"))
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        for position, token in enumerate(tokens):
+            self.postings.setdefault(token, {}).setdefault(doc_ord, []).append(position)
+        for symbol, position in title_symbols + text_symbols:
+            self.postings.setdefault(symbol, {}).setdefault(doc_ord, []).append(position)
+        if self.embedder is not None:
+            self._pending_vectors.append(self.embedder.embed_tokens(tokens))
+        return doc_ord
+
+    def finalize(self) -> None:
+        """Rebuild the vocabulary blob and vector index after adding documents."""
+        if self.embedder is not None:
+            self.vectors = VectorIndex.build(self._pending_vectors, self.embedder.dim)
+            self._pending_vectors = []
+        self.metadata.finalize(len(self.doc_ids))
+
+        self._vocab_terms = sorted(self.postings)
+        self._vocab_starts = []
+        offset = 0
+        for term in self._vocab_terms:
+            self._vocab_starts.append(offset)
+            offset += len(term) + 1
+        # Pemisah "\n" tidak pernah muncul di dalam token, jadi satu hasil find()
+        # selalu berada di dalam satu term
+        self._vocab_blob = "\n".join(self._vocab_terms)
+        # Dibangun di sini, bukan saat query fuzzy pertama: tidak ada lonjakan
+        # latency dan tidak ada dua thread yang membangunnya bersamaan
+        self._dictionary = TermDictionary(self._vocab_terms)
+
+    def expand(self, fragment: str) -> List[str]:
+        """
+        Find the indexed terms a query fragment matches.
+
+        Word fragments shorter than ``MIN_SUBSTRING_CHARS`` match terms they
+        start with, longer fragments and symbol runs terms that contain
+        them. At most ``MAX_EXPANSION_TERMS`` terms, with at most
+        ``MAX_EXPANSION_POSTINGS`` postings together, are returned: the
+        exact term first, then the shortest (highest weighted) terms.
+
+        Args:
+            fragment: Lowercase word fragment
+
+        Returns:
+            Matching terms, best first
+        """
+        if len(fragment) < MIN_SUBSTRING_CHARS and _TOKEN_RE.match(fragment):
+            terms = self._prefix_terms(fragment)
+        else:
+            terms = self._substring_terms(fragment)
+        if len(terms) > MAX_EXPANSION_TERMS:
+            terms = heapq.nsmallest(MAX_EXPANSION_TERMS, terms, key=lambda term: (len(term), term))
+        else:
+            terms.sort(key=lambda term: (len(term), term))
+        kept: List[str] = []
+        postings = 0
+        for term in terms:
+            postings += self.df(term)
+            if kept and postings > MAX_EXPANSION_POSTINGS:
+                break
+            kept.append(term)
+        return kept
+
+    def _prefix_terms(self, fragment: str) -> List[str]:
+        """Every indexed term starting with ``fragment``."""
+        vocab = self._vocab_terms
+        terms = []
+        for i in range(bisect_left(vocab, fragment), len(vocab)):
+            if not vocab[i].startswith(fragment):
+                break
+            terms.append(vocab[i])
+        return terms
+
+    def _substring_terms(self, fragment: str) -> List[str]:
+        """Every indexed term containing ``fragment``, in sorted order."""
+        blob = self._vocab_blob
+        starts = self._vocab_starts
+        terms = []
+        pos = blob.find(fragment)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            terms.append(self._vocab_terms[i])
+            if i + 1 >= len(starts):
+                break
+            # Lompat ke term berikutnya supaya term yang sama tidak dihitung dua kali
+            pos = blob.find(fragment, starts[i + 1])
+        return terms
+
+    def has_fragment(self, fragment: str) -> bool:
+        """Whether any indexed term contains ``fragment`` (i.e. ``expand`` finds something)."""
+        return fragment in self._vocab_blob
+
+    def fuzzy_expand(self, fragment: str) -> Dict[str, float]:
+        """
+        Find indexed terms whose prefix is within a few edits of ``fragment``.
+
+        Args:
+            fragment: Lowercase word fragment
+
+        Returns:
+            Mapping of the best matching terms to their expansion weight
+        """
+        return self._dictionary.lookup(fragment, max_edits(fragment))
+
+    def df(self, term: str) -> int:
+        """Number of documents of this segment containing the term (deleted ones included)."""
+        return len(self.postings.get(term, ()))
+
+    def _docs_containing(self, terms: List[str], restrict: Optional[Set[int]] = None) -> Set[int]:
+        if restrict is not None and len(restrict) * len(terms) < sum(self.df(term) for term in terms):
+            # Filter selektif: cek dokumen yang lolos filter satu per satu,
+            # lebih murah daripada menggabungkan seluruh posting list
+            postings = [self.postings[term] for term in terms]
+            return {doc_ord for doc_ord in restrict if any(doc_ord in p for p in postings)}
+        docs: Set[int] = set()
+        for term in terms:
+            docs.update(self.postings[term])
+        return docs if restrict is None else docs & restrict
+
+    def _match_terms(
+        self,
+        query: str,
+        restrict: Optional[Set[int]] = None,
+        fuzzy_terms: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Tuple[Set[int], Dict[str, float]]:
+        """Resolve query words to matching documents (within ``restrict``) and weighted index terms."""
+        matched: Set[int] = set()
+        term_weights: Dict[str, float] = {}
+        for word in query.lower().split():
+            candidates: Optional[Set[int]] = None
+            word_terms: Dict[str, float] = {}
+            for fragment in query_fragments(word):
+                fuzzy = fuzzy_terms.get(fragment) if fuzzy_terms else None
+                if fuzzy is None:
+                    weights = {term: len(fragment) / len(term) for term in self.expand(fragment)}
+                else:
+                    # Tidak ada term yang memuat fragmen ini: pakai ekspansi fuzzy yang ada di segment ini
+                    weights = {term: weight for term, weight in fuzzy.items() if term in self.postings}
+                docs = self._docs_containing(list(weights), restrict)
+                candidates = docs if candidates is None else candidates & docs
+                if not candidates:
+                    break
+                for term, weight in weights.items():
+                    if weight > word_terms.get(term, 0.0):
+                        word_terms[term] = weight
+            if candidates:
+                matched |= candidates
+                for term, weight in word_terms.items():
+                    if weight > term_weights.get(term, 0.0):
+                        term_weights[term] = weight
+        return matched, term_weights
+
+    def match(self, query: str) -> List[int]:
+        """
+        Return ordinals of documents matching any word of the query.
+
+        Args:
+            query: Raw query string
+
+        Returns:
+            Matching document ordinals in store order
+        """
+        matched, _ = self._match_terms(query)
+        return sorted(matched)
+
+    def score_matches(
+        self,
+        matched: Set[int],
+        term_weights: Dict[str, float],
+        idfs: Dict[str, float],
+        avgdl: float
+    ) -> Dict[int, float]:
+        """
+        Compute BM25 scores for already matched documents of this segment.
+
+        Args:
+            matched: Matching document ordinals
+            term_weights: Expansion weight per index term
+            idfs: Inverse document frequency per index term (corpus-wide)
+            avgdl: Average document length (corpus-wide)
+
+        Returns:
+            Mapping of document ordinal to BM25 score
+        """
+        scores = dict.fromkeys(matched, 0.0)
+        for term, weight in term_weights.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            # Term umum bisa punya ratusan ribu posting: titik pembatalan per term
+            check_cancelled()
+            idf = idfs[term] * weight
+            if len(scores) < len(postings):
+                # Lebih sedikit kandidat daripada posting (mis. query terfilter)
+                entries = [(doc_ord, postings[doc_ord]) for doc_ord in scores if doc_ord in postings]
+            else:
+                entries = postings.items()
+            for doc_ord, positions in entries:
+                if doc_ord not in scores:
+                    continue
+                tf = len(positions)
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_lengths[doc_ord] / avgdl)
+                scores[doc_ord] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+
+    def best_passage(self, doc_ord: int, term_weights: Dict[str, float]) -> Optional[Passage]:
+        """
+        Pick the passage that best covers the query terms.
+
+        Each term adds its weight once to every passage it occurs in. Work is
+        capped at ``MAX_SNIPPET_TERMS`` terms and ``MAX_SNIPPET_POSITIONS``
+        positions per term, so it does not depend on document length.
+
+        Args:
+            doc_ord: Document ordinal in this segment
+            term_weights: Weight per query term (higher = more important)
+
+        Returns:
+            Best passage (the first one when no term occurs in the text), or
+            None for a document without text tokens
+        """
+        passages = self.passages[doc_ord]
+        n_passages = len(passages) // 3
+        if not n_passages:
+            return None
+
+        passage_scores: Dict[int, float] = {}
+        terms = heapq.nlargest(MAX_SNIPPET_TERMS, term_weights.items(), key=lambda item: item[1])
+        for term, weight in terms:
+            positions = self.postings.get(term, {}).get(doc_ord)
+            if not positions:
+                continue
+            seen = set()
+            for position in positions[:MAX_SNIPPET_POSITIONS]:
+                i = _passage_of(passages, n_passages, position)
+                if i >= 0 and i not in seen:
+                    seen.add(i)
+                    passage_scores[i] = passage_scores.get(i, 0.0) + weight
+
+        best = min(passage_scores, key=lambda i: (-passage_scores[i], i)) if passage_scores else 0
+        return Passage(passages[3 * best], passages[3 * best + 1], best == 0, best == n_passages - 1)
+
+    @classmethod
+    def merge(
+        cls,
+        parts: Iterable[Tuple["InvertedIndex", FrozenSet[int]]],
+        embedder: Optional[HashingEmbedder] = None
+    ) -> "InvertedIndex":
+        """
+        Merge segments into one, dropping deleted documents.
+
+        Posting lists are remapped to new ordinals directly and document vectors
+        are copied, so no document text is re-read or re-tokenized.
+
+        Args:
+            parts: (segment, deleted ordinals) pairs in corpus order
+            embedder: Embedder of the segments, if they carry vectors
+
+        Returns:
+            Finalized merged segment
+        """
+        merged = cls(embedder)
+        metadata_parts = []
+        for segment, deleted in parts:
+            remap: Dict[int, int] = {}
+            for doc_ord, doc_id in enumerate(segment.doc_ids):
+                if doc_ord in deleted:
+                    continue
+                remap[doc_ord] = len(merged.doc_ids)
+                merged.doc_ords[doc_id] = len(merged.doc_ids)
+                merged.doc_ids.append(doc_id)
+                merged.doc_lengths.append(segment.doc_lengths[doc_ord])
+                merged.passages.append(segment.passages[doc_ord])
+                merged.total_length += segment.doc_lengths[doc_ord]
+            metadata_parts.append((segment.metadata, remap))
+            if embedder is not None and segment.vectors is not None and remap:
+                live = np.fromiter(remap, dtype=np.int64, count=len(remap))
+                merged._pending_vectors.append(segment.vectors.rows_for(live))
+            for term, postings in segment.postings.items():
+                target = None
+                for doc_ord, positions in postings.items():
+                    if doc_ord in remap:
+                        if target is None:
+                            target = merged.postings.setdefault(term, {})
+                        target[remap[doc_ord]] = positions
+        merged.finalize()
+        merged.metadata = MetadataIndex.merge(metadata_parts, len(merged.doc_ids))
+        return merged
+
+
+class SearchIndex:
+    """
+    Immutable, segmented view of the corpus index.
+
+    The index is a tuple of ``InvertedIndex`` segments plus a set of deleted
+    ordinals per segment. Changes never mutate a published index: ``apply``
+    builds a small new segment for added or updated documents, marks their old
+    versions as deleted and returns a new ``SearchIndex``. Readers holding the
+    previous object keep a consistent snapshot, so swapping the reference is
+    enough to publish an update without locks on the read path.
+
+    When more than ``MAX_SEGMENTS`` segments accumulate, every segment after
+    the first (the startup index) is merged into one. BM25 statistics count
+    deleted documents until their segment is merged, the same trade-off
+    Lucene makes.
+
+    With an ``embedder``, every segment also carries document vectors and the
+    "vector" and "hybrid" search modes become available.
+
+    Typo tolerance: a query fragment of four or more characters that no
+    indexed term contains (so it would match nothing) is expanded to the
+    best ``MAX_FUZZY_TERMS`` terms whose prefix is within one edit (two from
+    eight characters) of it, weighted below any exact match. Fragments that
+    do occur are never expanded, so exact queries cost the same as before.
+    """
+
+    MAX_SEGMENTS = 8
+    # Jumlah cluster IVF terdekat yang di-scan per query
+    VECTOR_NPROBE = 8
+
+    def __init__(
+        self,
+        segments: Tuple[InvertedIndex, ...],
+        deleted: Optional[Tuple[FrozenSet[int], ...]] = None,
+        embedder: Optional[HashingEmbedder] = None
+    ) -> None:
+        self.segments = segments
+        self.deleted = deleted if deleted is not None else tuple(frozenset() for _ in segments)
+        self.embedder = embedder
+        self.n_docs = sum(len(segment.doc_ids) for segment in segments)
+        self.total_length = sum(segment.total_length for segment in segments)
+        self._deleted_arrays: Dict[int, "np.ndarray"] = {}
+
+    @classmethod
+    def build(
+        cls,
+        documents: Iterable[Dict[str, Any]],
+        embedder: Optional[HashingEmbedder] = None
+    ) -> "SearchIndex":
+        """
+        Build a single-segment index from an iterable of documents.
+
+        Args:
+            documents: Documents with at least 'id', 'title' and 'text' keys
+            embedder: Also build document vectors for vector/hybrid search
+
+        Returns:
+            Index ready for queries
+        """
+        return cls((InvertedIndex.build(documents, embedder),), embedder=embedder)
+
+    def __len__(self) -> int:
+        return self.n_docs - sum(len(deleted) for deleted in self.deleted)
+
+    def _locate(self, doc_id: str) -> Optional[Tuple[int, int]]:
+        """Find the live (segment, ordinal) of a document, newest segment first."""
+        for seg_no in range(len(self.segments) - 1, -1, -1):
+            doc_ord = self.segments[seg_no].doc_ords.get(doc_id)
+            if doc_ord is not None and doc_ord not in self.deleted[seg_no]:
+                return seg_no, doc_ord
+        return None
+
+    def apply(self, upserts: List[Dict[str, Any]], deletes: Iterable[str]) -> "SearchIndex":
+        """
+        Return a new index with documents added, replaced or removed.
+
+        Args:
+            upserts: New or changed documents
+            deletes: IDs of removed documents
+
+        Returns:
+            New ``SearchIndex``; this one is left untouched
+        """
+        deleted = [set(d) for d in self.deleted]
+        for doc_id in [doc["id"] for doc in upserts] + list(deletes):
+            location = self._locate(doc_id)
+            if location is not None:
+                deleted[location[0]].add(location[1])
+
+        segments = self.segments
+        if upserts:
+            segments = segments + (InvertedIndex.build(upserts, self.embedder),)
+            deleted.append(set())
+
+        if len(segments) > self.MAX_SEGMENTS:
+            tail = InvertedIndex.merge(
+                ((segment, frozenset(dead)) for segment, dead in zip(segments[1:], deleted[1:])),
+                self.embedder
+            )
+            segments = (segments[0], tail)
+            deleted = [deleted[0], set()]
+
+        return SearchIndex(segments, tuple(frozenset(d) for d in deleted), self.embedder)
+
+    def idf(self, term: str, corpus_stats: Optional[CorpusStats] = None) -> float:
+        """BM25 inverse document frequency of a term across all segments (or shards)."""
+        if corpus_stats is None:
+            df = sum(segment.df(term) for segment in self.segments)
+            n_docs = self.n_docs
+        else:
+            df = corpus_stats.dfs.get(term, 0)
+            n_docs = corpus_stats.n_docs
+        return math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def term_stats(self, query: str, fuzzy: bool = True) -> CorpusStats:
+        """
+        BM25 statistics of every term the query can match in this index.
+
+        Args:
+            query: Raw query string
+            fuzzy: Also collect fuzzy expansions of fragments this index
+                does not contain
+
+        Returns:
+            Document frequencies of the expanded query terms, plus document
+            count, total length and fuzzy expansions, ready for ``merge_stats``
+        """
+        terms: Set[str] = set()
+        for word in query.lower().split():
+            for fragment in query_fragments(word):
+                for segment in self.segments:
+                    terms.update(segment.expand(fragment))
+        expansions = self._fuzzy_candidates(query) if fuzzy else {}
+        for fuzzy_terms in expansions.values():
+            terms.update(fuzzy_terms)
+        dfs = {term: sum(segment.df(term) for segment in self.segments) for term in terms}
+        return CorpusStats(dfs, self.n_docs, self.total_length, expansions)
+
+    def _fuzzy_candidates(self, query: str) -> Dict[str, Dict[str, float]]:
+        """Best fuzzy expansions of the query fragments no segment contains."""
+        expansions: Dict[str, Dict[str, float]] = {}
+        for word in query.lower().split():
+            for fragment in _TOKEN_RE.findall(word):
+                if fragment in expansions or not max_edits(fragment):
+                    continue
+                if any(segment.has_fragment(fragment) for segment in self.segments):
+                    continue
+                found: Dict[str, float] = {}
+                for segment in self.segments:
+                    check_cancelled()
+                    found.update(segment.fuzzy_expand(fragment))
+                expansions[fragment] = best_terms(found)
+        return expansions
+
+    def _fuzzy_expansions(
+        self,
+        query: str,
+        corpus_stats: Optional[CorpusStats],
+        fuzzy: bool
+    ) -> Dict[str, Dict[str, float]]:
+        """Fuzzy expansions to match with: the merged ones of a sharded query, else this index's own."""
+        if corpus_stats is not None:
+            return {fragment: best_terms(terms) for fragment, terms in corpus_stats.fuzzy.items()}
+        return self._fuzzy_candidates(query) if fuzzy else {}
+
+    def _allowed(self, filter: Optional[Filter]) -> Optional[List[Set[int]]]:
+        """Live ordinals matching a filter, per segment (None = no filter)."""
+        if filter is None:
+            return None
+        allowed = []
+        for segment, deleted in zip(self.segments, self.deleted):
+            check_cancelled()
+            docs = segment.metadata.matching(filter)
+            allowed.append(docs - deleted if deleted else docs)
+        return allowed
+
+    def score(
+        self,
+        query: str,
+        corpus_stats: Optional[CorpusStats] = None,
+        filter: Optional[Filter] = None,
+        fuzzy: bool = True
+    ) -> Dict[Tuple[int, int], float]:
+        """
+        Compute BM25 scores for every live document matching the query.
+
+        Args:
+            query: Raw query string
+            corpus_stats: Global statistics to score with (sharded search);
+                default is this index's own statistics. Its fuzzy
+                expansions replace ``fuzzy``.
+            filter: Only score documents matching this metadata filter
+            fuzzy: Expand fragments that match nothing to near terms
+
+        Returns:
+            Mapping of (segment, ordinal) to BM25 score
+        """
+        return self._score(query, corpus_stats, self._allowed(filter), self._fuzzy_expansions(query, corpus_stats, fuzzy))
+
+    def _score(
+        self,
+        query: str,
+        corpus_stats: Optional[CorpusStats],
+        allowed: Optional[List[Set[int]]],
+        fuzzy_terms: Dict[str, Dict[str, float]]
+    ) -> Dict[Tuple[int, int], float]:
+        per_segment = []
+        idfs: Dict[str, float] = {}
+        for seg_no, (segment, deleted) in enumerate(zip(self.segments, self.deleted)):
+            check_cancelled()
+            restrict = allowed[seg_no] if allowed is not None else None
+            if restrict is not None and not restrict:
+                continue
+            matched, term_weights = segment._match_terms(query, restrict, fuzzy_terms)
+            matched -= deleted
+            if matched:
+                per_segment.append((seg_no, matched, term_weights))
+                for term in term_weights:
+                    if term not in idfs:
+                        idfs[term] = self.idf(term, corpus_stats)
+
+        n_docs, total_length = (corpus_stats.n_docs, corpus_stats.total_length) if corpus_stats else (self.n_docs, self.total_length)
+        avgdl = total_length / n_docs if n_docs else 0.0
+        scores: Dict[Tuple[int, int], float] = {}
+        for seg_no, matched, term_weights in per_segment:
+            segment = self.segments[seg_no]
+            for doc_ord, value in segment.score_matches(matched, term_weights, idfs, avgdl).items():
+                scores[(seg_no, doc_ord)] = value
+        return scores
+
+    def _live_vector_scores(self, seg_no: int, ords: "np.ndarray", sims: "np.ndarray"):
+        """Drop deleted documents from a segment's vector scores."""
+        deleted = self.deleted[seg_no]
+        if not deleted:
+            return ords, sims
+        dead = self._deleted_arrays.get(seg_no)
+        if dead is None:
+            dead = np.fromiter(deleted, dtype=np.int64, count=len(deleted))
+            self._deleted_arrays[seg_no] = dead
+        keep = ~np.isin(ords, dead)
+        return ords[keep], sims[keep]
+
+    def vector_scores(self, query: str, k: int, filter: Optional[Filter] = None) -> Dict[Tuple[int, int], float]:
+        """
+        Find the ``k`` documents most similar to the query embedding.
+
+        Each segment is scored with one matrix-vector product over its
+        contiguous float32 matrix (or over its nearest IVF clusters).
+
+        Args:
+            query: Raw query string
+            k: Number of documents to return
+            filter: Only consider documents matching this metadata filter
+
+        Returns:
+            Mapping of (segment, ordinal) to cosine similarity, only for
+            positive similarities
+
+        Raises:
+            ValueError: If the index was built without vectors
+        """
+        if self.embedder is None:
+            raise ValueError("Vector search is not enabled on this server")
+        return self._nearest(self.embedder.embed_tokens(tokenize(query)), k, self._allowed(filter))
+
+    def _nearest(
+        self,
+        query_vector: "np.ndarray",
+        k: int,
+        allowed: Optional[List[Set[int]]] = None
+    ) -> Dict[Tuple[int, int], float]:
+        candidates = []
+        for seg_no, segment in enumerate(self.segments):
+            if segment.vectors is None or not len(segment.vectors):
+                continue
+            check_cancelled()
+            restrict = allowed[seg_no] if allowed is not None else None
+            if restrict is not None and len(restrict) <= FILTER_EXACT_VECTORS:
+                # Filter selektif: cosine hanya untuk dokumen yang lolos (exact, tanpa IVF)
+                if not restrict:
+                    continue
+                ords = np.fromiter(restrict, dtype=np.int64, count=len(restrict))
+                sims = segment.vectors.rows_for(ords) @ query_vector
+            else:
+                ords, sims = segment.vectors.scores(query_vector, self.VECTOR_NPROBE)
+                ords, sims = self._live_vector_scores(seg_no, ords, sims)
+                if restrict is not None:
+                    keep = np.isin(ords, np.fromiter(restrict, dtype=np.int64, count=len(restrict)))
+                    ords, sims = ords[keep], sims[keep]
+            candidates.extend(
+                ((seg_no, doc_ord), sim) for doc_ord, sim in top_k(ords, sims, k) if sim > 0
+            )
+        return dict(heapq.nlargest(k, candidates, key=lambda item: item[1]))
+
+    def hybrid_components(
+        self,
+        query: str,
+        k: int,
+        corpus_stats: Optional[CorpusStats] = None,
+        filter: Optional[Filter] = None,
+        fuzzy: bool = True
+    ) -> Dict[Tuple[int, int], Tuple[float, float]]:
+        """
+        BM25 and cosine similarity of the best candidates of both signals.
+
+        The cosine of keyword candidates is computed exactly with one gathered
+        matrix product per segment.
+
+        Args:
+            query: Raw query string
+            k: Number of candidates taken from each signal
+            corpus_stats: Global BM25 statistics (sharded search)
+            filter: Only consider documents matching this metadata filter
+            fuzzy: Expand fragments that match nothing to near terms
+
+        Returns:
+            Mapping of (segment, ordinal) to (BM25 score, cosine similarity)
+        """
+        return self._hybrid_components(
+            query, k, corpus_stats, self._allowed(filter), self._fuzzy_expansions(query, corpus_stats, fuzzy)
+        )
+
+    def _hybrid_components(
+        self,
+        query: str,
+        k: int,
+        corpus_stats: Optional[CorpusStats],
+        allowed: Optional[List[Set[int]]],
+        fuzzy_terms: Dict[str, Dict[str, float]]
+    ) -> Dict[Tuple[int, int], Tuple[float, float]]:
+        query_vector = self.embedder.embed_tokens(tokenize(query))
+        keyword = self._score(query, corpus_stats, allowed, fuzzy_terms)
+        vector = self._nearest(query_vector, k, allowed)
+        top_keyword = heapq.nlargest(k, keyword.items(), key=lambda item: item[1])
+
+        by_segment: Dict[int, List[int]] = {}
+        for (seg_no, doc_ord), _ in top_keyword:
+            if (seg_no, doc_ord) not in vector:
+                by_segment.setdefault(seg_no, []).append(doc_ord)
+        for seg_no, ords in by_segment.items():
+            vectors = self.segments[seg_no].vectors
+            if vectors is None:
+                continue
+            sims = vectors.rows_for(np.array(ords, dtype=np.int64)) @ query_vector
+            for doc_ord, sim in zip(ords, sims):
+                vector[(seg_no, doc_ord)] = max(float(sim), 0.0)
+
+        return {
+            key: (keyword.get(key, 0.0), vector.get(key, 0.0))
+            for key in set(vector) | {key for key, _ in top_keyword}
+        }
+
+    def hybrid_scores(self, query: str, k: int) -> Dict[Tuple[int, int], float]:
+        """
+        Fuse BM25 and vector similarity for the best candidates of both.
+
+        See ``hybrid_components`` and ``fuse_hybrid``.
+
+        Args:
+            query: Raw query string
+            k: Number of candidates taken from each signal
+
+        Returns:
+            Mapping of (segment, ordinal) to fused score
+        """
+        return fuse_hybrid(self.hybrid_components(query, k))
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        mode: str = "keyword",
+        stats: Optional[Dict[str, Any]] = None,
+        corpus_stats: Optional[CorpusStats] = None,
+        filter: Optional[Filter] = None,
+        facets: Sequence[str] = (),
+        fuzzy: bool = True
+    ) -> List[SearchHit]:
+        """
+        Return one page of the best-scoring documents for a query.
+
+        Only ``offset + limit`` entries are kept in a heap, so the cost of picking
+        the page does not grow with a full sort of all matches. Each hit carries
+        the passage to show as its snippet.
+
+        Args:
+            query: Raw query string
+            limit: Maximum number of results to return
+            offset: Number of top results to skip
+            mode: "keyword" (BM25), "vector" (cosine) or "hybrid"
+            stats: If given, receives "candidates" (number of documents
+                scored) and, with ``facets``, "facets" ({field: {value: count}}
+                over those candidates)
+            corpus_stats: Global BM25 statistics when this index is one shard
+            filter: Only return documents matching this metadata filter
+            facets: Metadata fields to count over the candidates
+            fuzzy: Expand fragments that match nothing to near terms
+                (ignored with ``corpus_stats``, which carries its own)
+
+        Returns:
+            Search hits, best first. Ties keep corpus order.
+
+        Raises:
+            ValueError: If the mode is unknown, or needs vectors the index lacks
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Use: {', '.join(SEARCH_MODES)}")
+        # Dipakai untuk scoring dan juga untuk memilih passage snippet
+        fuzzy_terms = self._fuzzy_expansions(query, corpus_stats, fuzzy)
+        if mode == "keyword":
+            scores = self._score(query, corpus_stats, self._allowed(filter), fuzzy_terms)
+        elif mode == "vector":
+            scores = self.vector_scores(query, offset + limit, filter)
+        else:
+            if self.embedder is None:
+                raise ValueError("Vector search is not enabled on this server")
+            scores = fuse_hybrid(self._hybrid_components(
+                query, (offset + limit) * HYBRID_CANDIDATE_FACTOR, corpus_stats, self._allowed(filter), fuzzy_terms
+            ))
+        if stats is not None:
+            stats["candidates"] = len(scores)
+            if facets:
+                stats["facets"] = self.candidate_facets(scores, facets)
+
+        top = heapq.nlargest(
+            offset + limit,
+            scores.items(),
+            key=lambda item: (item[1], -item[0][0], -item[0][1]),
+        )
+        return self._hits(query, top[offset:], corpus_stats, fuzzy_terms)
+
+    def candidate_facets(self, keys: Iterable[Tuple[int, int]], fields: Sequence[str]) -> Dict[str, Dict[Any, int]]:
+        """
+        Count documents per metadata value.
+
+        Args:
+            keys: (segment, ordinal) of the documents to count
+            fields: Metadata fields to count
+
+        Returns:
+            {field: {value: count}}
+        """
+        by_segment: Dict[int, Set[int]] = {}
+        for seg_no, doc_ord in keys:
+            by_segment.setdefault(seg_no, set()).add(doc_ord)
+        counts = merge_facets(
+            self.segments[seg_no].metadata.facet_counts(docs, fields)
+            for seg_no, docs in by_segment.items()
+        )
+        return {field: counts.get(field, {}) for field in fields}
+
+    def facet_counts(self, fields: Sequence[str], filter: Optional[Filter] = None) -> Dict[str, Dict[Any, int]]:
+        """
+        Count all live documents (matching ``filter``) per metadata value.
+
+        Args:
+            fields: Metadata fields to count
+            filter: Only count documents matching this metadata filter
+
+        Returns:
+            {field: {value: count}}
+        """
+        allowed = self._allowed(filter)
+        parts = []
+        for seg_no, (segment, deleted) in enumerate(zip(self.segments, self.deleted)):
+            check_cancelled()
+            if allowed is not None:
+                docs = allowed[seg_no]
+            else:
+                docs = set(range(len(segment.doc_ids))) - deleted
+            parts.append(segment.metadata.facet_counts(docs, fields))
+        return merge_facets(parts)
+
+    def _hits(
+        self,
+        query: str,
+        scored: List[Tuple[Tuple[int, int], float]],
+        corpus_stats: Optional[CorpusStats] = None,
+        fuzzy_terms: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> List[SearchHit]:
+        """Turn ((segment, ordinal), score) pairs into hits with their best passage."""
+        hits = []
+        snippet_weights: Dict[int, Dict[str, float]] = {}
+        idfs: Dict[str, float] = {}
+        for (seg_no, doc_ord), value in scored:
+            check_cancelled()
+            segment = self.segments[seg_no]
+            weights = snippet_weights.get(seg_no)
+            if weights is None:
+                _, term_weights = segment._match_terms(query, None, fuzzy_terms)
+                for term in term_weights:
+                    if term not in idfs:
+                        idfs[term] = self.idf(term, corpus_stats)
+                weights = {term: w * idfs[term] for term, w in term_weights.items()}
+                snippet_weights[seg_no] = weights
+            hits.append(SearchHit(segment.doc_ids[doc_ord], value, segment.best_passage(doc_ord, weights)))
+        return hits
+
+    def hits_for(
+        self,
+        query: str,
+        scored: List[Tuple[str, float]],
+        corpus_stats: Optional[CorpusStats] = None
+    ) -> List[SearchHit]:
+        """
+        Build hits (with passages) for documents ranked elsewhere.
+
+        Args:
+            query: Raw query string
+            scored: (document ID, score) pairs; unknown IDs are skipped
+            corpus_stats: Global BM25 statistics (sharded search)
+
+        Returns:
+            Hits in the given order
+        """
+        located = []
+        for doc_id, value in scored:
+            location = self._locate(doc_id)
+            if location is not None:
+                located.append((location, value))
+        return self._hits(query, located, corpus_stats, self._fuzzy_expansions(query, corpus_stats, True))
@@ -3,15 +3,43 @@ MCP Server untuk ChatGPT Integration
 Mengimplementasikan tools 'search' dan 'fetch' sesuai spesifikasi OpenAI
 """
 
+import base64
 import json
 import logging
+import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from fastmcp import FastMCP
+import uvicorn
+from fastmcp import Context, FastMCP
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from access_log import AccessLog, AccessLogMiddleware, annotate, parse_rates, setup_logging
+from admission import AdmissionController, AdmissionMiddleware, StreamLimitMiddleware
+from cache import LRUCache
+from calculator import evaluate_batch
+from corpus import Corpus, CorpusWatcher, LiveCorpus
+from document_store import DocumentStore, InMemoryDocumentStore, SegmentDocumentStore
+from index_snapshot import load_or_build_index, map_index
+from metadata_index import Filter, parse_filter, top_facets
+from metrics import Metrics, MetricsMiddleware
+from offload import DeadlineMiddleware, SingleFlight, ToolExecutor, check_cancelled, parse_timeouts
+from response_cache import ResponseCacheMiddleware
+from search_index import SearchHit, SearchIndex
+from sharding import ShardedIndex
+from transport import build_app
+from vector_index import HashingEmbedder
+from workers import memory_usage, run_workers
+
+# Logging lewat antrean dan thread writer (lihat src/access_log.py): format
+# "json" (satu object per baris) atau "text", dan jumlah record yang ditampung
+# sebelum record baru dibuang
+LOG_LEVEL = os.getenv("MCP_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("MCP_LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("MCP_LOG_QUEUE_SIZE", "10000"))
+LOGGING = setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE)
 logger = logging.getLogger(__name__)
 
 # Inisialisasi MCP Server
@@ -28,6 +56,111 @@ mcp = FastMCP(
 HOST = "0.0.0.0"
 PORT = 6969
 
+# Transport MCP di PORT: "sse" (GET /sse + POST /messages/), "http" (streamable
+# HTTP di HTTP_PATH) atau "both". JSON_RESPONSE=1: POST streamable HTTP dijawab
+# dengan body JSON biasa alih-alih stream SSE (tanpa progress notification)
+TRANSPORT = os.getenv("MCP_TRANSPORT", "sse")
+HTTP_PATH = os.getenv("MCP_HTTP_PATH", "/mcp")
+HTTP_JSON_RESPONSE = os.getenv("MCP_HTTP_JSON_RESPONSE", "0") == "1"
+# Body respons HTTP sebesar ini atau lebih dikompres gzip/deflate bila client
+# mendukung (0 = nonaktif), dan berapa detik koneksi keep-alive idle dibiarkan
+# terbuka (di atas idle timeout load balancer yang umum, 60 detik)
+COMPRESS_MIN_BYTES = int(os.getenv("MCP_COMPRESS_MIN_BYTES", "1024"))
+KEEP_ALIVE_TIMEOUT = int(os.getenv("MCP_KEEP_ALIVE_TIMEOUT", "75"))
+
+# Tool yang didaftarkan server ini. Metrics dan access log hanya membuat state per
+# tool untuk nama-nama ini; nama lain dari client dihitung sebagai "unknown"
+TOOL_NAMES = ("search", "fetch", "fetch_many", "hello", "calculate", "calculate_batch", "get_time", "server_info")
+
+# Batas jumlah hasil 'search' per halaman
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+# Jumlah maksimum field facet per 'search'
+MAX_FACET_FIELDS = 10
+
+# Batas 'fetch': teks lebih besar dari ini dikirim per bagian (dengan next_cursor),
+# dan ukuran chunk saat streaming lewat progress notification
+FETCH_MAX_BYTES = int(os.getenv("MCP_FETCH_MAX_BYTES", "1000000"))
+FETCH_CHUNK_BYTES = 65536
+
+# Batas 'fetch_many': jumlah ID per panggilan dan total byte teks per respons
+MAX_FETCH_MANY_IDS = 100
+FETCH_MANY_MAX_BYTES = int(os.getenv("MCP_FETCH_MANY_MAX_BYTES", "2000000"))
+
+# Batas 'calculate_batch': jumlah pasangan operand per panggilan
+MAX_CALCULATE_BATCH = 10000
+
+# Path file segment dokumen (lihat src/document_store.py). Kosong = pakai DOCUMENTS
+CORPUS_SEGMENT = os.getenv("MCP_CORPUS_SEGMENT", "")
+# Jumlah blok teks terdekompresi yang di-cache (segment terkompresi saja)
+TEXT_BLOCK_CACHE = int(os.getenv("MCP_TEXT_BLOCK_CACHE", "256"))
+
+# Direktori corpus (.json/.jsonl) yang dipantau untuk hot reload. Kosong = nonaktif
+CORPUS_DIR = os.getenv("MCP_CORPUS_DIR", "")
+CORPUS_RELOAD_INTERVAL = float(os.getenv("MCP_CORPUS_RELOAD_INTERVAL", "2.0"))
+
+# Snapshot index (lihat src/index_snapshot.py): dimuat saat startup, atau dibangun
+# ulang dan ditulis kembali bila belum ada/kedaluwarsa. Kosong = selalu build.
+# VERIFY=1 memeriksa checksum semua section (membaca seluruh file sekali)
+INDEX_SNAPSHOT = os.getenv("MCP_INDEX_SNAPSHOT", "")
+INDEX_SNAPSHOT_VERIFY = os.getenv("MCP_INDEX_SNAPSHOT_VERIFY", "1") == "1"
+
+# Vector search (mode "vector"/"hybrid" di tool 'search'), butuh numpy
+VECTOR_SEARCH = os.getenv("MCP_VECTOR_SEARCH", "0") == "1"
+VECTOR_DIM = int(os.getenv("MCP_VECTOR_DIM", "256"))
+
+# Metrics per tool di /metrics (format Prometheus). 0 = nonaktif
+METRICS_ENABLED = os.getenv("MCP_METRICS", "1") == "1"
+
+# Jumlah worker process. 1 = single process seperti biasa; >1 = parent menjadi
+# proxy di PORT dan worker mendengarkan di 127.0.0.1:MCP_WORKER_BASE_PORT + i
+WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+WORKER_BASE_PORT = int(os.getenv("MCP_WORKER_BASE_PORT", str(PORT + 1)))
+
+# Sharded search: index dibagi ke N process shard (0/1 = satu index in-process),
+# dengan batas waktu per shard dalam detik sebelum hasil parsial dikembalikan
+SEARCH_SHARDS = int(os.getenv("MCP_SEARCH_SHARDS", "0"))
+SHARD_TIMEOUT = float(os.getenv("MCP_SHARD_TIMEOUT", "2.0"))
+
+# Tool yang bagian CPU-nya dijalankan di thread pool (dipisah koma; kosong = semua
+# inline di event loop), jumlah thread, dan batas waktu per tool dalam detik untuk
+# semua tool (contoh "search=5,fetch_many=10"; 0 = tanpa batas)
+OFFLOAD_TOOLS = [t.strip() for t in os.getenv("MCP_OFFLOAD_TOOLS", "search,fetch,fetch_many").split(",") if t.strip()]
+OFFLOAD_THREADS = int(os.getenv("MCP_OFFLOAD_THREADS", str(min(4, os.cpu_count() or 1))))
+TOOL_TIMEOUTS = parse_timeouts(os.getenv("MCP_TOOL_TIMEOUTS", ""))
+TOOL_TIMEOUT = float(os.getenv("MCP_TOOL_TIMEOUT", "30"))
+
+# Admission control tools/call (per worker): call berjalan global dan per session,
+# panjang antrean dan batas waktu tunggunya (detik), laju per session (call/detik,
+# 0 = tanpa batas; burst 0 = sama dengan laju), dan jumlah stream MCP (0 = tanpa batas)
+MAX_CONCURRENT_CALLS = int(os.getenv("MCP_MAX_CONCURRENT_CALLS", "64"))
+MAX_SESSION_CALLS = int(os.getenv("MCP_MAX_SESSION_CALLS", "16"))
+MAX_QUEUED_CALLS = int(os.getenv("MCP_MAX_QUEUED_CALLS", "256"))
+MAX_SESSION_QUEUED = int(os.getenv("MCP_MAX_SESSION_QUEUED", "64"))
+QUEUE_TIMEOUT = float(os.getenv("MCP_QUEUE_TIMEOUT", "5"))
+SESSION_RATE = float(os.getenv("MCP_SESSION_RATE", "0"))
+SESSION_BURST = float(os.getenv("MCP_SESSION_BURST", "0"))
+MAX_SESSIONS = int(os.getenv("MCP_MAX_SESSIONS", "0"))
+
+# Access log tools/call: 0 = nonaktif. Sampling per tool (peluang 0-1) dan batas
+# laju per tool (record/detik, 0 = tanpa batas), contoh "search=0.1,*=1" dan
+# "search=50"; "*" = default tool lain. Call error atau lebih lambat dari
+# SLOW_MS selalu dicatat. Access log uvicorn per HTTP request default nonaktif
+ACCESS_LOG_ENABLED = os.getenv("MCP_ACCESS_LOG", "1") == "1"
+ACCESS_LOG_SAMPLE = parse_rates(os.getenv("MCP_ACCESS_LOG_SAMPLE", ""), maximum=1.0)
+ACCESS_LOG_RATE = parse_rates(os.getenv("MCP_ACCESS_LOG_RATE", ""))
+ACCESS_LOG_SLOW_MS = float(os.getenv("MCP_ACCESS_LOG_SLOW_MS", "1000"))
+UVICORN_ACCESS_LOG = os.getenv("MCP_UVICORN_ACCESS_LOG", "0") == "1"
+
+# Cache hasil 'search' (LRU). Ukuran 0 = nonaktif, TTL 0 = tanpa kedaluwarsa
+SEARCH_CACHE_SIZE = int(os.getenv("MCP_SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_TTL = float(os.getenv("MCP_SEARCH_CACHE_TTL", "0"))
+
+# Cache respons 'fetch' (dokumen utuh) dan 'server_info' yang sudah ter-encode:
+# budget memory dalam byte (0 = nonaktif) dan jumlah entry maksimum
+RESPONSE_CACHE_BYTES = int(os.getenv("MCP_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_SIZE = int(os.getenv("MCP_RESPONSE_CACHE_SIZE", "10000"))
+
 # ============================================================================
 # Sample Data Store (simulasi database/knowledge base)
 # Ganti dengan data source Anda sendiri (database, API, vector store, dll)
@@ -119,96 +252,592 @@ DOCUMENTS = {
 }
 
 
+def open_document_store() -> DocumentStore:
+    """Open the configured document store (segment file or sample DOCUMENTS)."""
+    if CORPUS_SEGMENT:
+        logger.info("Using document segment: %s", CORPUS_SEGMENT)
+        return SegmentDocumentStore(CORPUS_SEGMENT, TEXT_BLOCK_CACHE)
+    return InMemoryDocumentStore(DOCUMENTS)
+
+
+def build_search_index(store: DocumentStore):
+    """
+    Build the in-process index (or load it from MCP_INDEX_SNAPSHOT), or start
+    shard processes when MCP_SEARCH_SHARDS > 1.
+    """
+    if SEARCH_SHARDS > 1:
+        if WORKERS > 1:
+            raise RuntimeError("MCP_SEARCH_SHARDS cannot be combined with MCP_WORKERS")
+        logger.info("Starting %d search shards", SEARCH_SHARDS)
+        return ShardedIndex(
+            SEARCH_SHARDS,
+            segment_path=CORPUS_SEGMENT or None,
+            documents=None if CORPUS_SEGMENT else store.iter_documents(),
+            vector_dim=VECTOR_DIM if VECTOR_SEARCH else 0,
+            timeout=SHARD_TIMEOUT
+        )
+    embedder = HashingEmbedder(VECTOR_DIM) if VECTOR_SEARCH else None
+    # Worker hanya berbagi index yang ada di mmap: object Python tersalin ke tiap
+    # worker begitu reference count-nya berubah
+    if INDEX_SNAPSHOT:
+        return load_or_build_index(INDEX_SNAPSHOT, store, embedder, INDEX_SNAPSHOT_VERIFY, mapped=WORKERS > 1)
+    index = SearchIndex.build(store.iter_documents(), embedder)
+    return map_index(index, embedder) if WORKERS > 1 else index
+
+
+_store = open_document_store()
+
+# Inverted index dibangun sekali saat startup; perubahan berikutnya dari
+# CORPUS_DIR diterapkan incremental lewat snapshot baru
+CORPUS = LiveCorpus(Corpus(_store, build_search_index(_store)))
+CORPUS_WATCHER = CorpusWatcher(CORPUS, CORPUS_DIR, CORPUS_RELOAD_INTERVAL) if CORPUS_DIR else None
+if CORPUS_WATCHER:
+    CORPUS_WATCHER.poll()
+
+SEARCH_CACHE = LRUCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+RESPONSE_CACHE = LRUCache(RESPONSE_CACHE_SIZE if RESPONSE_CACHE_BYTES > 0 else 0, max_bytes=RESPONSE_CACHE_BYTES)
+
+TOOL_EXECUTOR = ToolExecutor(OFFLOAD_TOOLS, OFFLOAD_THREADS, TOOL_TIMEOUTS, TOOL_TIMEOUT)
+SEARCHES_IN_FLIGHT = SingleFlight()
+
+ADMISSION = AdmissionController(
+    MAX_CONCURRENT_CALLS,
+    MAX_SESSION_CALLS,
+    MAX_QUEUED_CALLS,
+    MAX_SESSION_QUEUED,
+    QUEUE_TIMEOUT,
+    SESSION_RATE,
+    SESSION_BURST,
+    MAX_SESSIONS
+)
+# Dipasang pertama (paling luar): call yang ditolak tidak masuk metrics per tool
+mcp.add_middleware(AdmissionMiddleware(ADMISSION))
+# Membatasi jumlah stream /sse dan streamable HTTP yang terbuka; dipasang ke app
+# HTTP saat start
+HTTP_MIDDLEWARE = [Middleware(StreamLimitMiddleware, controller=ADMISSION, paths=("/sse", HTTP_PATH))]
+
+METRICS = Metrics(TOOL_NAMES) if METRICS_ENABLED else None
+if METRICS:
+    mcp.add_middleware(MetricsMiddleware(METRICS))
+    METRICS.add_gauges(lambda: {
+        "mcp_corpus_documents": len(CORPUS.snapshot.store),
+        "mcp_corpus_version": CORPUS.snapshot.version,
+        "mcp_search_cache_entries": len(SEARCH_CACHE),
+        "mcp_response_cache_entries": len(RESPONSE_CACHE),
+        "mcp_response_cache_bytes": RESPONSE_CACHE.bytes
+    })
+    if isinstance(_store, SegmentDocumentStore):
+        METRICS.add_gauges(lambda: {"mcp_text_block_cache_entries": _store.block_stats()["size"]})
+        METRICS.add_counters(lambda: {
+            f"mcp_text_block_cache_{name}_total": _store.block_stats()[name]
+            for name in ("hits", "misses")
+        })
+    METRICS.add_gauges(lambda: {
+        f"mcp_tool_pool_{name}": value
+        for name, value in TOOL_EXECUTOR.stats().items()
+        if name in ("queued", "running", "threads")
+    })
+    METRICS.add_counters(lambda: {
+        f"mcp_tool_pool_{name}_total": value
+        for name, value in TOOL_EXECUTOR.stats().items()
+        if name in ("submitted", "timeouts", "cancelled")
+    })
+    METRICS.add_gauges(lambda: {
+        "mcp_admission_active_calls": ADMISSION.active,
+        "mcp_admission_queued_calls": ADMISSION.queued,
+        "mcp_admission_open_streams": ADMISSION.streams_open,
+        "mcp_admission_open_sessions": ADMISSION.sessions_open
+    })
+    METRICS.add_counters(lambda: dict(
+        {"mcp_admission_admitted_total": ADMISSION.admitted},
+        **{f"mcp_admission_rejected_{reason}_total": count for reason, count in ADMISSION.rejected.items()}
+    ))
+
+ACCESS_LOG = AccessLog(ACCESS_LOG_SAMPLE, ACCESS_LOG_RATE, ACCESS_LOG_SLOW_MS, TOOL_NAMES) if ACCESS_LOG_ENABLED else None
+if ACCESS_LOG:
+    mcp.add_middleware(AccessLogMiddleware(ACCESS_LOG))
+if METRICS:
+    METRICS.add_counters(lambda: dict(
+        {"mcp_log_dropped_total": LOGGING.dropped},
+        **{f"mcp_access_log_{name}_total": value for name, value in (ACCESS_LOG.stats() if ACCESS_LOG else {}).items()}
+    ))
+    METRICS.add_counters(lambda: {
+        f"mcp_response_cache_{name}_total": RESPONSE_CACHE.stats()[name]
+        for name in ("hits", "misses", "evictions")
+    })
+
+
+def _fetch_response_key(arguments: Dict[str, Any]) -> Optional[str]:
+    """Cache key of a whole-document 'fetch' (the id); ranged, cursor and streamed calls are not cached."""
+    id = arguments.get("id")
+    if not isinstance(id, str) or not id:
+        return None
+    for name, value in arguments.items():
+        # Hanya argumen default (None/False); start=0 tetap request range
+        if name != "id" and (name not in ("start", "length", "cursor", "stream") or (value is not None and value is not False)):
+            return None
+    return id
+
+
+# Dipasang setelah metrics dan access log: hit tetap tercatat di keduanya
+if RESPONSE_CACHE_BYTES > 0:
+    mcp.add_middleware(ResponseCacheMiddleware(
+        RESPONSE_CACHE,
+        {"fetch": _fetch_response_key, "server_info": lambda arguments: "" if not arguments else None},
+        lambda: CORPUS.snapshot.version
+    ))
+# Paling dalam: batas waktu per tool mencakup seluruh eksekusi tool (bukan antrean
+# admission atau cache hit), dan timeout tetap tercatat di metrics dan access log
+mcp.add_middleware(DeadlineMiddleware(TOOL_EXECUTOR))
+
+
 # ============================================================================
 # ChatGPT Required Tools: search dan fetch
 # ============================================================================
 
 @mcp.tool()
-async def search(query: str) -> Dict[str, List[Dict[str, Any]]]:
+async def search(
+    query: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    offset: int = 0,
+    mode: str = "keyword",
+    filters: Optional[Dict[str, Any]] = None,
+    facets: Optional[List[str]] = None,
+    fuzzy: bool = True
+) -> Dict[str, Any]:
     """
     Search for documents based on a query string.
     
     This tool searches through the knowledge base to find semantically relevant matches.
-    Returns a list of search results with basic information. Use the fetch tool to get
-    complete document content.
+    Returns a list of search results with basic information, best match first. Use
+    the fetch tool to get complete document content.
     
     Args:
         query: Search query string. Natural language queries work best.
+        limit: Maximum number of results to return (default 10, max 50)
+        offset: Number of top results to skip, for pagination (default 0)
+        mode: "keyword" (default), "vector" (semantic similarity) or "hybrid"
+            (both combined). Vector modes must be enabled on the server.
+        filters: Only return documents whose metadata matches, e.g.
+            {"category": "tutorial", "language": ["id", "en"]} (a list means
+            any of the values; all fields must match). Combine with
+            {"$or": [filter, ...]} and {"$and": [filter, ...]}.
+        facets: Metadata fields to count, e.g. ["category"]. Counts cover
+            every matching document (not only this page); with an empty query
+            they cover all documents matching 'filters'.
+        fuzzy: Tolerate typos (default true): a word that matches nothing
+            also matches words within one or two edits of it, e.g.
+            "chatgtp" finds "ChatGPT". Set false for exact matching only.
         
     Returns:
         Dictionary with 'results' key containing list of matching documents.
-        Each result includes id, title, text snippet, and URL.
+        Each result includes id, title, text snippet, and URL. With 'facets',
+        'facets' maps each field to its most frequent values and counts.
+        'partial' is true when part of a sharded index did not answer in time.
     """
-    if not query or not query.strip():
+    has_query = bool(query and query.strip())
+    if not has_query and not facets:
         return {"results": []}
     
-    query_lower = query.lower()
-    results = []
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    limit = min(limit, MAX_SEARCH_LIMIT)
+    filter = parse_filter(filters)
+    facets = list(dict.fromkeys(facets or ()))
+    if len(facets) > MAX_FACET_FIELDS:
+        raise ValueError(f"At most {MAX_FACET_FIELDS} facet fields per search")
     
-    for doc_id, doc in DOCUMENTS.items():
-        # Simple keyword matching (ganti dengan vector search untuk production)
-        title_match = query_lower in doc["title"].lower()
-        text_match = query_lower in doc["text"].lower()
-        
-        # Juga cek kata-kata individual
-        query_words = query_lower.split()
-        word_matches = sum(
-            1 for word in query_words 
-            if word in doc["title"].lower() or word in doc["text"].lower()
+    # Satu snapshot per request supaya konsisten walau corpus sedang di-reload
+    corpus = CORPUS.snapshot
+    
+    # Hasil hanya bergantung pada kata-kata query (lowercase), filter, facet dan fuzzy
+    query = query if has_query else ""
+    cache_key = (" ".join(query.lower().split()), limit, offset, mode, filter, tuple(facets), fuzzy)
+    cached = SEARCH_CACHE.get(cache_key, corpus.version)
+    if cached is not None:
+        results, facet_counts = cached
+        if METRICS:
+            METRICS.record_search(None, len(results))
+        annotate(query=query, mode=mode, results=len(results), cached=True)
+        return _search_response(list(results), facet_counts)
+    
+    search_stats: Dict[str, Any] = {}
+    
+    # Kandidat diambil dari inverted index (BM25) dan/atau vector index
+    if isinstance(corpus.index, ShardedIndex):
+        # Scoring sudah berjalan di process shard
+        if has_query:
+            hits = await corpus.index.search(query, limit, offset, mode, search_stats, filter, facets, fuzzy)
+            results = _search_results(corpus, hits)
+        else:
+            search_stats["facets"] = await corpus.index.facet_counts(facets, filter, search_stats)
+            results = []
+    else:
+        results, search_stats = await SEARCHES_IN_FLIGHT.run(
+            (cache_key, corpus.version),
+            lambda: TOOL_EXECUTOR.run("search", _run_search, corpus, query, limit, offset, mode, filter, facets, fuzzy)
         )
-        
-        if title_match or text_match or word_matches > 0:
-            # Buat snippet dari text
-            text_snippet = doc["text"][:200].strip() + "..." if len(doc["text"]) > 200 else doc["text"].strip()
-            
-            results.append({
-                "id": doc["id"],
-                "title": doc["title"],
-                "text": text_snippet,
-                "url": doc["url"]
-            })
     
-    logger.info(f"Search query: '{query}' - Found {len(results)} results")
-    return {"results": results}
+    facet_counts = top_facets(search_stats["facets"]) if facets else None
+    if METRICS:
+        METRICS.record_search(search_stats.get("candidates", 0), len(results))
+    annotate(query=query, mode=mode, results=len(results), candidates=search_stats.get("candidates", 0))
+    if search_stats.get("shards_missed"):
+        # Hasil parsial (shard melewati deadline) tidak di-cache
+        annotate(partial=True)
+        return dict(_search_response(results, facet_counts), partial=True)
+    
+    SEARCH_CACHE.put(cache_key, (tuple(results), facet_counts), corpus.version)
+    return _search_response(results, facet_counts)
+
+
+def _search_response(results: List[Dict[str, Any]], facet_counts: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if facet_counts is None:
+        return {"results": results}
+    return {"results": results, "facets": facet_counts}
+
+
+def _run_search(
+    corpus: Corpus,
+    query: str,
+    limit: int,
+    offset: int,
+    mode: str,
+    filter: Optional[Filter] = None,
+    facets: Optional[List[str]] = None,
+    fuzzy: bool = True
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Score a query on the in-process index and build its results (runs on the tool pool)."""
+    search_stats: Dict[str, Any] = {}
+    if not query:
+        # Hanya facet: hitung seluruh dokumen yang lolos filter
+        search_stats["facets"] = corpus.index.facet_counts(facets, filter)
+        return [], search_stats
+    hits = corpus.index.search(query, limit, offset, mode, search_stats, None, filter, facets or (), fuzzy)
+    return _search_results(corpus, hits), search_stats
+
+
+def _search_results(corpus: Corpus, hits: List[SearchHit]) -> List[Dict[str, Any]]:
+    """Turn index hits into 'search' results with their snippets."""
+    results = []
+    for hit in hits:
+        doc = corpus.store.get_meta(hit.doc_id)
+        if doc is None:
+            # Index dan store berasal dari snapshot corpus yang sama; ini hanya pengaman
+            continue
+        
+        # Snippet = passage terbaik yang sudah ditentukan saat indexing
+        text_snippet = ""
+        if hit.passage:
+            passage = hit.passage
+            text_snippet = " ".join(corpus.store.get_text_slice(hit.doc_id, passage.start, passage.end).split())
+            if not passage.is_first:
+                text_snippet = "..." + text_snippet
+            if not passage.is_last:
+                text_snippet += "..."
+        
+        results.append({
+            "id": doc["id"],
+            "title": doc["title"],
+            "text": text_snippet,
+            "url": doc["url"]
+        })
+    return results
 
 
 @mcp.tool()
-async def fetch(id: str) -> Dict[str, Any]:
+async def fetch(
+    id: str,
+    start: Optional[int] = None,
+    length: Optional[int] = None,
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    ctx: Context = None
+) -> Dict[str, Any]:
     """
     Retrieve complete document content by ID for detailed analysis and citation.
     
     Use this after finding relevant documents with the search tool to get complete
     information for analysis and proper citation.
     
+    Very large documents can be read in parts: pass a byte range (start/length)
+    or the 'next_cursor' of a previous call. Ranged results include 'range'
+    (start, end and total size in UTF-8 bytes) and 'next_cursor' while more text
+    remains. A document larger than the server limit is always returned in parts.
+    
     Args:
         id: Document ID from search results
+        start: Start byte offset in the UTF-8 text (optional)
+        length: Maximum number of bytes to return (optional, capped by the server)
+        cursor: Continuation token from a previous ranged fetch (optional)
+        stream: Send the text as successive progress notifications instead of in
+            the result. Only used when the request carries a progress token.
         
     Returns:
         Complete document with id, title, full text content, URL, and metadata
         
     Raises:
-        ValueError: If the specified ID is not found
+        ValueError: If the specified ID is not found, or the cursor is invalid
     """
     if not id:
         raise ValueError("Document ID is required")
     
-    if id not in DOCUMENTS:
+    corpus = CORPUS.snapshot
+    store = corpus.store
+    size = store.text_size(id)
+    if size is None:
         raise ValueError(f"Document with ID '{id}' not found")
     
-    doc = DOCUMENTS[id]
+    if cursor:
+        start = _decode_cursor(cursor, id, corpus.version)
+    ranged = cursor or start is not None or length is not None or stream
+    if not ranged and size <= FETCH_MAX_BYTES:
+        result = await TOOL_EXECUTOR.run("fetch", _load_document, store, id)
+        annotate(id=id, bytes=size)
+        return result
+    
+    # Offset range dihitung di dalam teks yang sudah di-strip, sama dengan
+    # 'text' fetch utuh: gabungan semua bagian = hasil fetch tanpa range
+    lo, hi = await TOOL_EXECUTOR.run("fetch", _text_bounds, store, id, size)
+    total = hi - lo
+    start = start or 0
+    if start < 0 or start > total:
+        raise ValueError(f"start must be between 0 and {total}")
+    if length is not None and length < 1:
+        raise ValueError("length must be at least 1")
+    
+    result = store.get_meta(id)
+    result["metadata"] = result.get("metadata")
+    
+    if stream and _has_progress_token(ctx):
+        # Kirim per chunk lalu buang, jadi memory per request tetap kecil
+        end = min(total, start + length) if length else total
+        position = start
+        while position < end:
+            chunk, position = await TOOL_EXECUTOR.run(
+                "fetch", _read_text_chunk, store, id, lo + position, lo + min(end, position + FETCH_CHUNK_BYTES), hi
+            )
+            position -= lo
+            await ctx.report_progress(position, total, message=chunk)
+        result["text"] = ""
+    else:
+        end = start + min(length or FETCH_MAX_BYTES, FETCH_MAX_BYTES)
+        result["text"], position = await TOOL_EXECUTOR.run(
+            "fetch", _read_text_chunk, store, id, lo + start, lo + min(end, total), hi
+        )
+        position -= lo
+    
+    result["range"] = {"start": start, "end": position, "total": total}
+    result["next_cursor"] = _encode_cursor(id, position, corpus.version) if position < total else None
+    annotate(id=id, start=start, end=position, size=total)
+    return result
+
+
+def _utf8_char_length(lead: int) -> int:
+    """Byte length of the UTF-8 character starting with the given lead byte."""
+    return 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+
+
+def _utf8_boundary(data: bytes) -> int:
+    """Length of the longest prefix of data that ends on a complete UTF-8 character."""
+    i = len(data) - 1
+    # Mundur melewati byte lanjutan (10xxxxxx), paling banyak 3
+    while i >= 0 and len(data) - i <= 3 and data[i] & 0xC0 == 0x80:
+        i -= 1
+    if i < 0:
+        return 0
+    return len(data) if len(data) - i >= _utf8_char_length(data[i]) else i
+
+
+def _text_bounds(store: DocumentStore, id: str, size: int, probe: int = 256) -> Tuple[int, int]:
+    """
+    Byte offsets of a document's text without leading and trailing whitespace.
+
+    Only the whitespace at both ends is read, ``probe`` bytes at a time, so
+    the bounds of a large document cost two small reads.
+
+    Args:
+        store: Document store
+        id: Document ID
+        size: Size of the UTF-8 encoded text in bytes
+        probe: Bytes read per step
+
+    Returns:
+        (start, end) such that bytes [start, end) decode to ``text.strip()``
+    """
+    lo = 0
+    while lo < size:
+        data = store.get_text_bytes(id, lo, min(size, lo + probe))
+        if lo + len(data) < size:
+            data = data[:_utf8_boundary(data)]
+        text = data.decode("utf-8")
+        stripped = text.lstrip()
+        lo += len(data) - len(stripped.encode("utf-8"))
+        if stripped:
+            break
+    hi = size
+    while hi > lo:
+        data = store.get_text_bytes(id, max(lo, hi - probe), hi)
+        # Awal probe di tengah karakter: lewati byte lanjutan
+        skip = 0
+        while skip < len(data) and data[skip] & 0xC0 == 0x80:
+            skip += 1
+        stripped = data[skip:].decode("utf-8").rstrip()
+        hi -= len(data) - skip - len(stripped.encode("utf-8"))
+        if stripped:
+            break
+    return lo, hi
+
+
+def _read_text_chunk(store: DocumentStore, id: str, start: int, end: int, size: int):
+    """Read [start, end) of a document's text, trimmed to whole UTF-8 characters (size: end of the text)."""
+    data = store.get_text_bytes(id, start, end)
+    # Start di tengah karakter: lewati byte lanjutan
+    skip = 0
+    while skip < len(data) and data[skip] & 0xC0 == 0x80:
+        skip += 1
+    data = data[skip:]
+    start += skip
+    
+    if start + len(data) < size:
+        cut = _utf8_boundary(data)
+        if cut == 0 and data:
+            # Range lebih kecil dari satu karakter: kirim karakter itu utuh
+            data = store.get_text_bytes(id, start, start + _utf8_char_length(data[0]))
+        else:
+            data = data[:cut]
+    return data.decode("utf-8"), start + len(data)
+
+
+def _encode_cursor(id: str, offset: int, version: int) -> str:
+    payload = json.dumps({"id": id, "offset": offset, "version": version}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def _decode_cursor(cursor: str, id: str, version: int) -> int:
+    """Validate a fetch cursor and return its byte offset."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = int(data["offset"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if data.get("id") != id:
+        raise ValueError("Cursor belongs to a different document")
+    if data.get("version") != version:
+        raise ValueError("Document store changed since the cursor was issued; fetch from the start again")
+    return offset
+
+
+def _load_document(store: DocumentStore, id: str) -> Dict[str, Any]:
+    """Load one document in the 'fetch' result format, raising ValueError if missing."""
+    if not id:
+        raise ValueError("Document ID is required")
+    
+    doc = store.get(id)
+    if doc is None:
+        raise ValueError(f"Document with ID '{id}' not found")
     
-    result = {
+    return {
         "id": doc["id"],
         "title": doc["title"],
         "text": doc["text"].strip(),
         "url": doc["url"],
         "metadata": doc.get("metadata")
     }
+
+
+def _has_progress_token(ctx: Optional[Context]) -> bool:
+    """Whether the client asked for progress notifications on this request."""
+    request_context = ctx.request_context if ctx else None
+    meta = request_context.meta if request_context else None
+    return bool(meta) and meta.get("progressToken") is not None
+
+
+@mcp.tool()
+async def fetch_many(ids: List[str], stream: bool = False, ctx: Context = None) -> Dict[str, Any]:
+    """
+    Retrieve several documents by ID in one call.
+    
+    Use this instead of calling fetch once per search result. A missing ID does
+    not fail the batch; it is reported in 'errors'. The total text returned is
+    capped; IDs that did not fit are listed in 'omitted' and can be fetched later.
+    
+    Args:
+        ids: Document IDs from search results (max 100, duplicates ignored)
+        stream: Send each document as a progress notification as soon as it is
+            ready instead of in the final result. Only used when the request
+            carries a progress token; otherwise documents are returned inline.
+        
+    Returns:
+        Dictionary with 'documents' (same format as fetch), 'errors'
+        (id + error message), 'omitted' (IDs over the size cap) and, in stream
+        mode, 'streamed' (IDs delivered as progress notifications)
+        
+    Raises:
+        ValueError: If more than 100 IDs are requested
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if len(unique_ids) > MAX_FETCH_MANY_IDS:
+        raise ValueError(f"At most {MAX_FETCH_MANY_IDS} IDs can be fetched per call")
     
-    logger.info(f"Fetched document: {id}")
+    # Satu snapshot untuk seluruh batch
+    store = CORPUS.snapshot.store
+    streaming = stream and _has_progress_token(ctx)
+    result: Dict[str, Any] = {"documents": [], "errors": [], "omitted": []}
+    if streaming:
+        result["streamed"] = []
+        # Inline: setiap dokumen dikirim begitu selesai dibaca
+        entries = _iter_batch(store, unique_ids)
+    else:
+        entries = await TOOL_EXECUTOR.run("fetch_many", list, _iter_batch(store, unique_ids))
+    
+    for i, kind, doc_id, value in entries:
+        if kind == "omitted":
+            result["omitted"].append(doc_id)
+        elif kind == "error":
+            result["errors"].append({"id": doc_id, "error": value})
+        elif streaming:
+            await ctx.report_progress(i + 1, len(unique_ids), message=json.dumps(value))
+            result["streamed"].append(doc_id)
+        else:
+            result["documents"].append(value)
+    
+    annotate(ids=len(unique_ids), errors=len(result["errors"]), omitted=len(result["omitted"]))
     return result
 
 
+def _iter_batch(store: DocumentStore, ids: List[str]) -> Iterator[Tuple[int, str, str, Any]]:
+    """
+    Load the documents of a fetch_many batch within the total size cap.
+    
+    Yields:
+        (position in ids, kind, id, value) where kind is "document" (value is
+        the fetch result), "error" (value is the message) or "omitted"
+    """
+    total_bytes = 0
+    for i, doc_id in enumerate(ids):
+        check_cancelled()
+        if total_bytes >= FETCH_MANY_MAX_BYTES:
+            for j in range(i, len(ids)):
+                yield j, "omitted", ids[j], None
+            return
+        
+        # Cek ukuran dulu supaya dokumen besar tidak perlu dibaca sama sekali
+        size = store.text_size(doc_id) if doc_id else None
+        if size is not None and total_bytes + size > FETCH_MANY_MAX_BYTES:
+            yield i, "omitted", doc_id, None
+            continue
+        try:
+            doc = _load_document(store, doc_id)
+        except ValueError as e:
+            yield i, "error", doc_id, str(e)
+            continue
+        total_bytes += size
+        yield i, "document", doc_id, doc
+
+
 # ============================================================================
 # Additional Tools (bonus tools untuk fungsi lain)
 # ============================================================================
@@ -258,6 +887,42 @@ def calculate(operation: str, a: float, b: float) -> str:
     return f"{a} {symbol} {b} = {result}"
 
 
+@mcp.tool()
+def calculate_batch(
+    a: List[float],
+    b: List[float],
+    operation: Optional[str] = None,
+    operations: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Tool untuk menghitung banyak kalkulasi sekaligus dalam satu panggilan.
+    
+    Gunakan ini alih-alih memanggil calculate berkali-kali. Berikan satu 'operation'
+    untuk semua pasangan (a[i], b[i]), atau 'operations' berisi satu operasi per
+    pasangan. List a atau b yang berisi satu angka dipakai untuk semua pasangan.
+    Pembagian dengan nol tidak menggagalkan batch: hasilnya null dan dilaporkan di
+    'errors'.
+    
+    Args:
+        a: Angka pertama tiap pasangan (maksimal 10000 pasangan)
+        b: Angka kedua tiap pasangan
+        operation: Operasi untuk semua pasangan (add, subtract, multiply, divide)
+        operations: Atau satu operasi per pasangan, sepanjang a/b
+        
+    Returns:
+        Dictionary dengan 'count', 'results' (hasil per pasangan sesuai urutan,
+        null bila error) dan 'errors' (index + pesan error)
+        
+    Raises:
+        ValueError: Jika operasi tidak valid atau panjang list tidak cocok
+    """
+    if max(len(a), len(b)) > MAX_CALCULATE_BATCH:
+        raise ValueError(f"At most {MAX_CALCULATE_BATCH} calculations per call")
+    result = evaluate_batch(a, b, operation, operations)
+    annotate(count=result["count"], errors=len(result["errors"]))
+    return result
+
+
 @mcp.tool()
 def get_time(timezone: str = "UTC") -> str:
     """
@@ -286,30 +951,103 @@ def server_info() -> str:
         "name": "Simple MCP Server",
         "version": "1.0.0",
         "description": "MCP Server dengan integrasi ChatGPT",
-        "tools": ["search", "fetch", "hello", "calculate", "get_time", "server_info"],
+        "tools": list(TOOL_NAMES),
         "chatgpt_compatible": True,
-        "endpoint": f"http://{HOST}:{PORT}/sse"
+        "endpoint": f"http://{HOST}:{PORT}{'/sse' if TRANSPORT != 'http' else HTTP_PATH}"
     }
     return json.dumps(info, indent=2)
 
 
+# ============================================================================
+# HTTP Routes (di samping /sse)
+# ============================================================================
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats(request: Request) -> JSONResponse:
+    """Cache and corpus counters for monitoring and sizing."""
+    corpus = CORPUS.snapshot
+    return JSONResponse({
+        # Dengan MCP_WORKERS > 1 setiap worker punya counter sendiri
+        "pid": os.getpid(),
+        "memory": memory_usage(),
+        "corpus": {"version": corpus.version, "documents": len(corpus.store)},
+        "search_cache": SEARCH_CACHE.stats(),
+        "response_cache": RESPONSE_CACHE.stats(),
+        "logging": dict(LOGGING.stats(), **(ACCESS_LOG.stats() if ACCESS_LOG else {})),
+        "tool_pool": TOOL_EXECUTOR.stats(),
+        "admission": ADMISSION.stats(),
+        "text_blocks": _store.block_stats() if isinstance(_store, SegmentDocumentStore) else None
+    })
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Per-tool metrics in the Prometheus text format."""
+    if METRICS is None:
+        return PlainTextResponse("Metrics are disabled (MCP_METRICS=0)\n", status_code=404)
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
 # ============================================================================
 # Main Entry Point
 # ============================================================================
 
+def http_app():
+    """The ASGI app for ``TRANSPORT`` (built per process: each worker builds its own)."""
+    return build_app(mcp, TRANSPORT, HTTP_PATH, HTTP_MIDDLEWARE, HTTP_JSON_RESPONSE, COMPRESS_MIN_BYTES)
+
+
 if __name__ == "__main__":
     print(f"🚀 Starting MCP Server on http://{HOST}:{PORT}")
-    print(f"📡 SSE endpoint: http://{HOST}:{PORT}/sse")
-    print(f"📨 Messages endpoint: http://{HOST}:{PORT}/messages/")
+    if TRANSPORT != "http":
+        print(f"📡 SSE endpoint: http://{HOST}:{PORT}/sse")
+        print(f"📨 Messages endpoint: http://{HOST}:{PORT}/messages/")
+    if TRANSPORT != "sse":
+        print(f"🔌 Streamable HTTP endpoint: http://{HOST}:{PORT}{HTTP_PATH}")
+    print(f"📊 Stats endpoint: http://{HOST}:{PORT}/stats")
+    print(f"📈 Metrics endpoint: http://{HOST}:{PORT}/metrics")
     print()
     print("🔧 Available Tools:")
     print("   - search: Search documents (ChatGPT compatible)")
     print("   - fetch: Fetch document content (ChatGPT compatible)")
+    print("   - fetch_many: Fetch several documents in one call")
     print("   - hello: Greeting tool")
     print("   - calculate: Calculator")
+    print("   - calculate_batch: Calculator for many pairs in one call")
     print("   - get_time: Get server time")
     print("   - server_info: Server information")
     print()
     
-    # Jalankan server dengan SSE transport
-    mcp.run(transport="sse", host=HOST, port=PORT)
+    if CORPUS_WATCHER:
+        print(f"🔄 Watching corpus directory: {CORPUS_DIR}")
+    
+    if WORKERS > 1:
+        # Corpus dan index sudah dibangun di sini; worker mewarisinya lewat fork.
+        # Thread watcher tidak ikut fork, jadi dijalankan di tiap worker
+        print(f"👥 Workers: {WORKERS} (ports {WORKER_BASE_PORT}-{WORKER_BASE_PORT + WORKERS - 1})")
+        run_workers(
+            http_app,
+            HOST,
+            PORT,
+            WORKERS,
+            WORKER_BASE_PORT,
+            on_worker_start=lambda worker: CORPUS_WATCHER and CORPUS_WATCHER.start(),
+            access_log=UVICORN_ACCESS_LOG,
+            timeout_keep_alive=KEEP_ALIVE_TIMEOUT,
+            http_path=HTTP_PATH
+        )
+    else:
+        if CORPUS_WATCHER:
+            CORPUS_WATCHER.start()
+        
+        uvicorn.run(
+            http_app(),
+            host=HOST,
+            port=PORT,
+            access_log=UVICORN_ACCESS_LOG,
+            timeout_keep_alive=KEEP_ALIVE_TIMEOUT,
+            timeout_graceful_shutdown=2,
+            # Tanpa dictConfig bawaan uvicorn (yang menutup handler antrean
+            # root); log uvicorn ikut lewat QueueLogging
+            log_config=None
+        )
@@ -0,0 +1,498 @@
+"""
+Sharded search (scatter-gather) untuk corpus besar
+Dokumen dibagi ke N shard berdasarkan hash ID. Setiap shard adalah process
+tersendiri yang memegang SearchIndex untuk bagiannya, jadi satu query dikerjakan
+paralel di beberapa core tanpa memblokir event loop server.
+"""
+
+import asyncio
+import copy
+import heapq
+import itertools
+import logging
+import multiprocessing
+import threading
+import zlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from metadata_index import Filter, merge_facets
+from search_index import (
+    HYBRID_CANDIDATE_FACTOR,
+    SEARCH_MODES,
+    CorpusStats,
+    SearchHit,
+    SearchIndex,
+    fuse_hybrid,
+    merge_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+# Versi SearchIndex milik shard di process ini (hanya terisi di process shard).
+# Reload menyiapkan versi baru di samping versi lama, jadi query yang sedang
+# berjalan tetap melihat satu versi yang sama di semua shard
+_shard_indexes: Dict[int, SearchIndex] = {}
+# Berapa lama process shard diberi waktu untuk berhenti sebelum di-terminate
+SHARD_STOP_TIMEOUT = 5.0
+
+
+def shard_of(doc_id: str, n_shards: int) -> int:
+    """Shard number of a document (CRC32 is stable across processes)."""
+    return zlib.crc32(doc_id.encode("utf-8")) % n_shards
+
+
+# ============================================================================
+# Fungsi yang dijalankan di process shard
+# ============================================================================
+
+def _init_shard(shard_no: int, n_shards: int, segment_path: Optional[str], documents: Optional[List[Dict[str, Any]]], vector_dim: int) -> None:
+    """Build this shard's index (version 0), reading its documents from the segment file or the given list."""
+    embedder = None
+    if vector_dim:
+        from vector_index import HashingEmbedder
+        embedder = HashingEmbedder(vector_dim)
+    if segment_path:
+        from document_store import SegmentDocumentStore
+        documents = (doc for doc in SegmentDocumentStore(segment_path).iter_documents() if shard_of(doc["id"], n_shards) == shard_no)
+    _shard_indexes[0] = SearchIndex.build(documents, embedder)
+
+
+def _serve_shard(conn, init_args: tuple) -> None:
+    """Shard process main loop: build the index, then answer requests one at a time, in order."""
+    _init_shard(*init_args)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        request_id, fn, args = request
+        try:
+            reply = (request_id, True, fn(*args))
+        except Exception as e:
+            reply = (request_id, False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Exception yang tidak bisa di-pickle
+            conn.send((request_id, False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+def _index(version: int) -> SearchIndex:
+    index = _shard_indexes.get(version)
+    if index is None:
+        raise LookupError(f"Index version {version} is no longer held by this shard")
+    return index
+
+
+def _shard_size(version: int) -> int:
+    return len(_index(version))
+
+
+def _shard_term_stats(version: int, query: str, fuzzy: bool) -> CorpusStats:
+    return _index(version).term_stats(query, fuzzy)
+
+
+def _shard_search(
+    version: int,
+    query: str,
+    k: int,
+    mode: str,
+    corpus_stats: CorpusStats,
+    filter: Optional[Filter],
+    facets: Sequence[str]
+) -> Tuple[List[SearchHit], int, Dict[str, Dict[Any, int]]]:
+    stats: Dict[str, Any] = {}
+    hits = _index(version).search(query, k, 0, mode, stats, corpus_stats, filter, facets)
+    return hits, stats.get("candidates", 0), stats.get("facets", {})
+
+
+def _shard_hybrid(
+    version: int,
+    query: str,
+    k: int,
+    corpus_stats: CorpusStats,
+    filter: Optional[Filter],
+    facets: Sequence[str]
+) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, Dict[Any, int]]]:
+    index = _index(version)
+    components = index.hybrid_components(query, k, corpus_stats, filter)
+    segments = index.segments
+    by_id = {segments[seg_no].doc_ids[doc_ord]: value for (seg_no, doc_ord), value in components.items()}
+    return by_id, index.candidate_facets(components, facets) if facets else {}
+
+
+def _shard_facets(version: int, fields: Sequence[str], filter: Optional[Filter]) -> Dict[str, Dict[Any, int]]:
+    return _index(version).facet_counts(fields, filter)
+
+
+def _shard_hits(version: int, query: str, scored: List[Tuple[str, float]], corpus_stats: CorpusStats) -> List[SearchHit]:
+    return _index(version).hits_for(query, scored, corpus_stats)
+
+
+def _shard_prepare(base: int, version: int, upserts: List[Dict[str, Any]], deletes: List[str]) -> int:
+    """Phase 1 of a reload: build ``version`` from ``base`` next to it; nothing is dropped yet."""
+    index = _index(base)
+    _shard_indexes[version] = index.apply(upserts, deletes) if upserts or deletes else index
+    return len(_shard_indexes[version])
+
+
+def _shard_retain(versions: Tuple[int, ...]) -> None:
+    """Phase 2 of a reload (or rollback): drop every index version not listed."""
+    for version in [v for v in _shard_indexes if v not in versions]:
+        del _shard_indexes[version]
+
+
+# ============================================================================
+# Koordinator (di process server)
+# ============================================================================
+
+class _ShardProcess:
+    """
+    One long-lived shard process and the requests in flight to it.
+
+    Requests go over a pipe and the shard answers them one at a time, in
+    order; a reader thread here resolves the matching futures. A caller that
+    gives up cancels its future, but the shard still has to work through
+    the request, so ``lagging`` stays true until it has caught up.
+    """
+
+    def __init__(self, context, shard_no: int, init_args: tuple) -> None:
+        self.shard_no = shard_no
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve_shard, args=(child_conn, init_args), name=f"shard-{shard_no}", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._reader: Optional[threading.Thread] = None
+
+    def start_reader(self) -> None:
+        self._reader = threading.Thread(target=self._read, name=f"shard-{self.shard_no}-reader", daemon=True)
+        self._reader.start()
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        """
+        Queue ``fn(*args)`` on the shard.
+
+        Raises:
+            RuntimeError: If the shard process has exited
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Shard {self.shard_no} is not running")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self._conn.send((request_id, fn, args))
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise RuntimeError(f"Shard {self.shard_no} is not running: {e}") from e
+        return future
+
+    @property
+    def lagging(self) -> bool:
+        """Whether the shard is still working on requests whose callers gave up."""
+        with self._lock:
+            return any(future.cancelled() for future in self._pending.values())
+
+    def _read(self) -> None:
+        while True:
+            try:
+                request_id, ok, value = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            # False = dibatalkan pemanggil (deadline); hasilnya dibuang
+            if future is not None and future.set_running_or_notify_cancel():
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(f"Shard {self.shard_no} exited (code {self.process.exitcode})"))
+
+    def close(self) -> None:
+        try:
+            with self._send_lock:
+                self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(SHARD_STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self._conn.close()
+        if self._reader is not None:
+            self._reader.join()
+
+
+class ShardedIndex:
+    """
+    Search index split over ``n_shards`` long-lived shard processes.
+
+    Each shard process keeps its ``SearchIndex`` in memory between queries
+    and answers one request at a time. A keyword query is answered in two
+    rounds: every shard first reports the document frequencies of the query
+    terms, then scores with the merged global statistics, so BM25 scores are
+    comparable across shards and equal to a single index. Hybrid queries
+    fuse (BM25, cosine) pairs here using the global best BM25 score. Each
+    shard has a deadline; late shards are left out and the result is marked
+    partial instead of stalling the caller. A shard still busy with requests
+    that missed their deadline is skipped right away, so one slow query does
+    not make the following ones wait out the deadline too.
+
+    Like ``SearchIndex``, ``apply`` returns a new index and leaves this one
+    untouched. Every request names the index version it was issued for, and
+    a reload is a two-phase swap: each shard first builds the new version
+    next to the current one, and only after every shard has acknowledged
+    is the new ``ShardedIndex`` returned and older versions dropped. A query
+    therefore sees one consistent version on all shards. Shards keep the
+    current and the previous version; a query still running two reloads
+    later finds its version gone and is answered without those shards.
+    """
+
+    def __init__(
+        self,
+        n_shards: int,
+        segment_path: Optional[str] = None,
+        documents: Optional[Iterable[Dict[str, Any]]] = None,
+        vector_dim: int = 0,
+        timeout: float = 2.0
+    ) -> None:
+        self.n_shards = n_shards
+        self.timeout = timeout
+        self.vector_enabled = bool(vector_dim)
+        self.version = 0
+        self._versions = itertools.count(1)
+        per_shard: List[Optional[List[Dict[str, Any]]]] = [None] * n_shards
+        if not segment_path:
+            per_shard = [[] for _ in range(n_shards)]
+            for doc in documents or ():
+                per_shard[shard_of(doc["id"], n_shards)].append(doc)
+
+        # fork: process shard tidak meng-import ulang __main__ (server.py membangun
+        # corpus saat import). Semua shard di-fork sebelum thread reader dimulai,
+        # dan thread writer logging berhenti selama fork (QueueLogging), jadi
+        # tidak ada thread lain yang bisa memegang lock saat fork
+        context = multiprocessing.get_context("fork")
+        self.shards = [
+            _ShardProcess(context, shard_no, (shard_no, n_shards, segment_path, per_shard[shard_no], vector_dim))
+            for shard_no in range(n_shards)
+        ]
+        for shard in self.shards:
+            shard.start_reader()
+        # Shard membangun index secara paralel; tunggu semuanya siap
+        try:
+            self.sizes = [future.result() for future in [shard.submit(_shard_size, 0) for shard in self.shards]]
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return sum(self.sizes)
+
+    def close(self) -> None:
+        """Stop the shard processes (shared by every version of this index)."""
+        for shard in self.shards:
+            shard.close()
+
+    def apply(self, upserts: List[Dict[str, Any]], deletes: Iterable[str]) -> "ShardedIndex":
+        """
+        Route added, replaced or removed documents to their shards.
+
+        Args:
+            upserts: New or changed documents
+            deletes: IDs of removed documents
+
+        Returns:
+            New ``ShardedIndex`` over the same shard processes; this one keeps
+            answering with the previous version
+
+        Raises:
+            RuntimeError: If a shard failed to prepare the new version (the
+                update is rolled back on every shard)
+        """
+        shard_upserts: List[List[Dict[str, Any]]] = [[] for _ in range(self.n_shards)]
+        shard_deletes: List[List[str]] = [[] for _ in range(self.n_shards)]
+        for doc in upserts:
+            shard_upserts[shard_of(doc["id"], self.n_shards)].append(doc)
+        for doc_id in deletes:
+            shard_deletes[shard_of(doc_id, self.n_shards)].append(doc_id)
+
+        # Fase 1: setiap shard membangun versi baru di samping versi sekarang
+        # (shard tanpa perubahan cukup memberi nama baru pada index yang sama)
+        version = next(self._versions)
+        try:
+            futures = [
+                shard.submit(_shard_prepare, self.version, version, shard_upserts[shard_no], shard_deletes[shard_no])
+                for shard_no, shard in enumerate(self.shards)
+            ]
+            sizes = [future.result() for future in futures]
+        except Exception as e:
+            self._retain(self.version)
+            raise RuntimeError(f"Shard update to version {version} failed: {e}") from e
+
+        # Fase 2: semua shard sudah punya versi baru; yang lebih lama dari versi
+        # sekarang tidak dibutuhkan lagi
+        self._retain(self.version, version)
+        updated = copy.copy(self)
+        updated.version = version
+        updated.sizes = sizes
+        return updated
+
+    def _retain(self, *versions: int) -> None:
+        for shard in self.shards:
+            try:
+                shard.submit(_shard_retain, versions)
+            except RuntimeError as e:
+                logger.warning(str(e))
+
+    async def _scatter(self, fn, calls: Dict[int, tuple], deadline: float, missed: set) -> Dict[int, Any]:
+        """
+        Run ``fn`` on several shards at once, with per-shard arguments.
+
+        Shards still catching up on abandoned requests are skipped.
+
+        Returns:
+            Results of the shards that answered before the deadline; the
+            others are added to ``missed``
+        """
+        if not calls:
+            return {}
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for shard_no, args in calls.items():
+            shard = self.shards[shard_no]
+            if shard.lagging:
+                continue
+            try:
+                futures[asyncio.wrap_future(shard.submit(fn, self.version, *args))] = shard_no
+            except RuntimeError as e:
+                logger.warning(str(e))
+        results = {}
+        if futures:
+            done, pending = await asyncio.wait(futures, timeout=max(0.0, deadline - loop.time()))
+            for future in pending:
+                # Shard tetap mengerjakan request ini; sampai selesai shard dilewati
+                future.cancel()
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    logger.warning("Shard %s failed: %s", futures[future], e)
+        missed.update(set(calls) - set(results))
+        return results
+
+    async def search(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        mode: str = "keyword",
+        stats: Optional[Dict[str, Any]] = None,
+        filter: Optional[Filter] = None,
+        facets: Sequence[str] = (),
+        fuzzy: bool = True
+    ) -> List[SearchHit]:
+        """
+        Return one page of the best-scoring documents across all shards.
+
+        Same contract as ``SearchIndex.search``, but awaitable. Filters are
+        applied inside each shard and facet counts are summed. Fuzzy
+        expansions are merged with the BM25 statistics, so a fragment found
+        in any shard is not expanded in the others. ``stats``
+        additionally receives "shards_missed" (shards that were busy, failed or missed
+        the deadline); when it is non-zero the page may be incomplete.
+
+        Raises:
+            ValueError: If the mode is unknown, or vector search is disabled
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Use: {', '.join(SEARCH_MODES)}")
+        if mode != "keyword" and not self.vector_enabled:
+            raise ValueError("Vector search is not enabled on this server")
+
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        shards = range(self.n_shards)
+        missed: set = set()
+        k = offset + limit
+
+        # Ronde 1: statistik BM25 global dan ekspansi fuzzy (juga dipakai untuk memilih passage snippet)
+        parts = await self._scatter(_shard_term_stats, {n: (query, fuzzy) for n in shards}, deadline, missed)
+        shards = sorted(parts)
+        corpus_stats = merge_stats(parts.values())
+
+        if mode == "hybrid":
+            candidates_k = k * HYBRID_CANDIDATE_FACTOR
+            parts = await self._scatter(
+                _shard_hybrid, {n: (query, candidates_k, corpus_stats, filter, facets) for n in shards}, deadline, missed
+            )
+            facet_counts = merge_facets(shard_facets for _, shard_facets in parts.values())
+            parts = {shard_no: components for shard_no, (components, _) in parts.items()}
+            owner = {doc_id: shard_no for shard_no, components in parts.items() for doc_id in components}
+            fused = fuse_hybrid({doc_id: value for components in parts.values() for doc_id, value in components.items()})
+            page = heapq.nlargest(k, fused.items(), key=lambda item: item[1])[offset:]
+
+            # Passage snippet dibuat oleh shard pemilik dokumen
+            by_shard: Dict[int, List[Tuple[str, float]]] = {}
+            for doc_id, value in page:
+                by_shard.setdefault(owner[doc_id], []).append((doc_id, value))
+            hit_parts = await self._scatter(
+                _shard_hits, {n: (query, scored, corpus_stats) for n, scored in by_shard.items()}, deadline, missed
+            )
+            hits = {hit.doc_id: hit for part in hit_parts.values() for hit in part}
+            results = [hits[doc_id] for doc_id, _ in page if doc_id in hits]
+            candidates = len(fused)
+        else:
+            parts = await self._scatter(
+                _shard_search, {n: (query, k, mode, corpus_stats, filter, facets) for n in shards}, deadline, missed
+            )
+            ranked = [
+                (hit.score, -rank, -shard_no, hit)
+                for shard_no, (shard_hits, _, _) in parts.items()
+                for rank, hit in enumerate(shard_hits)
+            ]
+            results = [item[3] for item in heapq.nlargest(k, ranked, key=lambda item: item[:3])][offset:]
+            candidates = sum(count for _, count, _ in parts.values())
+            facet_counts = merge_facets(shard_facets for _, _, shard_facets in parts.values())
+
+        if missed:
+            logger.warning("Search '%s': %d of %d shards were busy, missed the deadline or failed", query, len(missed), self.n_shards)
+        if stats is not None:
+            stats["candidates"] = candidates
+            stats["shards_missed"] = len(missed)
+            if facets:
+                stats["facets"] = facet_counts
+        return results
+
+    async def facet_counts(
+        self,
+        fields: Sequence[str],
+        filter: Optional[Filter] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Dict[Any, int]]:
+        """
+        Count all documents (matching ``filter``) per metadata value, across shards.
+
+        ``stats`` receives "shards_missed" as in ``search``.
+        """
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        missed: set = set()
+        parts = await self._scatter(_shard_facets, {n: (fields, filter) for n in range(self.n_shards)}, deadline, missed)
+        if stats is not None:
+            stats["shards_missed"] = len(missed)
+        return merge_facets(parts.values())
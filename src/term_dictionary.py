@@ -0,0 +1,198 @@
+"""
+Kamus term untuk pencarian toleran salah ketik di tool 'search'
+Setiap term vocabulary satu segment index diindex per character trigram (dengan
+penanda awal kata "#"). Fragmen query yang tidak ditemukan sebagai substring
+dicocokkan ke term yang awalannya berjarak edit paling banyak 1-2 (Damerau:
+sisip, hapus, ganti, tukar dua huruf bersebelahan). Kandidat diambil dari trigram
+yang sama, diurutkan dari batas atas bobotnya, lalu diverifikasi satu per satu
+sampai hasil terbaik pasti ditemukan atau batas kandidat tercapai.
+"""
+
+import heapq
+from array import array
+from collections import Counter
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+# Fragmen lebih pendek dari ini tidak dicocokkan fuzzy (terlalu banyak tetangga)
+FUZZY_MIN_LENGTH = 4
+# Mulai panjang ini boleh 2 edit, di bawahnya 1 edit
+FUZZY_TWO_EDITS_LENGTH = 8
+# Term hasil ekspansi fuzzy per fragmen (yang bobotnya paling tinggi)
+MAX_FUZZY_TERMS = 8
+# Kandidat trigram yang diverifikasi dengan edit distance, per fragmen per segment
+MAX_FUZZY_CANDIDATES = 256
+# Total posting trigram yang dihitung per fragmen per segment, dari trigram paling
+# jarang; trigram umum sesudahnya dilewati supaya biaya lookup tetap terbatas
+MAX_GRAM_POSTINGS = 16384
+
+# Satu edit merusak paling banyak 3 trigram, transposisi paling banyak 4
+_GRAMS_PER_EDIT = 4
+
+
+def max_edits(fragment: str) -> int:
+    """Edit budget of a query fragment: 0 below ``FUZZY_MIN_LENGTH``, then 1, then 2."""
+    if len(fragment) < FUZZY_MIN_LENGTH:
+        return 0
+    return 1 if len(fragment) < FUZZY_TWO_EDITS_LENGTH else 2
+
+
+def fuzzy_weight(fragment: str, term: str, distance: int) -> float:
+    """
+    Expansion weight of a fuzzy match; below 1 (an exact token) for any distance.
+
+    The correct characters of the fragment count, relative to the length of
+    the term, like the weight of a substring match.
+    """
+    return (len(fragment) - distance) / max(len(term), len(fragment))
+
+
+def best_terms(weights: Dict[str, float], limit: int = MAX_FUZZY_TERMS) -> Dict[str, float]:
+    """The ``limit`` highest-weighted expansions, ties broken by term (deterministic across shards)."""
+    return dict(sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:limit])
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = "#" + word
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_distance(fragment: str, term: str, limit: int) -> int:
+    """
+    Smallest edit distance between ``fragment`` and any prefix of ``term``.
+
+    Optimal string alignment distance (adjacent transpositions count as one
+    edit), computed row by row over the term. Only the diagonal band of
+    width ``2 * limit + 1`` is filled, and the computation stops once every
+    cell of a row exceeds ``limit``.
+
+    Args:
+        fragment: Query fragment
+        term: Indexed term
+        limit: Largest distance of interest
+
+    Returns:
+        The distance, or ``limit + 1`` if it exceeds the limit
+    """
+    n = len(fragment)
+    far = limit + 1
+    previous2: List[int] = []
+    previous = [x if x <= limit else far for x in range(n + 1)]
+    best = previous[n]
+    for j in range(min(len(term), n + limit)):
+        ch = term[j]
+        row = [far] * (n + 1)
+        if j < limit:
+            row[0] = j + 1
+        row_min = row[0]
+        for x in range(max(1, j + 1 - limit), min(n, j + 1 + limit) + 1):
+            value = previous[x - 1] + (fragment[x - 1] != ch)
+            if previous[x] + 1 < value:
+                value = previous[x] + 1
+            if row[x - 1] + 1 < value:
+                value = row[x - 1] + 1
+            if x > 1 and j > 0 and fragment[x - 1] == term[j - 1] and fragment[x - 2] == ch and previous2[x - 2] + 1 < value:
+                value = previous2[x - 2] + 1
+            row[x] = value if value < far else far
+            if value < row_min:
+                row_min = value
+        if row[n] < best:
+            best = row[n]
+        if row_min > limit:
+            break
+        previous2, previous = previous, row
+    return best if best <= limit else far
+
+
+class TermDictionary:
+    """
+    Character-trigram index over the vocabulary of one index segment.
+
+    ``lookup`` finds the terms whose prefix is within a few edits of a query
+    fragment, so "chatgtp" reaches "chatgpt" and "integrasi" reaches
+    "integration". Each edit destroys at most four trigrams of the fragment,
+    which gives both a minimum number of shared trigrams and, per candidate,
+    a lower bound on its distance. Candidates are verified in order of their
+    best possible weight and the search stops as soon as no unverified
+    candidate can beat the results found, or after ``MAX_FUZZY_CANDIDATES``
+    verifications.
+
+    Shared trigrams are counted from the fragment's rarest trigram up until
+    ``MAX_GRAM_POSTINGS`` term numbers have been read (the rarest trigram is
+    always counted), so the cost of a lookup does not grow with the
+    vocabulary. The distance bounds only use the trigrams counted; a term
+    sharing nothing but very common trigrams with the fragment is not
+    considered.
+
+    Built when the segment is finalized (well under a second for 50k terms)
+    and never modified afterwards. An index snapshot stores the trigram
+    postings, so a loaded segment passes them in as ``grams`` instead of
+    rebuilding them.
+    """
+
+    def __init__(self, terms: Sequence[str], grams: Optional[Mapping[str, Sequence[int]]] = None) -> None:
+        self.terms = terms
+        if grams is None:
+            # Trigram -> nomor term (naik), dari vocabulary yang sudah terurut
+            built: Dict[str, array] = {}
+            for term_no, term in enumerate(terms):
+                for gram in _trigrams(term):
+                    term_nos = built.get(gram)
+                    if term_nos is None:
+                        term_nos = built[gram] = array("I")
+                    term_nos.append(term_no)
+            grams = built
+        self._grams = grams
+
+    def lookup(self, fragment: str, edits: int, limit: int = MAX_FUZZY_TERMS) -> Dict[str, float]:
+        """
+        Find the best terms within ``edits`` edits of a fragment (prefix match).
+
+        Args:
+            fragment: Lowercase query fragment
+            edits: Maximum edit distance (see ``max_edits``)
+            limit: Maximum number of terms to return
+
+        Returns:
+            Mapping of term to ``fuzzy_weight``, the ``limit`` highest weights
+            (ties broken by term)
+        """
+        if edits <= 0:
+            return {}
+        empty = array("I")
+        shared: Counter = Counter()
+        counted = 0
+        budget = MAX_GRAM_POSTINGS
+        for term_nos in sorted((self._grams.get(gram, empty) for gram in _trigrams(fragment)), key=len):
+            budget -= len(term_nos)
+            if counted and budget < 0:
+                break
+            shared.update(term_nos)
+            counted += 1
+
+        n = len(fragment)
+        per_edit = _GRAMS_PER_EDIT
+        # (-batas atas bobot, -trigram yang sama, nomor term): kandidat paling menjanjikan lebih dulu
+        candidates: List[Tuple[float, int, int]] = []
+        for term_no, count in shared.items():
+            # Batas bawah jarak dari jumlah trigram (yang dihitung) yang hilang
+            lower = -(-(counted - count) // per_edit)
+            if lower <= edits:
+                candidates.append((-(n - lower) / max(len(self.terms[term_no]), n), -count, term_no))
+        candidates.sort()
+
+        found: Dict[str, float] = {}
+        # Min-heap bobot ``limit`` hasil terbaik sejauh ini
+        top: List[float] = []
+        for checked, (neg_bound, _, term_no) in enumerate(candidates):
+            if checked >= MAX_FUZZY_CANDIDATES or (len(top) >= limit and top[0] > -neg_bound):
+                # Tidak ada kandidat tersisa yang bisa masuk hasil
+                break
+            term = self.terms[term_no]
+            distance = prefix_distance(fragment, term, edits)
+            if distance <= edits:
+                weight = found[term] = fuzzy_weight(fragment, term, distance)
+                if len(top) < limit:
+                    heapq.heappush(top, weight)
+                else:
+                    heapq.heappushpop(top, weight)
+        return best_terms(found, limit)
@@ -0,0 +1,192 @@
+"""
+App HTTP server MCP: transport SSE dan/atau streamable HTTP di satu port
+Transport "sse" (GET /sse + POST /messages/), "http" (streamable HTTP di satu
+endpoint, default /mcp) atau "both" (keduanya, dengan route tambahan seperti
+/stats hanya sekali). Body respons yang besar dikompres gzip/deflate bila client
+mengirim Accept-Encoding yang sesuai.
+"""
+
+import asyncio
+import zlib
+from typing import List, Optional
+
+from starlette.middleware import Middleware
+
+TRANSPORTS = ("sse", "http", "both")
+
+# Content type stream: dikirim per event, jadi tidak bisa di-buffer
+_STREAM_TYPES = (b"text/event-stream",)
+# wbits zlib: 31 = format gzip, 15 = format zlib (yang dipakai "deflate" di HTTP)
+_WBITS = {"gzip": 31, "deflate": 15}
+# Body sebesar ini atau lebih dikompres di thread, bukan di event loop
+COMPRESS_IN_THREAD_BYTES = 128 * 1024
+COMPRESS_LEVEL = 6
+
+
+def _negotiate(accept_encoding: str) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header: "gzip", "deflate" or None."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    for coding in ("gzip", "deflate"):
+        if coding in accepted:
+            return coding
+    return None
+
+
+def _compress(body: bytes, coding: str) -> bytes:
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, _WBITS[coding])
+    return compressor.compress(body) + compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing HTTP response bodies with gzip or deflate.
+
+    The encoding follows the request's Accept-Encoding (gzip preferred over
+    deflate). Ordinary responses are buffered and compressed when they reach
+    ``minimum_size`` bytes, on a thread from ``COMPRESS_IN_THREAD_BYTES`` up.
+    An event stream answering a POST (a streamable HTTP call with its
+    progress notifications) whose first chunk reaches ``minimum_size`` is
+    compressed chunk by chunk with a sync flush, so every event still
+    reaches the client at once. Long-lived GET event
+    streams (``/sse``) and responses that already have a Content-Encoding
+    pass through unchanged.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+                break
+        coding = _negotiate(accept_encoding.decode("latin-1"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        parts: List[bytes] = []
+        # None = buffer dulu, "stream" = kompres per chunk bila chunk pertama cukup
+        # besar, "pass" = teruskan apa adanya
+        mode = None
+        compressor = None
+
+        def encoded_headers(headers) -> List:
+            headers = [(name, value) for name, value in headers if name != b"content-length"]
+            return headers + [(b"content-encoding", coding.encode("ascii")), (b"vary", b"Accept-Encoding")]
+
+        async def send_compressed(message) -> None:
+            nonlocal start, mode, compressor
+            if mode == "pass":
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = b""
+                for name, value in headers:
+                    if name == b"content-encoding":
+                        mode = "pass"
+                    elif name == b"content-type":
+                        content_type = value.split(b";")[0].strip()
+                if mode != "pass" and content_type in _STREAM_TYPES:
+                    mode = "pass" if scope["method"] == "GET" else "stream"
+                if mode == "pass":
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            more_body = message.get("more_body", False)
+            if mode == "stream":
+                if compressor is None:
+                    if not message.get("body") and more_body:
+                        return
+                    if len(message.get("body", b"")) < self.minimum_size:
+                        mode = "pass"
+                        await send(start)
+                        await send(message)
+                        return
+                    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, _WBITS[coding])
+                    await send(dict(start, headers=encoded_headers(start.get("headers", []))))
+                data = compressor.compress(message.get("body", b""))
+                data += compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            parts.append(message.get("body", b""))
+            if more_body:
+                return
+            body = b"".join(parts)
+            if len(body) >= self.minimum_size:
+                if len(body) >= COMPRESS_IN_THREAD_BYTES:
+                    body = await asyncio.to_thread(_compress, body, coding)
+                else:
+                    body = _compress(body, coding)
+                headers = encoded_headers(start.get("headers", []))
+            else:
+                headers = [(name, value) for name, value in start.get("headers", []) if name != b"content-length"]
+            headers.append((b"content-length", str(len(body)).encode("ascii")))
+            await send(dict(start, headers=headers))
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def build_app(
+    mcp,
+    transport: str,
+    http_path: str = "/mcp",
+    middleware: Optional[List[Middleware]] = None,
+    json_response: bool = False,
+    compress_min_bytes: int = 0
+):
+    """
+    Build the ASGI app serving the MCP server over the chosen transport(s).
+
+    Args:
+        mcp: The FastMCP server
+        transport: "sse", "http" (streamable HTTP) or "both"
+        http_path: Endpoint of the streamable HTTP transport
+        middleware: ASGI middleware around the whole app
+        json_response: Answer streamable HTTP POSTs with a plain JSON body
+            instead of an SSE stream (progress notifications are then lost)
+        compress_min_bytes: Compress bodies from this size on; 0 disables it
+
+    Returns:
+        The Starlette app; its lifespan starts the streamable HTTP session manager
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport '{transport}'. Use: {', '.join(TRANSPORTS)}")
+    middleware = list(middleware or [])
+    if compress_min_bytes > 0:
+        middleware.append(Middleware(CompressionMiddleware, minimum_size=compress_min_bytes))
+    if transport == "sse":
+        return mcp.http_app(transport="sse", middleware=middleware)
+
+    app = mcp.http_app(transport="http", path=http_path, middleware=middleware, json_response=json_response)
+    if transport == "both":
+        # Route SSE (/sse dan /messages/) dipindah ke app streamable HTTP; lifespan
+        # app itu sudah menjalankan lifespan server MCP, jadi app SSE tidak dijalankan
+        sse_app = mcp.http_app(transport="sse")
+        known = {getattr(route, "path", None) for route in app.router.routes}
+        app.router.routes.extend(route for route in sse_app.router.routes if getattr(route, "path", None) not in known)
+    return app
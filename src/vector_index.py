@@ -0,0 +1,224 @@
+"""
+Vector search untuk tool 'search' (mode "vector" dan "hybrid")
+Embedding lokal/offline dengan feature hashing (kata + character trigram),
+disimpan dalam satu matriks float32 contiguous di NumPy.
+"""
+
+import math
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy hanya wajib kalau vector search diaktifkan
+    np = None
+
+# Corpus sekecil ini cukup di-scan flat; di atasnya pakai IVF (cluster-pruned)
+IVF_MIN_DOCS = 10000
+# Jumlah sampel untuk training centroid k-means
+IVF_TRAIN_SAMPLE = 50000
+IVF_TRAIN_ITERATIONS = 10
+# Baris per batch saat assign cluster, supaya matriks skor sementara tetap kecil
+_ASSIGN_BATCH = 65536
+# Jumlah token yang fitur hash-nya di-cache (LRU); kosakata corpus dan kata query
+# yang pernah dilihat tidak lagi disimpan selamanya
+FEATURE_CACHE_SIZE = 65536
+
+
+def require_numpy() -> None:
+    """Raise a clear error when vector search is used without NumPy."""
+    if np is None:
+        raise RuntimeError("Vector search requires numpy (pip install numpy)")
+
+
+class HashingEmbedder:
+    """
+    Offline text embedder based on signed feature hashing.
+
+    Each token contributes the token itself plus its character trigrams
+    (with "#" word boundaries), weighted by sublinear term frequency. Features
+    are hashed with CRC32, which is stable across processes, into ``dim``
+    buckets with a hash-derived sign. Vectors are L2-normalized, so a dot
+    product is the cosine similarity. Typos and inflections still share most
+    trigrams, which gives better recall than exact keyword matching.
+
+    The hashed features of the most recently used ``feature_cache_size``
+    tokens are cached, so memory stays bounded however many distinct tokens
+    the corpus and queries bring.
+    """
+
+    def __init__(self, dim: int = 256, feature_cache_size: int = FEATURE_CACHE_SIZE) -> None:
+        require_numpy()
+        self.dim = dim
+        # lru_cache (C, thread-safe) per instance: lebih murah dari LRUCache
+        # untuk jutaan lookup saat indexing
+        self._token_features = lru_cache(maxsize=feature_cache_size)(self._hash_features)
+
+    def _hash_features(self, token: str) -> Tuple["np.ndarray", "np.ndarray"]:
+        padded = f"#{token}#"
+        grams = [token] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        hashes = np.array([zlib.crc32(g.encode("utf-8")) for g in grams], dtype=np.uint32)
+        buckets = (hashes % self.dim).astype(np.intp)
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        return buckets, signs
+
+    def embed_tokens(self, tokens: Iterable[str]) -> "np.ndarray":
+        """
+        Embed a token sequence.
+
+        Args:
+            tokens: Lowercase tokens (see ``search_index.tokenize``)
+
+        Returns:
+            L2-normalized float32 vector of length ``dim`` (all zeros for no tokens)
+        """
+        buckets: List["np.ndarray"] = []
+        weights: List["np.ndarray"] = []
+        for token, count in Counter(tokens).items():
+            token_buckets, signs = self._token_features(token)
+            buckets.append(token_buckets)
+            weights.append(signs * (1.0 + math.log(count)))
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if buckets:
+            vector += np.bincount(
+                np.concatenate(buckets),
+                weights=np.concatenate(weights),
+                minlength=self.dim
+            ).astype(np.float32)
+            norm = float(np.linalg.norm(vector))
+            if norm > 0:
+                vector /= norm
+        return vector
+
+
+class VectorIndex:
+    """
+    Document vectors of one index segment in a contiguous float32 matrix.
+
+    Small segments are scored with a single matrix-vector product. Segments
+    with at least ``IVF_MIN_DOCS`` documents get an IVF index: rows are
+    clustered with spherical k-means and stored grouped by cluster, so a query
+    only multiplies the contiguous row ranges of its ``nprobe`` nearest
+    clusters.
+    """
+
+    def __init__(
+        self,
+        matrix: "np.ndarray",
+        ords: "np.ndarray",
+        centroids: Optional["np.ndarray"] = None,
+        offsets: Optional["np.ndarray"] = None
+    ) -> None:
+        self.matrix = matrix
+        # Baris matriks -> ordinal dokumen di segment, dan sebaliknya
+        self.ords = ords
+        self._rows = np.empty(len(ords), dtype=np.int64)
+        self._rows[ords] = np.arange(len(ords))
+        self.centroids = centroids
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, vectors: List["np.ndarray"], dim: int) -> "VectorIndex":
+        """
+        Build an index from per-document vectors in ordinal order.
+
+        Args:
+            vectors: One normalized vector per document
+            dim: Vector dimension
+
+        Returns:
+            Flat index for small inputs, IVF index for large ones
+        """
+        matrix = np.ascontiguousarray(np.vstack(vectors)) if vectors else np.zeros((0, dim), np.float32)
+        ords = np.arange(len(matrix), dtype=np.int64)
+        if len(matrix) < IVF_MIN_DOCS:
+            return cls(matrix, ords)
+
+        centroids = _train_centroids(matrix, int(math.sqrt(len(matrix))))
+        assignments = np.concatenate([
+            np.argmax(matrix[i:i + _ASSIGN_BATCH] @ centroids.T, axis=1)
+            for i in range(0, len(matrix), _ASSIGN_BATCH)
+        ])
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(np.ascontiguousarray(matrix[order]), ords[order], centroids, offsets)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def rows_for(self, ords: "np.ndarray") -> "np.ndarray":
+        """Vectors of the given document ordinals, in that order."""
+        return self.matrix[self._rows[ords]]
+
+    def scores(self, query: "np.ndarray", nprobe: int = 8) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Score documents against a query vector.
+
+        Args:
+            query: Normalized query vector
+            nprobe: Number of nearest clusters to scan (IVF only)
+
+        Returns:
+            (document ordinals, cosine similarities) of the scanned rows
+        """
+        if self.centroids is None:
+            return self.ords, self.matrix @ query
+
+        nearest = np.argsort(self.centroids @ query)[::-1][:nprobe]
+        ords = []
+        sims = []
+        for cluster in nearest:
+            start, end = self.offsets[cluster], self.offsets[cluster + 1]
+            if start < end:
+                ords.append(self.ords[start:end])
+                sims.append(self.matrix[start:end] @ query)
+        if not ords:
+            return self.ords[:0], np.zeros(0, dtype=np.float32)
+        return np.concatenate(ords), np.concatenate(sims)
+
+
+def _train_centroids(matrix: "np.ndarray", n_lists: int) -> "np.ndarray":
+    """Spherical k-means on a sample of rows."""
+    rng = np.random.default_rng(0)
+    sample_size = min(len(matrix), IVF_TRAIN_SAMPLE)
+    sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+    for _ in range(IVF_TRAIN_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        # Cluster kosong mempertahankan centroid lamanya
+        nonempty = counts > 0
+        sums = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids[nonempty] = sums / norms
+    return np.ascontiguousarray(centroids)
+
+
+def top_k(ords: "np.ndarray", sims: "np.ndarray", k: int) -> List[Tuple[int, float]]:
+    """
+    Select the ``k`` best rows without sorting all of them.
+
+    Args:
+        ords: Document ordinals
+        sims: Similarities aligned with ``ords``
+        k: Number of results
+
+    Returns:
+        (ordinal, similarity) pairs, best first
+    """
+    if k <= 0 or len(sims) == 0:
+        return []
+    if k < len(sims):
+        part = np.argpartition(-sims, k - 1)[:k]
+    else:
+        part = np.arange(len(sims))
+    best = part[np.argsort(-sims[part], kind="stable")]
+    return [(int(ords[i]), float(sims[i])) for i in best]
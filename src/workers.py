@@ -0,0 +1,661 @@
+"""
+Mode multi-worker untuk server MCP
+Parent process membangun corpus + index sekali, lalu fork N worker yang
+mewarisinya. Yang benar-benar dibagi antar worker adalah data di mmap (segment
+dokumen dan snapshot index); object Python lain tersalin sedikit demi sedikit
+karena update reference count mengotori page copy-on-write. Parent menjalankan
+proxy kecil di port publik yang meneruskan request ke worker dengan session
+affinity, dan menjalankan ulang worker yang mati.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qs
+
+import h11
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# Header hop-by-hop yang tidak boleh diteruskan apa adanya
+_HOP_BY_HOP = {
+    b"connection", b"keep-alive", b"proxy-connection", b"te", b"trailer",
+    b"transfer-encoding", b"upgrade", b"content-length", b"host"
+}
+# Koneksi idle ke worker yang disimpan per worker
+_MAX_IDLE_UPSTREAMS = 32
+_READ_SIZE = 65536
+
+# Batas body request yang diteruskan ke worker (sama dengan batas default
+# streamable HTTP di SDK MCP); lebih besar dijawab 413
+MAX_BODY_BYTES = 4 * 1024 * 1024
+# Session streamable HTTP tanpa request selama ini dilupakan proxy. Worker
+# sendiri menutup session setelah 30 menit idle; sesudahnya id-nya hanya
+# menghasilkan 404
+HTTP_SESSION_IDLE_TIMEOUT = 1800 + 60
+# Interval pemeriksaan worker yang mati dan session yang kedaluwarsa (detik)
+SUPERVISE_INTERVAL = 1.0
+# Jeda sebelum worker yang mati dijalankan ulang; berlipat dua selama worker
+# mati lagi dalam RESTART_RESET detik, sampai RESTART_MAX_DELAY
+RESTART_DELAY = 1.0
+RESTART_MAX_DELAY = 30.0
+RESTART_RESET = 60.0
+# Batas waktu worker baru mulai menerima koneksi sebelum dianggap gagal
+WORKER_READY_TIMEOUT = 60.0
+
+
+class _Upstream:
+    """One keep-alive HTTP/1.1 connection from the proxy to a worker."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.conn = h11.Connection(h11.CLIENT)
+
+    async def send(self, event) -> None:
+        data = self.conn.send(event)
+        if data:
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def next_event(self):
+        while True:
+            event = self.conn.next_event()
+            if event is not h11.NEED_DATA:
+                return event
+            self.conn.receive_data(await self.reader.read(_READ_SIZE))
+
+    def reusable(self) -> bool:
+        return self.conn.our_state is h11.DONE and self.conn.their_state is h11.DONE
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _HttpSession:
+    """Worker and activity of one streamable HTTP session."""
+
+    __slots__ = ("worker", "last_seen", "active")
+
+    def __init__(self, worker: int) -> None:
+        self.worker = worker
+        self.last_seen = time.monotonic()
+        # Request (termasuk stream GET) yang sedang berjalan di session ini
+        self.active = 0
+
+
+class WorkerProxy:
+    """
+    ASGI app that forwards HTTP requests to worker processes.
+
+    New SSE streams are spread round-robin over the workers. The proxy reads
+    the ``endpoint`` event at the start of each stream to learn its
+    ``session_id``, and posts to the messages path with that session go to
+    the same worker. On the streamable HTTP path the session is the
+    ``Mcp-Session-Id`` header: the worker that answered the initialize
+    request gets every later request carrying its id. Any other request
+    goes round-robin, skipping workers that are down; if a worker refuses the
+    connection, the next one is tried.
+
+    Request bodies are limited to ``max_body`` bytes. Streamable HTTP
+    sessions are forgotten on DELETE, on a 404 from their worker, when their
+    worker goes down, and after ``session_idle_timeout`` seconds without a
+    request (the worker has closed them by then).
+
+    With a ``supervisor``, the proxy's lifespan also runs a task that every
+    ``SUPERVISE_INTERVAL`` seconds restarts dead workers and expires idle
+    sessions.
+    """
+
+    def __init__(
+        self,
+        ports: List[int],
+        sse_path: str = "/sse",
+        message_path: str = "/messages/",
+        upstream_host: str = "127.0.0.1",
+        http_path: str = "/mcp",
+        max_body: int = MAX_BODY_BYTES,
+        session_idle_timeout: float = HTTP_SESSION_IDLE_TIMEOUT,
+        supervisor: Optional["WorkerSupervisor"] = None
+    ) -> None:
+        self.ports = ports
+        self.sse_path = sse_path
+        self.message_path = message_path
+        self.upstream_host = upstream_host
+        self.http_path = http_path
+        self.max_body = max_body
+        self.session_idle_timeout = session_idle_timeout
+        self.supervisor = supervisor
+        self.sessions: Dict[str, int] = {}
+        # Session streamable HTTP (Mcp-Session-Id) -> worker dan aktivitasnya
+        self.http_sessions: Dict[bytes, _HttpSession] = {}
+        # Worker yang sedang mati atau belum siap setelah restart
+        self.down: Set[int] = set()
+        self._next = 0
+        self._idle: Dict[int, List[_Upstream]] = {worker: [] for worker in range(len(ports))}
+
+    def _round_robin(self) -> Optional[int]:
+        for _ in range(len(self.ports)):
+            worker = self._next % len(self.ports)
+            self._next += 1
+            if worker not in self.down:
+                return worker
+        return None
+
+    def _route(self, scope) -> Optional[int]:
+        path = scope["path"]
+        if path.startswith(self.message_path):
+            query = parse_qs(scope["query_string"].decode("latin-1"))
+            session_id = (query.get("session_id") or [""])[0].replace("-", "")
+            return self.sessions.get(session_id)
+        if path == self.http_path:
+            session_id = _header(scope["headers"], b"mcp-session-id")
+            if session_id is not None:
+                session = self.http_sessions.get(session_id)
+                return session.worker if session is not None else None
+        return self._round_robin()
+
+    def worker_down(self, worker: int) -> None:
+        """Take a dead worker out of rotation and forget its sessions (their state died with it)."""
+        self.down.add(worker)
+        for session_id in [s for s, w in self.sessions.items() if w == worker]:
+            del self.sessions[session_id]
+        for session_id in [s for s, session in self.http_sessions.items() if session.worker == worker]:
+            del self.http_sessions[session_id]
+        for upstream in self._idle[worker]:
+            upstream.close()
+        self._idle[worker] = []
+
+    def worker_up(self, worker: int) -> None:
+        """Put a (restarted) worker back into rotation."""
+        self.down.discard(worker)
+
+    def expire_sessions(self, now: Optional[float] = None) -> int:
+        """Forget streamable HTTP sessions idle for ``session_idle_timeout``; returns how many."""
+        cutoff = (time.monotonic() if now is None else now) - self.session_idle_timeout
+        expired = [
+            session_id for session_id, session in self.http_sessions.items()
+            if not session.active and session.last_seen < cutoff
+        ]
+        for session_id in expired:
+            del self.http_sessions[session_id]
+        return len(expired)
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            self.expire_sessions()
+            if self.supervisor is not None:
+                self.supervisor.check(self)
+
+    async def _connect(self, worker: int) -> _Upstream:
+        idle = self._idle[worker]
+        while idle:
+            upstream = idle.pop()
+            if not upstream.reader.at_eof():
+                return upstream
+            upstream.close()
+        reader, writer = await asyncio.open_connection(self.upstream_host, self.ports[worker])
+        return _Upstream(reader, writer)
+
+    def _release(self, worker: int, upstream: _Upstream) -> None:
+        if upstream.reusable() and len(self._idle[worker]) < _MAX_IDLE_UPSTREAMS:
+            upstream.conn.start_next_cycle()
+            self._idle[worker].append(upstream)
+        else:
+            upstream.close()
+
+    async def _lifespan(self, receive, send) -> None:
+        maintain = None
+        while (await receive())["type"] != "lifespan.shutdown":
+            maintain = asyncio.ensure_future(self._maintain())
+            await send({"type": "lifespan.startup.complete"})
+        if maintain is not None:
+            maintain.cancel()
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        await send({"type": "lifespan.shutdown.complete"})
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        worker = self._route(scope)
+        if worker is None:
+            if self.down and len(self.down) == len(self.ports):
+                await _plain_response(send, 503, b"No worker available")
+            else:
+                await _plain_response(send, 404, b"Could not find session")
+            return
+
+        declared = _header(scope["headers"], b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_body:
+            await _plain_response(send, 413, b"Request body too large")
+            return
+        chunks: List[bytes] = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body:
+                await _plain_response(send, 413, b"Request body too large")
+                return
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        session = None
+        if scope["path"] == self.http_path:
+            session_id = _header(scope["headers"], b"mcp-session-id")
+            session = self.http_sessions.get(session_id) if session_id is not None else None
+        if session is not None:
+            session.active += 1
+        try:
+            await self._forward(scope, receive, send, worker, body)
+        finally:
+            if session is not None:
+                session.active -= 1
+                session.last_seen = time.monotonic()
+
+    async def _forward(self, scope, receive, send, worker: int, body: bytes) -> None:
+        target = scope["raw_path"] or scope["path"].encode("utf-8")
+        if scope["query_string"]:
+            target += b"?" + scope["query_string"]
+        headers = [(k, v) for k, v in scope["headers"] if k not in _HOP_BY_HOP]
+        headers += [(b"content-length", str(len(body)).encode("ascii"))]
+        # Request tanpa affinity boleh dicoba ke worker lain bila koneksi ditolak
+        # (worker baru mati dan belum terdeteksi supervisor)
+        affine = scope["path"].startswith(self.message_path) or _header(scope["headers"], b"mcp-session-id") is not None
+        attempts = 1 if affine else max(1, len(self.ports) - len(self.down))
+
+        try:
+            for attempt in range(attempts):
+                try:
+                    upstream = await self._connect(worker)
+                    break
+                except OSError as e:
+                    if attempt + 1 >= attempts:
+                        raise
+                    logger.warning("Worker %s refused connection: %s", worker, e)
+                    next_worker = self._round_robin()
+                    if next_worker is None:
+                        raise
+                    worker = next_worker
+            host = f"{self.upstream_host}:{self.ports[worker]}".encode("ascii")
+            await upstream.send(h11.Request(method=scope["method"], target=target, headers=headers + [(b"host", host)]))
+            if body:
+                await upstream.send(h11.Data(data=body))
+            await upstream.send(h11.EndOfMessage())
+            response = await upstream.next_event()
+        except (OSError, h11.ProtocolError) as e:
+            logger.warning("Worker %s unavailable: %s", worker, e)
+            await _plain_response(send, 502, b"Worker unavailable")
+            return
+
+        if scope["path"] == self.http_path:
+            self._track_http_session(scope, worker, response)
+
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [(k, v) for k, v in response.headers if k not in _HOP_BY_HOP]
+        })
+        if scope["path"] == self.sse_path:
+            await self._relay_stream(worker, upstream, receive, send)
+        elif scope["path"] == self.http_path and scope["method"] == "GET":
+            # Stream notifikasi streamable HTTP: terbuka sampai client putus
+            await self._relay_stream(worker, upstream, receive, send, track_session=False)
+        else:
+            await self._relay(upstream, send)
+            self._release(worker, upstream)
+
+    async def _relay(self, upstream: _Upstream, send, on_data: Optional[Callable[[bytes], None]] = None) -> None:
+        try:
+            while True:
+                event = await upstream.next_event()
+                if isinstance(event, h11.Data):
+                    if on_data:
+                        on_data(event.data)
+                    await send({"type": "http.response.body", "body": bytes(event.data), "more_body": True})
+                elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                    break
+        except (OSError, h11.ProtocolError) as e:
+            # Status sudah terkirim; cukup tutup respons ke client
+            logger.warning("Worker response interrupted: %s", e)
+        await send({"type": "http.response.body", "body": b""})
+
+    def _track_http_session(self, scope, worker: int, response) -> None:
+        """Remember which worker owns a streamable HTTP session, and forget ended ones."""
+        session_id = _header(scope["headers"], b"mcp-session-id")
+        if session_id is None:
+            # Initialize: worker menetapkan id session di header respons
+            session_id = _header(response.headers, b"mcp-session-id")
+            if session_id is not None and response.status_code < 400:
+                self.http_sessions[session_id] = _HttpSession(worker)
+        elif scope["method"] == "DELETE" or response.status_code == 404:
+            self.http_sessions.pop(session_id, None)
+
+    async def _relay_stream(self, worker: int, upstream: _Upstream, receive, send, track_session: bool = True) -> None:
+        """Relay an SSE stream until either side disconnects, tracking its SSE session."""
+        session: List[str] = []
+        buffer = bytearray()
+
+        def learn_session(data: bytes) -> None:
+            # Event pertama dari server adalah "endpoint" berisi ?session_id=...
+            if session or len(buffer) > _READ_SIZE:
+                return
+            buffer.extend(data)
+            marker = buffer.find(b"session_id=")
+            if marker >= 0:
+                end = marker + len(b"session_id=")
+                while end < len(buffer) and chr(buffer[end]) not in "\r\n&":
+                    end += 1
+                if end < len(buffer):
+                    session_id = buffer[marker + len(b"session_id="):end].decode("ascii", "ignore")
+                    session.append(session_id.replace("-", ""))
+                    self.sessions[session[0]] = worker
+
+        async def wait_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        relay = asyncio.ensure_future(self._relay(upstream, send, learn_session if track_session else None))
+        disconnect = asyncio.ensure_future(wait_disconnect())
+        try:
+            await asyncio.wait({relay, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (relay, disconnect):
+                task.cancel()
+            upstream.close()
+            if session:
+                self.sessions.pop(session[0], None)
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+async def _plain_response(send, status: int, body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(body)).encode("ascii"))]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def memory_usage() -> Optional[Dict[str, int]]:
+    """
+    Memory of this process in bytes: RSS, PSS and USS.
+
+    RSS counts every resident page, shared or not, so forked workers look as
+    if each held a full copy. PSS splits shared pages between the processes
+    mapping them (the PSS of all workers adds up to the real total) and USS
+    counts only this process's private pages. Read from
+    ``/proc/self/smaps_rollup``; None where that is not available.
+    """
+    fields: Dict[str, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[name] = int(parts[0]) * 1024
+    except OSError:
+        return None
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+def _exit_with_parent(parent_pid: int) -> None:
+    """Stop a worker once the parent process is gone."""
+    def watch() -> None:
+        while os.getppid() == parent_pid:
+            threading.Event().wait(1.0)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=watch, name="parent-watch", daemon=True).start()
+
+
+def _release_inherited_sockets() -> None:
+    """
+    Detach a forked worker from the TCP sockets of its parent.
+
+    A worker restarted by the proxy process inherits the proxy's listening
+    socket and its connections to the other workers. As long as a copy of a
+    connection stays open, closing it in the proxy never reaches the worker
+    at the other end (an SSE session would outlive its client). Each such
+    descriptor is pointed at /dev/null instead of closed, so a stale socket
+    object closing its number later cannot hit a reused descriptor.
+    """
+    try:
+        fds = [int(fd) for fd in os.listdir("/proc/self/fd")]
+    except OSError:
+        return
+    devnull = os.open(os.devnull, os.O_RDWR)
+    try:
+        for fd in fds:
+            if fd <= 2 or fd == devnull:
+                continue
+            try:
+                sock = socket.socket(fileno=fd)
+            except OSError:
+                continue
+            family = sock.family
+            sock.detach()
+            if family in (socket.AF_INET, socket.AF_INET6):
+                os.dup2(devnull, fd)
+    finally:
+        os.close(devnull)
+
+
+class WorkerSupervisor:
+    """
+    Starts worker processes and restarts the ones that exit.
+
+    ``check`` runs on the proxy's event loop: a dead worker is taken out of
+    the proxy's rotation at once and forked again after ``RESTART_DELAY``
+    seconds (doubling while it keeps dying within ``RESTART_RESET`` seconds).
+    The fork happens on an executor thread, so the child does not start
+    inside the proxy's running event loop. The worker rejoins the rotation
+    once its port accepts connections.
+    """
+
+    def __init__(self, spawn: Callable[[int], int], workers: int) -> None:
+        self.spawn = spawn
+        self.pids: Dict[int, Optional[int]] = {worker: None for worker in range(workers)}
+        self.started: Dict[int, float] = {}
+        self.failures: Dict[int, int] = {worker: 0 for worker in range(workers)}
+        self.restarts = 0
+        self.stopped = False
+        self._restarting: Set[int] = set()
+
+    def start_all(self) -> None:
+        """Fork every worker (before the proxy starts)."""
+        for worker in self.pids:
+            self.pids[worker] = self.spawn(worker)
+            self.started[worker] = time.monotonic()
+
+    def check(self, proxy: WorkerProxy) -> None:
+        """Reap exited workers and schedule their restart."""
+        if self.stopped:
+            return
+        for worker, pid in self.pids.items():
+            if pid is None or worker in self._restarting:
+                continue
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, 0
+            if not done:
+                continue
+            self.pids[worker] = None
+            logger.warning("Worker %s (pid %s) exited with status %s; restarting", worker, pid, status)
+            proxy.worker_down(worker)
+            if time.monotonic() - self.started.get(worker, 0.0) < RESTART_RESET:
+                self.failures[worker] += 1
+            else:
+                self.failures[worker] = 0
+            delay = min(RESTART_MAX_DELAY, RESTART_DELAY * 2 ** max(self.failures[worker] - 1, 0))
+            self._restarting.add(worker)
+            asyncio.ensure_future(self._restart(proxy, worker, delay))
+
+    async def _restart(self, proxy: WorkerProxy, worker: int, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+            if self.stopped:
+                return
+            pid = await asyncio.get_running_loop().run_in_executor(None, self.spawn, worker)
+            self.pids[worker] = pid
+            self.started[worker] = time.monotonic()
+            self.restarts += 1
+            if await _wait_ready(proxy.upstream_host, proxy.ports[worker], WORKER_READY_TIMEOUT):
+                proxy.worker_up(worker)
+                logger.info("Worker %s restarted (pid %s)", worker, pid)
+            else:
+                # Mati atau macet saat start: dihentikan, check berikutnya mencoba lagi
+                logger.warning("Worker %s (pid %s) did not start listening; stopping it", worker, pid)
+                _terminate(pid, wait=False)
+        finally:
+            self._restarting.discard(worker)
+
+    def stop(self) -> None:
+        """Stop restarting workers (proxy shutdown)."""
+        self.stopped = True
+
+    def terminate(self) -> None:
+        """SIGTERM every worker and wait for it."""
+        self.stopped = True
+        for pid in self.pids.values():
+            if pid is not None:
+                _terminate(pid)
+
+
+async def _wait_ready(host: str, port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        return True
+    return False
+
+
+def _terminate(pid: int, wait: bool = True) -> None:
+    try:
+        os.kill(pid, signal.SIGTERM)
+        if wait:
+            os.waitpid(pid, 0)
+    except (ProcessLookupError, ChildProcessError):
+        pass
+
+
+def run_workers(
+    app_factory: Callable[[], object],
+    host: str,
+    port: int,
+    workers: int,
+    worker_base_port: int,
+    on_worker_start: Optional[Callable[[int], None]] = None,
+    access_log: bool = True,
+    timeout_keep_alive: int = 5,
+    http_path: str = "/mcp"
+) -> None:
+    """
+    Fork worker processes and run the session-affine proxy in this process.
+
+    Everything built before this call (document store, search index) is
+    inherited by the workers. Only mapped data stays shared for good:
+    documents in a segment file and an index loaded from a snapshot are
+    mmaps served from the page cache. Other Python objects are copy-on-write,
+    and reading one updates its reference count, so each worker gradually
+    copies the pages it touches. ``gc.freeze()`` only keeps the garbage
+    collector from touching all of them at once. ``memory_usage`` (PSS/USS,
+    in ``/stats``) shows how much each worker really holds.
+
+    A worker that exits is forked again from this process by a
+    ``WorkerSupervisor`` and inherits the same data.
+
+    Args:
+        app_factory: Builds the ASGI app each worker serves
+        host: Public host for the proxy
+        port: Public port for the proxy
+        workers: Number of worker processes
+        worker_base_port: Worker i listens on 127.0.0.1:worker_base_port + i
+        on_worker_start: Called in each worker after the fork (e.g. to start
+            background threads, which do not survive a fork)
+        access_log: Let uvicorn log every HTTP request of the proxy
+        timeout_keep_alive: Seconds an idle keep-alive connection stays open,
+            for clients of the proxy and for the proxy's connections to workers
+        http_path: Streamable HTTP endpoint (session affinity by header)
+    """
+    ports = [worker_base_port + i for i in range(workers)]
+    parent_pid = os.getpid()
+    gc.collect()
+    gc.freeze()
+
+    def spawn(worker: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                _release_inherited_sockets()
+                _exit_with_parent(parent_pid)
+                if on_worker_start:
+                    on_worker_start(worker)
+                uvicorn.run(
+                    app_factory(),
+                    host="127.0.0.1",
+                    port=ports[worker],
+                    log_level="warning",
+                    timeout_keep_alive=timeout_keep_alive,
+                    log_config=None
+                )
+            except BaseException:
+                logger.exception("Worker %s crashed", worker)
+                status = 1
+            finally:
+                # os._exit melewati atexit: tulis log yang masih di antrean dulu
+                logging.shutdown()
+                os._exit(status)
+        logger.info("Worker %s started (pid %s, port %s)", worker, pid, ports[worker])
+        return pid
+
+    supervisor = WorkerSupervisor(spawn, workers)
+    supervisor.start_all()
+    try:
+        uvicorn.run(
+            WorkerProxy(ports, http_path=http_path, supervisor=supervisor),
+            host=host,
+            port=port,
+            access_log=access_log,
+            timeout_keep_alive=timeout_keep_alive,
+            # dictConfig bawaan uvicorn menutup handler antrean root (QueueLogging)
+            log_config=None
+        )
+    finally:
+        supervisor.terminate()
@@ -0,0 +1,9 @@
+"""
+Konfigurasi pytest: modul server ada di src/ dan diimpor dengan nama polos
+(seperti saat server dijalankan dari folder src).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
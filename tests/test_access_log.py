@@ -0,0 +1,33 @@
+"""Konfigurasi sampling dan batas laju access log."""
+
+import pytest
+
+from access_log import AccessLog, parse_rates
+
+
+def test_parse_rates():
+    assert parse_rates("search=0.1, *=1") == {"search": 0.1, "*": 1.0}
+    assert parse_rates("search=50") == {"search": 50.0}
+    assert parse_rates("") == {}
+
+
+@pytest.mark.parametrize("spec", ["search=1.5", "search=-1", "search", "=0.5", "search=abc", "search=nan"])
+def test_parse_rates_rejects_invalid_sample(spec):
+    with pytest.raises(ValueError):
+        parse_rates(spec, maximum=1.0)
+
+
+def test_unregistered_tools_share_the_default_bucket():
+    access_log = AccessLog({}, {"search": 1.0, "*": 1.0}, tools=["search", "fetch"])
+    assert set(access_log._buckets) == {"search", "fetch", "*"}
+
+    assert access_log.keep("search", 1.0, False)
+    assert not access_log.keep("search", 1.0, False)
+    # Nama acak dari client tidak menambah bucket dan berbagi kuota "*"
+    assert access_log.keep("bogus-1", 1.0, False)
+    assert not access_log.keep("bogus-2", 1.0, False)
+    assert set(access_log._buckets) == {"search", "fetch", "*"}
+    # Error dan call lambat selalu dicatat
+    assert access_log.keep("bogus-3", 1.0, True)
+    assert access_log.keep("bogus-4", 5000.0, False)
+    assert access_log.stats() == {"logged": 4, "sampled_out": 0, "rate_limited": 2}
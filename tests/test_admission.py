@@ -0,0 +1,196 @@
+"""Admission control: antrean, batas laju, error JSON-RPC, dan batas session MCP."""
+
+import asyncio
+
+import pytest
+from fastmcp import Client, FastMCP
+from mcp.shared.exceptions import MCPError
+
+from admission import OVERLOADED_ERROR, AdmissionController, AdmissionMiddleware, StreamLimitMiddleware
+
+
+def _scope(method, path, session_id=None):
+    headers = [(b"mcp-session-id", session_id.encode())] if session_id else []
+    return {"type": "http", "method": method, "path": path, "headers": headers}
+
+
+async def _status(middleware, scope):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages[0]["status"]
+
+
+def _mcp_app(release=None):
+    """App MCP palsu: initialize memberi id baru, id yang tidak dikenal dijawab 404."""
+    known = set()
+    created = []
+
+    async def app(scope, receive, send):
+        headers = dict(scope["headers"])
+        session_id = headers.get(b"mcp-session-id")
+        status, response_headers = 200, []
+        if session_id is None and scope["method"] == "POST":
+            session_id = f"s{len(created)}".encode()
+            created.append(session_id)
+            known.add(session_id)
+            response_headers.append((b"mcp-session-id", session_id))
+        elif session_id is not None and session_id not in known:
+            status = 404
+        elif scope["method"] == "DELETE":
+            known.discard(session_id)
+        elif scope["method"] == "GET" and release is not None:
+            await release.wait()
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+def test_sse_streams_and_http_sessions_share_the_cap():
+    async def run():
+        controller = AdmissionController(max_sessions=2)
+        release = asyncio.Event()
+        middleware = StreamLimitMiddleware(_mcp_app(release), controller, paths=("/sse", "/mcp"))
+        stream = asyncio.create_task(_status(middleware, _scope("GET", "/sse")))
+        await asyncio.sleep(0)
+        assert controller.sessions_open == 1
+
+        # Session JSON response: tidak pernah membuka stream GET, tetap dihitung
+        assert await _status(middleware, _scope("POST", "/mcp")) == 200
+        assert controller.sessions_open == 2 and list(controller.http_sessions) == [b"s0"]
+
+        statuses = [
+            await _status(middleware, _scope("GET", "/sse")),
+            await _status(middleware, _scope("POST", "/mcp/")),
+            await _status(middleware, _scope("POST", "/mcp", "s0")),
+            await _status(middleware, _scope("POST", "/messages/"))
+        ]
+        release.set()
+        assert await stream == 200
+        assert controller.sessions_open == 1
+        return statuses, controller.rejected["sessions"]
+
+    statuses, rejected = asyncio.run(run())
+    # Session baru ditolak; call session yang ada dan /messages/ lolos
+    assert statuses == [503, 503, 200, 200]
+    assert rejected == 2
+
+
+def test_http_session_ends_on_delete_404_or_idle_timeout():
+    async def run():
+        controller = AdmissionController(max_sessions=1, session_idle_timeout=60)
+        middleware = StreamLimitMiddleware(_mcp_app(), controller, paths=("/mcp",))
+
+        assert await _status(middleware, _scope("POST", "/mcp")) == 200
+        assert await _status(middleware, _scope("POST", "/mcp")) == 503
+        assert await _status(middleware, _scope("DELETE", "/mcp", "s0")) == 200
+        assert controller.sessions_open == 0
+
+        assert await _status(middleware, _scope("POST", "/mcp")) == 200
+        # Server sudah tidak mengenal id ini (mis. restart): 404 mengakhiri session
+        controller.http_sessions[b"gone"] = controller.http_sessions.pop(b"s1")
+        assert await _status(middleware, _scope("POST", "/mcp", "gone")) == 404
+        assert controller.sessions_open == 0
+
+        assert await _status(middleware, _scope("POST", "/mcp")) == 200
+        session = controller.http_sessions[b"s2"]
+        assert controller.expire_sessions(session.last_seen + 30) == 0
+        session.active = 1
+        assert controller.expire_sessions(session.last_seen + 120) == 0
+        session.active = 0
+        assert controller.expire_sessions(session.last_seen + 120) == 1
+        assert await _status(middleware, _scope("POST", "/mcp")) == 200
+
+    asyncio.run(run())
+
+
+def test_calls_wait_in_queue_until_a_slot_frees():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_session_concurrent=1, queue_timeout=5)
+        await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("a"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done() and controller.queued == 1
+
+        controller.release("a")
+        await asyncio.wait_for(waiter, 1)
+        assert controller.queued == 0 and controller.active == 1
+        controller.release("a")
+        assert controller.active == 0
+        return controller.admitted
+
+    assert asyncio.run(run()) == 2
+
+
+def test_full_queue_and_queue_timeout_are_rejected():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=0.05)
+        await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(MCPError) as full:
+            await controller.acquire("c")
+        with pytest.raises(MCPError) as timeout:
+            await waiter
+        controller.release("a")
+        # Slot global dan slot session "b" tidak bocor setelah timeout
+        await asyncio.wait_for(controller.acquire("b"), 1)
+        controller.release("b")
+        return controller, full.value, timeout.value
+
+    controller, full, timeout = asyncio.run(run())
+    assert full.error.code == OVERLOADED_ERROR and full.error.data["reason"] == "queue_full"
+    assert timeout.error.data == {"reason": "queue_timeout", "retry_after": 0.05}
+    assert controller.rejected["queue_full"] == 1 and controller.rejected["queue_timeout"] == 1
+    assert controller.active == 0 and controller.queued == 0
+
+
+def test_session_rate_limit():
+    async def run():
+        controller = AdmissionController(session_rate=0.5, session_burst=2)
+        for _ in range(2):
+            await controller.acquire("a")
+            controller.release("a")
+        with pytest.raises(MCPError) as limited:
+            await controller.acquire("a")
+        # Session lain punya bucket sendiri
+        await controller.acquire("b")
+        controller.release("b")
+        return controller, limited.value
+
+    controller, limited = asyncio.run(run())
+    assert limited.error.code == OVERLOADED_ERROR
+    assert limited.error.data["reason"] == "rate_limited"
+    # Token berikutnya datang setelah 1 / 0.5 detik
+    assert 1.5 < limited.error.data["retry_after"] <= 2.0
+    assert controller.rejected["rate_limited"] == 1 and controller.admitted == 3
+
+
+def test_rejection_reaches_client_as_jsonrpc_error():
+    # Tanpa slot dan tanpa antrean: setiap call langsung ditolak
+    controller = AdmissionController(max_concurrent=0, max_queued=0)
+    mcp = FastMCP("admission-test")
+    mcp.add_middleware(AdmissionMiddleware(controller))
+
+    @mcp.tool()
+    def ping() -> str:
+        return "pong"
+
+    async def run():
+        async with Client(mcp) as client:
+            with pytest.raises(MCPError) as rejected:
+                await client.call_tool("ping", {})
+            return rejected.value
+
+    error = asyncio.run(run())
+    assert error.error.code == OVERLOADED_ERROR
+    assert error.error.message == "Server is overloaded, too many calls waiting"
+    assert error.error.data == {"reason": "queue_full", "retry_after": 5.0}
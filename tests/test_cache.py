@@ -0,0 +1,75 @@
+"""LRUCache: urutan LRU, TTL, invalidasi versi corpus, dan batas byte."""
+
+import types
+
+import pytest
+
+import cache
+from cache import LRUCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Jam palsu untuk TTL: ``clock.now`` dimajukan manual."""
+    fake = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.get("b") is None and lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.evictions == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    lru = LRUCache(10, ttl=60)
+    lru.put("a", 1)
+    clock.now += 30
+    lru.put("b", 2)
+    clock.now += 30
+    # "a" tepat di batas TTL: kedaluwarsa; "b" baru berumur 30 detik
+    assert lru.get("a") is None
+    assert lru.get("b") == 2
+    assert lru.expirations == 1 and len(lru) == 1
+    # Hit tidak memperpanjang umur entry
+    clock.now += 30
+    assert lru.get("b") is None
+
+
+def test_newer_version_drops_every_entry():
+    lru = LRUCache(10)
+    lru.put("a", 1, version=1)
+    lru.put("b", 2, version=1)
+    assert lru.get("a", version=2) is None
+    assert len(lru) == 0 and lru.invalidations == 1
+
+    # Pemanggil dengan snapshot lama tidak membaca atau menulis
+    lru.put("a", "baru", version=2)
+    lru.put("a", "lama", version=1)
+    assert lru.get("a", version=1) is None
+    assert lru.get("a", version=2) == "baru"
+
+
+def test_byte_budget():
+    lru = LRUCache(100, max_bytes=10)
+    lru.put("a", "x", size=4)
+    lru.put("b", "y", size=4)
+    lru.put("c", "z", size=4)
+    assert lru.get("a") is None and lru.bytes == 8
+    # Nilai yang lebih besar dari seluruh budget tidak disimpan
+    lru.put("besar", "w", size=11)
+    assert lru.get("besar") is None and lru.bytes == 8
+    # Menimpa key menghitung ulang ukurannya
+    lru.put("b", "y2", size=1)
+    assert lru.bytes == 5
+
+
+def test_disabled_cache_stores_nothing():
+    lru = LRUCache(0)
+    lru.put("a", 1)
+    assert lru.get("a") is None and lru.stats()["misses"] == 1
@@ -0,0 +1,61 @@
+"""Kernel calculate_batch: error per elemen, broadcasting, dan validasi input."""
+
+import math
+
+import pytest
+
+from calculator import evaluate_batch
+
+
+def test_single_operation():
+    result = evaluate_batch([1, 2, 3], [4, 5, 6], "multiply")
+    assert result == {"count": 3, "results": [4.0, 10.0, 18.0], "errors": []}
+
+
+def test_operation_per_pair():
+    result = evaluate_batch([6, 6, 6, 6], [3, 3, 3, 3], operations=["add", "subtract", "multiply", "divide"])
+    assert result["results"] == [9.0, 3.0, 18.0, 2.0]
+    assert result["errors"] == []
+
+
+def test_division_by_zero_is_reported_per_element():
+    result = evaluate_batch([1, 0, -1, 4], [0, 0, 0, 2], "divide")
+    assert result["results"] == [None, None, None, 2.0]
+    assert result["errors"] == [{"index": i, "error": "Division by zero"} for i in range(3)]
+
+    # Hanya pasangan 'divide' dengan b = 0 yang error; 'add' dengan b = 0 tetap dihitung
+    result = evaluate_batch([1, 1, 1], [0, 0, 2], operations=["add", "divide", "divide"])
+    assert result["results"] == [1.0, None, 0.5]
+    assert result["errors"] == [{"index": 1, "error": "Division by zero"}]
+
+
+def test_non_finite_results_are_errors():
+    result = evaluate_batch([1e308, math.inf, 2, math.nan], [10, 1, 3, 1], "multiply")
+    assert result["results"] == [None, None, 6.0, None]
+    assert result["errors"] == [
+        {"index": i, "error": "Result is not a finite number"} for i in (0, 1, 3)
+    ]
+
+
+def test_single_value_is_broadcast():
+    assert evaluate_batch([10], [1, 2, 5], "divide")["results"] == [10.0, 5.0, 2.0]
+    assert evaluate_batch([1, 2, 3], [1], "subtract")["results"] == [0.0, 1.0, 2.0]
+    result = evaluate_batch([2], [0, 4], operations=["divide", "multiply"])
+    assert result["results"] == [None, 8.0]
+    assert result["count"] == 2
+    assert evaluate_batch([], [], "add") == {"count": 0, "results": [], "errors": []}
+
+
+@pytest.mark.parametrize("a, b, kwargs, message", [
+    ([1, 2], [1, 2, 3], {"operation": "add"}, "same length"),
+    ([], [1, 2], {"operation": "add"}, "same length"),
+    ([1, 2], [1, 2], {"operations": ["add"]}, "one entry per pair"),
+    ([1], [1, 2, 3], {"operations": ["add", "add"]}, "one entry per pair"),
+    ([1], [1], {}, "either"),
+    ([1], [1], {"operation": "add", "operations": ["add"]}, "either"),
+    ([1], [1], {"operation": "power"}, "Unknown operation 'power'"),
+    ([1, 2, 3], [1, 2, 3], {"operations": ["add", "add", "modulo"]}, "'modulo' at index 2")
+])
+def test_invalid_input(a, b, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        evaluate_batch(a, b, **kwargs)
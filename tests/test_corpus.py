@@ -0,0 +1,139 @@
+"""Hot reload corpus: tambah, ubah dan hapus file lalu poll(); snapshot lama tetap konsisten."""
+
+import asyncio
+import json
+import os
+
+import pytest
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+import server
+from corpus import Corpus, CorpusWatcher, LiveCorpus
+from document_store import InMemoryDocumentStore, OverlayDocumentStore, normalize_document
+from search_index import SearchIndex
+
+BASE = [
+    {"id": "base-1", "title": "Panduan Server", "text": "Jalankan server lalu buka endpoint sse."},
+    {"id": "base-2", "title": "Kalkulator", "text": "Operasi tambah dan kali untuk angka."}
+]
+
+
+def _write(path, docs, mtime_step=0):
+    with open(path, "w", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc) + "\n")
+    # Pastikan mtime berubah walau ditulis ulang dalam tick jam yang sama
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_step * 1_000_000_000))
+
+
+def _ids(corpus, query):
+    return [hit.doc_id for hit in corpus.index.search(query, 10, fuzzy=False)]
+
+
+@pytest.fixture
+def live(monkeypatch):
+    store = InMemoryDocumentStore({doc["id"]: normalize_document(doc) for doc in BASE})
+    live = LiveCorpus(Corpus(store, SearchIndex.build(store.iter_documents())))
+    monkeypatch.setattr(server, "CORPUS", live)
+    return live
+
+
+def _call(name, arguments):
+    async def run():
+        async with Client(server.mcp) as client:
+            return (await client.call_tool(name, arguments)).structured_content
+
+    return asyncio.run(run())
+
+
+def _search_ids(query):
+    return [result["id"] for result in _call("search", {"query": query, "fuzzy": False})["results"]]
+
+
+def test_poll_applies_add_update_and_delete(tmp_path, live):
+    watcher = CorpusWatcher(live, str(tmp_path))
+    path = str(tmp_path / "extra.jsonl")
+    base_segment = live.snapshot.index.segments[0]
+
+    # Tambah
+    _write(path, [
+        {"id": "new-1", "title": "Jaringan", "text": "Protokol jaringan dan router."},
+        {"id": "new-2", "title": "Basis Data", "text": "Indeks basis data dan query."}
+    ])
+    assert watcher.poll() == (2, 0)
+    before_update = live.snapshot
+    assert _search_ids("router") == ["new-1"]
+    assert _call("fetch", {"id": "new-2"})["text"] == "Indeks basis data dan query."
+    # Tanpa perubahan: poll tidak membuat snapshot baru
+    assert watcher.poll() == (0, 0) and live.snapshot is before_update
+
+    # Ubah satu dokumen; new-2 identik sehingga tidak di-index ulang
+    _write(path, [
+        {"id": "new-1", "title": "Jaringan", "text": "Protokol jaringan dan firewall."},
+        {"id": "new-2", "title": "Basis Data", "text": "Indeks basis data dan query."}
+    ], mtime_step=1)
+    assert watcher.poll() == (1, 0)
+    assert _search_ids("router") == []
+    assert _search_ids("firewall") == ["new-1"]
+    assert _call("fetch", {"id": "new-1"})["text"] == "Protokol jaringan dan firewall."
+    assert _search_ids("indeks") == ["new-2"]
+
+    # Hapus file: kedua dokumennya hilang dari search dan fetch
+    os.remove(path)
+    assert watcher.poll() == (0, 2)
+    assert _search_ids("firewall") == [] and _search_ids("indeks") == []
+    with pytest.raises(ToolError, match="not found"):
+        _call("fetch", {"id": "new-1"})
+
+    # Dokumen awal tidak pernah di-index ulang: segment pertama tetap objek yang sama
+    snapshot = live.snapshot
+    assert snapshot.index.segments[0] is base_segment
+    assert snapshot.index.deleted[0] == frozenset()
+    assert _search_ids("kalkulator") == ["base-2"]
+    assert len(snapshot.store) == len(snapshot.index) == len(BASE)
+
+
+def test_old_snapshot_stays_consistent(tmp_path, live):
+    watcher = CorpusWatcher(live, str(tmp_path))
+    path = str(tmp_path / "extra.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"id": "base-1", "title": "Panduan Baru", "text": "Server sekarang memakai streamable http."}, f)
+
+    old = live.snapshot
+    assert watcher.poll() == (1, 0)
+    new = live.snapshot
+    assert new is not old and new.version == old.version + 1
+
+    # Snapshot lama: index dan store masih versi sebelum perubahan
+    assert _ids(old, "sse") == ["base-1"] and _ids(old, "streamable") == []
+    assert old.store.get("base-1")["title"] == "Panduan Server"
+    assert len(old.index.segments) == 1
+
+    # Snapshot baru: versi lama base-1 ditandai terhapus, versi baru di segment tambahan
+    assert _ids(new, "sse") == [] and _ids(new, "streamable") == ["base-1"]
+    assert new.store.get("base-1")["title"] == "Panduan Baru"
+    assert len(new.index.segments) == 2 and new.index.segments[0] is old.index.segments[0]
+    assert new.index.deleted[0] == frozenset({old.index.segments[0].doc_ords["base-1"]})
+    assert len(new.index) == len(old.index) == len(BASE)
+
+
+def test_unreadable_file_is_retried_after_it_changes(tmp_path, live):
+    watcher = CorpusWatcher(live, str(tmp_path))
+    path = str(tmp_path / "partial.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"id": "half", "title": ')
+
+    assert watcher.poll() == (0, 0)
+    _write(path, [{"id": "half", "title": "Utuh", "text": "Sekarang lengkap."}], mtime_step=1)
+    assert watcher.poll() == (1, 0)
+    assert _ids(live.snapshot, "lengkap") == ["half"]
+
+
+def test_corpus_apply_ignores_delete_of_upserted_id(live):
+    corpus = live.snapshot.apply([{**normalize_document(BASE[0]), "text": "teks pengganti"}], ["base-1", "base-2"])
+    assert isinstance(corpus.store, OverlayDocumentStore)
+    assert list(corpus.store.ids()) == ["base-1"]
+    assert _ids(corpus, "pengganti") == ["base-1"]
+    assert _ids(corpus, "kalkulator") == []
@@ -0,0 +1,195 @@
+"""
+Document store: kontrak InMemoryDocumentStore/OverlayDocumentStore, dan segment
+(round trip tiap codec, bacaan lintas blok, LRU blok terdekompresi).
+"""
+
+import pytest
+
+import document_store
+from document_store import (
+    InMemoryDocumentStore, OverlayDocumentStore, SegmentDocumentStore, normalize_document, write_segment
+)
+
+# Blok kecil supaya teks dokumen melewati banyak batas blok
+BLOCK_SIZE = 64
+
+DOCS = [
+    {"id": "pendek", "title": "Pendek", "text": "satu blok saja"},
+    {"id": "ünïcode", "title": "Ünïcode", "text": "héllo wörld ✓ 😀 " * 12, "url": "https://example.com/u",
+     "metadata": {"lang": "id", "tags": ["a", "b"]}},
+    {"id": "kosong", "title": "Kosong", "text": ""},
+    {"id": "panjang", "title": "Panjang", "text": "".join(f"baris {i:03d}\n" for i in range(60))}
+]
+
+CODECS = [
+    "none",
+    "zlib",
+    "lzma",
+    pytest.param("zstd", marks=pytest.mark.skipif(document_store.zstandard is None, reason="zstandard not installed"))
+]
+
+
+def _memory_store(docs=DOCS):
+    return InMemoryDocumentStore({doc["id"]: normalize_document(doc) for doc in docs})
+
+
+def _assert_same_contents(store, expected):
+    """Semua method baca store memberi dokumen yang sama dengan ``expected``."""
+    assert len(store) == len(expected)
+    assert list(store.ids()) == [doc["id"] for doc in expected]
+    assert list(store.iter_documents()) == expected
+    for doc in expected:
+        raw = doc["text"].encode("utf-8")
+        assert doc["id"] in store
+        assert store.get(doc["id"]) == doc
+        assert store.get_meta(doc["id"]) == {key: doc[key] for key in ("id", "title", "url", "metadata")}
+        assert store.get_text(doc["id"]) == doc["text"]
+        assert store.get_text(doc["id"], 3) == doc["text"][:3]
+        assert store.text_size(doc["id"]) == len(raw)
+        assert store.get_text_bytes(doc["id"], 2, 9) == raw[2:9]
+        assert store.get_text_slice(doc["id"], 0, len(raw)) == doc["text"]
+
+
+def _assert_unknown(store, doc_id):
+    assert doc_id not in store
+    assert store.get(doc_id) is None and store.get_meta(doc_id) is None
+    assert store.get_text(doc_id) is None and store.get_text_slice(doc_id, 0, 5) is None
+    assert store.get_text_bytes(doc_id, 0, 5) is None and store.text_size(doc_id) is None
+
+
+def test_in_memory_store_contract():
+    store = _memory_store()
+    _assert_same_contents(store, [normalize_document(doc) for doc in DOCS])
+    _assert_unknown(store, "tidak-ada")
+    assert 123 not in store
+    # Slice byte boleh memotong karakter multi-byte; get_text_slice membuang sisanya
+    assert store.get_text_bytes("ünïcode", 0, 2) == "hé".encode("utf-8")[:2]
+    assert store.get_text_slice("ünïcode", 0, 2) == "h"
+
+
+def test_overlay_shadows_and_deletes_without_touching_the_base():
+    base = _memory_store()
+    first = OverlayDocumentStore(base, version=base.version)
+    replaced = normalize_document(dict(DOCS[0], title="Pendek Baru", text="teks pengganti ✓"))
+    added = normalize_document({"id": "baru", "title": "Baru", "text": "dokumen tambahan", "metadata": {"lang": "en"}})
+    second = first.apply([replaced, added], ["kosong", "tidak-ada"])
+
+    assert second.version == first.version + 1
+    expected = [normalize_document(DOCS[1]), normalize_document(DOCS[3]), replaced, added]
+    _assert_same_contents(second, expected)
+    _assert_unknown(second, "kosong")
+
+    # Overlay lama dan base tidak berubah
+    _assert_same_contents(first, [normalize_document(doc) for doc in DOCS])
+    _assert_same_contents(base, [normalize_document(doc) for doc in DOCS])
+
+    # Hapus dokumen yang hanya ada di overlay, lalu tambahkan lagi ID yang sudah dihapus dari base
+    third = second.apply([normalize_document(dict(DOCS[2], text="kembali"))], ["baru"])
+    _assert_unknown(third, "baru")
+    assert third.get_text("kosong") == "kembali" and third.version == second.version + 1
+    assert len(third) == len(DOCS)
+
+
+def test_overlay_over_a_segment(tmp_path):
+    segment = _segment(tmp_path, "zlib")
+    overlay = OverlayDocumentStore(segment).apply([normalize_document(dict(DOCS[3], text="diganti"))], ["pendek"])
+    expected = [normalize_document(DOCS[1]), normalize_document(DOCS[2]), normalize_document(dict(DOCS[3], text="diganti"))]
+    _assert_same_contents(overlay, expected)
+    _assert_unknown(overlay, "pendek")
+    assert segment.get_text("panjang") == DOCS[3]["text"]
+
+
+def test_fingerprint_is_stable_and_content_sensitive(tmp_path):
+    store = _memory_store()
+    assert store.fingerprint() == _memory_store().fingerprint()
+    # Sama isi, sama urutan: overlay kosong dan segment memberi urutan dokumen yang sama
+    assert OverlayDocumentStore(store).fingerprint() == store.fingerprint()
+
+    edited = _memory_store([dict(DOCS[0], text="satu blok saja!")] + DOCS[1:])
+    reordered = _memory_store(DOCS[::-1])
+    meta_only = _memory_store([dict(DOCS[0], url="https://example.com/p")] + DOCS[1:])
+    fingerprints = {store.fingerprint(), edited.fingerprint(), reordered.fingerprint(), meta_only.fingerprint()}
+    assert len(fingerprints) == 4
+    changed = OverlayDocumentStore(store).apply([normalize_document(dict(DOCS[0], title="Lain"))], [])
+    assert changed.fingerprint() not in fingerprints
+
+    first = _segment(tmp_path, "zlib").fingerprint()
+    assert _segment(tmp_path, "zlib").fingerprint() == first
+    assert _segment(tmp_path, "lzma").fingerprint() != first
+
+
+def _segment(tmp_path, codec, cache_size=64):
+    path = str(tmp_path / f"corpus-{codec}.seg")
+    write_segment(DOCS, path, codec, block_size=BLOCK_SIZE)
+    return SegmentDocumentStore(path, cache_size)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(tmp_path, codec):
+    store = _segment(tmp_path, codec)
+    assert store.codec == codec and len(store) == len(DOCS)
+    if codec != "none":
+        assert store.block_stats()["blocks"] > 10
+    for doc in DOCS:
+        expected = normalize_document(doc)
+        assert store.get(doc["id"]) == expected
+        assert store.text_size(doc["id"]) == len(doc["text"].encode("utf-8"))
+        assert store.get_text(doc["id"], 5) == doc["text"][:5]
+    assert "tidak-ada" not in store and store.get("tidak-ada") is None
+    assert list(store.iter_documents()) == [normalize_document(doc) for doc in DOCS]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_get_text_bytes_at_block_boundaries(tmp_path, codec):
+    store = _segment(tmp_path, codec)
+    for doc in DOCS:
+        raw = doc["text"].encode("utf-8")
+        # Offset teks dokumen di aliran teks yang disambung
+        text_offset = store._entry(store._find(doc["id"]))[4]
+        edges = {0, 1, len(raw) - 1, len(raw), len(raw) + 10}
+        for boundary in range(0, text_offset + len(raw) + BLOCK_SIZE, BLOCK_SIZE):
+            edges.update(boundary - text_offset + d for d in (-1, 0, 1))
+        points = sorted(p for p in edges if p >= 0)
+        for start in points:
+            for end in points:
+                assert store.get_text_bytes(doc["id"], start, end) == raw[start:end], (start, end)
+    assert store.get_text_bytes("tidak-ada", 0, 10) is None
+
+
+def test_block_lru_evicts_least_recently_used(tmp_path):
+    store = _segment(tmp_path, "zlib", cache_size=2)
+    store._block(0)
+    store._block(1)
+    store._block(0)  # blok 0 jadi yang terbaru
+    store._block(2)  # mengusir blok 1
+    stats = store.block_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert store._blocks.get(0) is not None and store._blocks.get(1) is None
+    assert store._block(0) == store._block(0, cache=False)
+
+
+def _blocks_touched(store, doc_id, start, end):
+    text_offset = store._entry(store._find(doc_id))[4]
+    return set(range((text_offset + start) // BLOCK_SIZE, (text_offset + end - 1) // BLOCK_SIZE + 1))
+
+
+def test_only_reads_within_the_span_limit_are_cached(tmp_path):
+    store = _segment(tmp_path, "zlib")
+    span = document_store._CACHE_MAX_SPAN
+    doc_id = "panjang"
+
+    # Bacaan yang menyentuh paling banyak _CACHE_MAX_SPAN blok masuk LRU
+    start = 5
+    end = start + (span - 1) * BLOCK_SIZE
+    touched = _blocks_touched(store, doc_id, start, end)
+    assert len(touched) == span
+    store.get_text_bytes(doc_id, start, end)
+    assert set(store._blocks._entries) == touched
+
+    # Bacaan yang lebih lebar (fetch utuh, iter_documents) tidak mengubah LRU
+    store._blocks.clear()
+    wide = _blocks_touched(store, doc_id, 0, store.text_size(doc_id))
+    assert len(wide) > span
+    store.get_text(doc_id)
+    list(store.iter_documents())
+    assert len(store._blocks._entries) == 0
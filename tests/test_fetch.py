@@ -0,0 +1,148 @@
+"""'fetch' per bagian (batas UTF-8, cursor, teks sama dengan fetch utuh) dan 'fetch_many'."""
+
+import asyncio
+
+import pytest
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+import server
+from corpus import Corpus, LiveCorpus
+from document_store import InMemoryDocumentStore
+from search_index import SearchIndex
+from server import _text_bounds, _utf8_boundary
+
+TEXT = " \n　" + "héllo wörld ✓ 😀 " * 40 + "akhir.  \n"
+
+
+@pytest.fixture
+def corpus(monkeypatch):
+    store = InMemoryDocumentStore({
+        "long-doc": {"id": "long-doc", "title": "Long", "text": TEXT, "url": "https://example.com/long"}
+    })
+    live = LiveCorpus(Corpus(store, SearchIndex.build(store.iter_documents())))
+    monkeypatch.setattr(server, "CORPUS", live)
+    return live
+
+
+async def _fetch(client, **arguments):
+    result = await client.call_tool("fetch", {"id": "long-doc", **arguments})
+    return result.structured_content
+
+
+def test_utf8_boundary():
+    euro = "€".encode("utf-8")
+    assert _utf8_boundary(b"") == 0
+    assert _utf8_boundary(b"abc") == 3
+    assert _utf8_boundary(b"a" + euro) == 4
+    assert _utf8_boundary(b"a" + euro[:2]) == 1
+    assert _utf8_boundary(b"a" + euro[:1]) == 1
+    assert _utf8_boundary("😀".encode("utf-8")[:3]) == 0
+    assert _utf8_boundary(b"x" + "😀".encode("utf-8")) == 5
+
+
+def test_text_bounds_match_strip():
+    store = InMemoryDocumentStore({
+        "a": {"id": "a", "text": TEXT},
+        "blank": {"id": "blank", "text": " 　\n "},
+        "plain": {"id": "plain", "text": "isi"}
+    })
+    for doc_id in ("a", "blank", "plain"):
+        raw = store.get_text_bytes(doc_id, 0, store.text_size(doc_id))
+        # Probe kecil memaksa beberapa langkah dan potongan di tengah karakter
+        for probe in (4, 5, 256):
+            lo, hi = _text_bounds(store, doc_id, len(raw), probe)
+            assert raw[lo:hi].decode("utf-8") == raw.decode("utf-8").strip()
+
+
+def test_cursor_round_trip_matches_whole_fetch(corpus):
+    async def run():
+        async with Client(server.mcp) as client:
+            whole = await _fetch(client)
+            parts = [await _fetch(client, start=0, length=7)]
+            while parts[-1]["next_cursor"]:
+                parts.append(await _fetch(client, cursor=parts[-1]["next_cursor"]))
+            return whole, parts
+
+    whole, parts = asyncio.run(run())
+    assert whole["text"] == TEXT.strip()
+    assert "".join(part["text"] for part in parts) == whole["text"]
+    total = len(TEXT.strip().encode("utf-8"))
+    assert all(part["range"]["total"] == total for part in parts)
+    assert parts[-1]["range"]["end"] == total
+    for previous, part in zip(parts, parts[1:]):
+        assert part["range"]["start"] == previous["range"]["end"]
+
+
+def test_streamed_chunks_match_whole_fetch(corpus, monkeypatch):
+    monkeypatch.setattr(server, "FETCH_CHUNK_BYTES", 50)
+    chunks = []
+
+    async def on_progress(progress, total, message):
+        chunks.append(message)
+
+    async def run():
+        async with Client(server.mcp) as client:
+            result = await client.call_tool("fetch", {"id": "long-doc", "stream": True}, progress_handler=on_progress)
+            return result.structured_content
+
+    result = asyncio.run(run())
+    assert len(chunks) > 1
+    assert "".join(chunks) == TEXT.strip()
+    assert result["range"]["end"] == result["range"]["total"] == len(TEXT.strip().encode("utf-8"))
+
+
+def test_cursor_from_older_version_is_rejected(corpus):
+    async def run():
+        async with Client(server.mcp) as client:
+            first = await _fetch(client, length=10)
+            corpus.apply([{"id": "other", "title": "Other", "text": "baru", "url": ""}], [])
+            with pytest.raises(ToolError, match="Document store changed"):
+                await _fetch(client, cursor=first["next_cursor"])
+            with pytest.raises(ToolError, match="Invalid cursor"):
+                await _fetch(client, cursor="bukan-cursor")
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def batch_corpus(monkeypatch):
+    documents = {
+        f"doc-{i}": {"id": f"doc-{i}", "title": f"Doc {i}", "text": "x" * size, "url": ""}
+        for i, size in enumerate((40, 30, 50, 20))
+    }
+    store = InMemoryDocumentStore(documents)
+    monkeypatch.setattr(server, "CORPUS", LiveCorpus(Corpus(store, SearchIndex.build(store.iter_documents()))))
+    monkeypatch.setattr(server, "FETCH_MANY_MAX_BYTES", 100)
+
+
+def _fetch_many(ids):
+    async def run():
+        async with Client(server.mcp) as client:
+            return (await client.call_tool("fetch_many", {"ids": ids})).structured_content
+
+    return asyncio.run(run())
+
+
+def test_fetch_many_reports_errors_per_id(batch_corpus):
+    result = _fetch_many(["doc-1", "tidak-ada", "doc-1", "", "doc-0"])
+    # Duplikat diabaikan, urutan permintaan dipertahankan
+    assert [doc["id"] for doc in result["documents"]] == ["doc-1", "doc-0"]
+    assert result["errors"] == [
+        {"id": "tidak-ada", "error": "Document with ID 'tidak-ada' not found"},
+        {"id": "", "error": "Document ID is required"}
+    ]
+    assert result["omitted"] == []
+
+
+def test_fetch_many_size_cap(batch_corpus):
+    # 40 + 30 = 70; doc-2 (50) melewati batas 100, doc-3 (20) masih muat
+    result = _fetch_many(["doc-0", "doc-1", "doc-2", "doc-3"])
+    assert [doc["id"] for doc in result["documents"]] == ["doc-0", "doc-1", "doc-3"]
+    assert result["omitted"] == ["doc-2"]
+    assert sum(len(doc["text"]) for doc in result["documents"]) <= 100
+
+
+def test_fetch_many_id_limit(batch_corpus):
+    with pytest.raises(ToolError, match="At most 100 IDs"):
+        _fetch_many([f"id-{i}" for i in range(server.MAX_FETCH_MANY_IDS + 1)])
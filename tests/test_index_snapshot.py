@@ -0,0 +1,143 @@
+"""Snapshot index: dipakai hanya bila dibangun dari dokumen yang sama persis."""
+
+import pytest
+
+from document_store import InMemoryDocumentStore, SegmentDocumentStore, write_segment
+from index_snapshot import _SnapshotSegment, load_or_build_index, map_index
+from search_index import SearchIndex
+
+DOCS = [
+    {"id": "doc-1", "title": "Pertama", "text": "hello world", "metadata": {"lang": "id"}},
+    {"id": "doc-2", "title": "Kedua", "text": "another document", "metadata": {"lang": "id"}}
+]
+
+
+def _edited(title: str = "Pertama", text: str = "hello world", lang: str = "id"):
+    return [dict(DOCS[0], title=title, text=text, metadata={"lang": lang}), DOCS[1]]
+
+
+def _load(tmp_path, docs, codec):
+    segment = str(tmp_path / "corpus.seg")
+    write_segment(docs, segment, codec)
+    store = SegmentDocumentStore(segment)
+    return store, load_or_build_index(str(tmp_path / "corpus.idx"), store)
+
+
+def _ids(index, query, **kwargs):
+    return [hit.doc_id for hit in index.search(query, 10, **kwargs)]
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+def test_same_length_edit_rebuilds_snapshot(tmp_path, codec):
+    before, _ = _load(tmp_path, DOCS, codec)
+    after, index = _load(tmp_path, _edited(title="Pertamx", text="jello world"), codec)
+    assert before.fingerprint() != after.fingerprint()
+    assert _ids(index, "jello", fuzzy=False) == ["doc-1"]
+    assert _ids(index, "hello", fuzzy=False) == []
+
+
+def test_unchanged_segment_keeps_fingerprint(tmp_path):
+    first, _ = _load(tmp_path, DOCS, "zlib")
+    second, _ = _load(tmp_path, DOCS, "zlib")
+    assert first.fingerprint() == second.fingerprint()
+
+
+def test_segment_without_digest_is_hashed_in_full(tmp_path):
+    path = tmp_path / "corpus.seg"
+    write_segment(DOCS, str(path))
+    with_trailer = SegmentDocumentStore(str(path)).content_digest()
+    # Segment dari sebelum ada trailer digest
+    path.write_bytes(path.read_bytes()[:-40])
+    assert SegmentDocumentStore(str(path)).content_digest() == with_trailer
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+def test_metadata_only_edit_refreshes_filters_and_facets(tmp_path, codec):
+    from metadata_index import parse_filter
+
+    _load(tmp_path, DOCS, codec)
+    _, index = _load(tmp_path, _edited(lang="en"), codec)
+    assert _ids(index, "world", filter=parse_filter({"lang": "en"})) == ["doc-1"]
+    assert _ids(index, "world", filter=parse_filter({"lang": "id"})) == []
+    stats = {}
+    index.search("document world", 10, stats=stats, facets=["lang"])
+    assert stats["facets"] == {"lang": {"en": 1, "id": 1}}
+
+
+def test_map_index_moves_index_into_unlinked_mapping(tmp_path, monkeypatch):
+    import tempfile
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    built = SearchIndex.build(DOCS)
+    mapped = map_index(built)
+    assert isinstance(mapped.segments[0], _SnapshotSegment)
+    assert _ids(mapped, "document") == _ids(built, "document") == ["doc-2"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rebuilt_snapshot_is_returned_mapped(tmp_path):
+    store = InMemoryDocumentStore({doc["id"]: dict(doc, url="") for doc in DOCS})
+    path = str(tmp_path / "corpus.idx")
+    assert not isinstance(load_or_build_index(path, store).segments[0], _SnapshotSegment)
+    (tmp_path / "corpus.idx").unlink()
+    index = load_or_build_index(path, store, mapped=True)
+    assert isinstance(index.segments[0], _SnapshotSegment)
+    assert _ids(index, "hello") == ["doc-1"]
+
+
+def test_failed_write_reports_the_original_error(tmp_path):
+    from index_snapshot import write_snapshot
+
+    # open() gagal sebelum file sementara dibuat: error itu yang sampai ke pemanggil
+    with pytest.raises(FileNotFoundError) as excinfo:
+        write_snapshot(SearchIndex.build(DOCS), str(tmp_path / "missing" / "corpus.idx"), bytes(32))
+    assert excinfo.value.__context__ is None
+    with pytest.raises(FileNotFoundError) as excinfo:
+        write_segment(DOCS, str(tmp_path / "missing" / "corpus.seg"))
+    assert excinfo.value.__context__ is None
+
+
+UNICODE_DOCS = [
+    {"id": "u-1", "title": "Émigré café", "text": "naïve résumé über straße"},
+    {"id": "u-2", "title": "日本語", "text": "テキスト検索 と café crème"},
+    {"id": "u-3", "title": "Plain", "text": "cafeteria server servers serverless a+b → c"},
+    {"id": "u-4", "title": "Zzz", "text": ""}
+]
+
+
+def test_mapped_vocabulary_answers_like_the_built_one(tmp_path, monkeypatch):
+    import tempfile
+
+    from index_snapshot import _TermList, _VocabBlob
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    built = SearchIndex.build(UNICODE_DOCS)
+    mapped = map_index(built)
+    segment, original = mapped.segments[0], built.segments[0]
+    # Vocabulary tetap di mmap: tidak ada list term atau dict term -> nomor
+    assert isinstance(segment._vocab_terms, _TermList) and isinstance(segment._vocab_blob, _VocabBlob)
+    assert list(segment._vocab_terms) == original._vocab_terms
+    assert list(segment.postings) == original._vocab_terms
+
+    fragments = ["caf", "café", "fé", "é", "ser", "server", "erv", "語", "テキ", "ス", "→", "+", "zz", "tidak", "", "a"]
+    for fragment in fragments:
+        assert segment.expand(fragment) == original.expand(fragment), fragment
+        assert segment.has_fragment(fragment) == original.has_fragment(fragment), fragment
+    for term in original._vocab_terms + ["tidak-ada", "caf", "zzzz"]:
+        assert segment.df(term) == original.df(term), term
+        assert (term in segment.postings) == (term in original.postings), term
+    assert 123 not in segment.postings and segment.postings.get(None) is None
+    for query in ["café", "caf", "server", "日本語", "naive", "serverles", "straße →"]:
+        assert [(hit.doc_id, hit.score) for hit in mapped.search(query, 10)] == \
+            [(hit.doc_id, hit.score) for hit in built.search(query, 10)], query
+
+
+def test_empty_vocabulary_snapshot(tmp_path, monkeypatch):
+    import tempfile
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    mapped = map_index(SearchIndex.build([{"id": "kosong", "title": "", "text": ""}]))
+    segment = mapped.segments[0]
+    assert len(segment._vocab_terms) == 0 and not segment.has_fragment("a")
+    assert segment.expand("abc") == [] and segment.fuzzy_expand("abcd") == {}
+    assert mapped.search("abc", 10) == []
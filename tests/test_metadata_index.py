@@ -0,0 +1,106 @@
+"""Filter metadata: validasi parse_filter dan semantik AND/OR/list dibanding filter brute force."""
+
+import random
+
+import pytest
+
+from metadata_index import MAX_FILTER_CLAUSES, MetadataIndex, parse_filter
+
+
+@pytest.mark.parametrize("spec", [
+    {"$and": []},
+    {"$or": {"a": 1}},
+    {"$not": [{"a": 1}]},
+    {"a": []},
+    {"a": {"b": 1}},
+    {"a": [1, None]},
+    {"$or": [{}]},
+    {"$and": ["a"]}
+])
+def test_parse_filter_rejects_malformed(spec):
+    with pytest.raises(ValueError):
+        parse_filter(spec)
+
+
+def test_parse_filter_counts_every_value_and_operator():
+    assert parse_filter(None) is None and parse_filter({}) is None
+    parse_filter({"a": list(range(MAX_FILTER_CLAUSES))})
+    with pytest.raises(ValueError, match="conditions"):
+        parse_filter({"a": list(range(MAX_FILTER_CLAUSES + 1))})
+    with pytest.raises(ValueError, match="conditions"):
+        parse_filter({"a": list(range(MAX_FILTER_CLAUSES)), "$or": [{"b": 1}]})
+
+    deep = {"a": 1}
+    for _ in range(MAX_FILTER_CLAUSES):
+        deep = {"$and": [deep]}
+    with pytest.raises(ValueError, match="conditions"):
+        parse_filter(deep)
+
+
+def test_parse_filter_tree():
+    assert parse_filter({"a": 1}) == ("field", "a", (1,))
+    assert parse_filter({"a": [1, 2], "b": "x"}) == ("and", (("field", "a", (1, 2)), ("field", "b", ("x",))))
+    assert parse_filter({"$or": [{"a": 1}, {"b": 2}]}) == ("or", (("field", "a", (1,)), ("field", "b", (2,))))
+    assert parse_filter({"$and": [{"a": 1}]}) == ("field", "a", (1,))
+
+
+FIELDS = {
+    "category": ["info", "tutorial", "news", "faq"],
+    "lang": ["id", "en", "jv"],
+    "tags": ["mcp", "search", "http", "sse", "cache"],
+    "rare": ["x", "y"]
+}
+
+
+def _random_metadata(rng):
+    metadata = {
+        "category": rng.choice(FIELDS["category"]),
+        "lang": rng.choice(FIELDS["lang"]) if rng.random() < 0.8 else None,
+        "tags": rng.sample(FIELDS["tags"], rng.randint(0, 3))
+    }
+    if rng.random() < 0.02:
+        metadata["rare"] = rng.choice(FIELDS["rare"])
+    return metadata
+
+
+def _random_filter(rng, depth=0):
+    if depth < 2 and rng.random() < 0.4:
+        return {rng.choice(["$and", "$or"]): [_random_filter(rng, depth + 1) for _ in range(rng.randint(1, 3))]}
+    spec = {}
+    for field in rng.sample(list(FIELDS), rng.randint(1, 2)):
+        values = rng.sample(FIELDS[field] + ["missing"], rng.randint(1, 2))
+        spec[field] = values if len(values) > 1 or rng.random() < 0.5 else values[0]
+    return spec
+
+
+def _brute_force(spec, metadata):
+    """Filter dievaluasi langsung pada dict metadata (pembanding)."""
+    for key, value in spec.items():
+        if key == "$and":
+            ok = all(_brute_force(child, metadata) for child in value)
+        elif key == "$or":
+            ok = any(_brute_force(child, metadata) for child in value)
+        else:
+            field = metadata.get(key)
+            present = field if isinstance(field, list) else [field]
+            ok = any(v in present for v in (value if isinstance(value, list) else [value]))
+        if not ok:
+            return False
+    return True
+
+
+def test_matching_agrees_with_brute_force():
+    rng = random.Random(7)
+    documents = [_random_metadata(rng) for _ in range(500)]
+    index = MetadataIndex()
+    for doc_ord, metadata in enumerate(documents):
+        index.add(doc_ord, metadata)
+    index.finalize(len(documents))
+    # Nilai sering jadi bitmap, nilai jarang tetap array ordinal
+    assert isinstance(index.fields["category"]["info"], int)
+    assert not isinstance(index.fields["rare"]["x"], int)
+
+    for _ in range(300):
+        spec = _random_filter(rng)
+        expected = {doc_ord for doc_ord, metadata in enumerate(documents) if _brute_force(spec, metadata)}
+        assert index.matching(parse_filter(spec)) == expected, spec
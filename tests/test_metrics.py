@@ -0,0 +1,62 @@
+"""Metrics per tool: hanya tool terdaftar yang punya series sendiri."""
+
+import asyncio
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+from metrics import Metrics, MetricsMiddleware, escape_label
+
+
+@pytest.fixture
+def server():
+    metrics = Metrics(["echo"])
+    mcp = FastMCP("metrics-test")
+    mcp.add_middleware(MetricsMiddleware(metrics))
+
+    @mcp.tool()
+    def echo(text: str) -> str:
+        return text
+
+    return mcp, metrics
+
+
+async def _calls(mcp, names):
+    async with Client(mcp) as client:
+        for name in names:
+            try:
+                await client.call_tool(name, {"text": "hi"})
+            except ToolError:
+                pass
+
+
+def test_unknown_tools_share_one_series(server):
+    mcp, metrics = server
+    asyncio.run(_calls(mcp, ["echo", "bogus-1", "bogus-2", 'x"}\nevil 1']))
+
+    assert set(metrics.tools) == {"echo", "unknown"}
+    assert metrics.tools["echo"].calls == 1
+    assert metrics.tools["unknown"].calls == 3
+    assert metrics.tools["unknown"].errors == 3
+    text = metrics.render()
+    assert 'mcp_tool_calls_total{tool="unknown"} 3' in text
+    assert "bogus" not in text and "evil" not in text
+
+
+def test_registered_tools_are_exported_before_first_call():
+    text = Metrics(["search", "fetch"]).render()
+    assert 'mcp_tool_calls_total{tool="fetch"} 0' in text
+    assert 'mcp_tool_calls_total{tool="search"} 0' in text
+
+
+def test_label_values_are_escaped():
+    assert escape_label('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+    metrics = Metrics(['we"ird\n'])
+    assert 'mcp_tool_calls_total{tool="we\\"ird\\n"} 0' in metrics.render().splitlines()
+
+
+def test_server_tool_names_match_registered_tools():
+    from server import TOOL_NAMES, mcp
+    tools = asyncio.run(mcp.list_tools())
+    assert sorted(tool.name for tool in tools) == sorted(TOOL_NAMES)
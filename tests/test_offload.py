@@ -0,0 +1,71 @@
+"""Batas waktu per tool berlaku untuk seluruh tools/call."""
+
+import asyncio
+import time
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+from offload import DeadlineMiddleware, ToolExecutor, check_cancelled
+
+
+def _spin(seconds: float) -> str:
+    until = time.monotonic() + seconds
+    while time.monotonic() < until:
+        check_cancelled()
+        time.sleep(0.01)
+    return "done"
+
+
+@pytest.fixture
+def server():
+    executor = ToolExecutor(["offloaded"], max_workers=2, timeouts={"quick": 0}, default_timeout=0.2)
+    mcp = FastMCP("deadline-test")
+    mcp.add_middleware(DeadlineMiddleware(executor))
+
+    @mcp.tool()
+    async def awaiting() -> str:
+        await asyncio.sleep(5)
+        return "done"
+
+    @mcp.tool()
+    async def offloaded() -> str:
+        # Setengah deadline habis di luar executor; sisanya yang berlaku di thread
+        await asyncio.sleep(0.15)
+        return await executor.run("offloaded", _spin, 0.15)
+
+    @mcp.tool()
+    async def quick() -> str:
+        await asyncio.sleep(0.3)
+        return "done"
+
+    yield mcp, executor
+    executor.shutdown()
+
+
+async def _call(mcp, tool):
+    async with Client(mcp) as client:
+        return (await client.call_tool(tool, {})).data
+
+
+def test_await_only_tool_gets_deadline(server):
+    mcp, executor = server
+    started = time.monotonic()
+    with pytest.raises(ToolError, match="time limit of 0.2s"):
+        asyncio.run(_call(mcp, "awaiting"))
+    assert time.monotonic() - started < 2
+    assert executor.stats()["timeouts"] == 1
+
+
+def test_offloaded_work_shares_the_call_deadline(server):
+    mcp, executor = server
+    with pytest.raises(ToolError, match="time limit of 0.2s"):
+        asyncio.run(_call(mcp, "offloaded"))
+    assert executor.stats()["timeouts"] == 1
+    assert executor.stats()["cancelled"] == 0
+
+
+def test_zero_disables_the_deadline(server):
+    mcp, _ = server
+    assert asyncio.run(_call(mcp, "quick")) == "done"
@@ -0,0 +1,72 @@
+"""Replay client: lanjut (--resume) setelah baris terpotong, dan output urut input."""
+
+import asyncio
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+
+from replay import ResultWriter, load_done_lines  # noqa: E402
+
+
+def _record(line):
+    return json.dumps({"line": line, "ok": True, "result": {}}) + "\n"
+
+
+def test_resume_cuts_truncated_trailing_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    complete = _record(1) + _record(2)
+    output.write_text(complete + _record(3)[:15], encoding="utf-8")
+
+    assert load_done_lines(str(output)) == {1, 2}
+    # Baris terpotong dibuang: append berikutnya mulai di baris bersih
+    assert output.read_text(encoding="utf-8") == complete
+
+
+def test_resume_does_not_count_line_without_newline(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(_record(1) + _record(2).rstrip("\n"), encoding="utf-8")
+
+    # JSON baris 2 utuh tetapi tanpa newline: dipotong, jadi harus dijalankan ulang
+    assert load_done_lines(str(output)) == {1}
+    assert output.read_text(encoding="utf-8") == _record(1)
+    assert load_done_lines(str(tmp_path / "tidak-ada.jsonl")) == set()
+
+
+def test_ordered_output_when_calls_finish_out_of_order():
+    async def run(ordered):
+        out = io.StringIO()
+        # Baris 2 dan 5 sudah selesai di run sebelumnya (resume)
+        lines = [1, 3, 4, 6]
+        writer = ResultWriter(out, ordered, iter(lines), window=len(lines))
+        for _ in lines:
+            await writer.window.acquire()
+        for line in (4, 1, 6, 3):
+            writer.write(line, {"line": line, "ok": line != 6})
+        return [json.loads(text)["line"] for text in out.getvalue().splitlines()], writer
+
+    written, writer = asyncio.run(run(ordered=True))
+    assert written == [1, 3, 4, 6]
+    assert writer.written == 4 and writer.errors == 1
+    # Semua slot window dikembalikan setelah barisnya ditulis
+    assert writer.window._value == 4
+
+    written, _ = asyncio.run(run(ordered=False))
+    assert written == [4, 1, 6, 3]
+
+
+def test_ordered_output_holds_results_until_earlier_lines_finish():
+    out = io.StringIO()
+
+    async def run():
+        writer = ResultWriter(out, True, iter([1, 2, 3]), window=3)
+        writer.write(3, {"line": 3, "ok": True})
+        writer.write(2, {"line": 2, "ok": True})
+        held = out.getvalue()
+        writer.write(1, {"line": 1, "ok": True})
+        return held
+
+    assert asyncio.run(run()) == ""
+    assert [json.loads(text)["line"] for text in out.getvalue().splitlines()] == [1, 2, 3]
@@ -0,0 +1,104 @@
+"""Cache respons tool: kunci per argumen, versi corpus, call gagal, dan budget byte."""
+
+import asyncio
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+from cache import LRUCache
+from response_cache import ResponseCacheMiddleware, result_size
+
+
+@pytest.fixture
+def server():
+    state = {"version": 1, "calls": 0}
+    lru = LRUCache(100, max_bytes=10000)
+    mcp = FastMCP("response-cache-test")
+    mcp.add_middleware(ResponseCacheMiddleware(
+        lru,
+        # Hanya call tanpa 'raw' yang di-cache
+        {"echo": lambda arguments: None if arguments.get("raw") else arguments["text"]},
+        lambda: state["version"]
+    ))
+
+    @mcp.tool()
+    def echo(text: str, raw: bool = False) -> str:
+        state["calls"] += 1
+        if text == "gagal":
+            raise ValueError("gagal")
+        return text * 10
+
+    @mcp.tool()
+    def other(text: str) -> str:
+        state["calls"] += 1
+        return text
+
+    return mcp, lru, state
+
+
+async def _calls(mcp, calls):
+    async with Client(mcp) as client:
+        results = []
+        for tool, arguments in calls:
+            try:
+                results.append((await client.call_tool(tool, arguments)).data)
+            except ToolError:
+                results.append("error")
+        return results
+
+
+def test_repeated_calls_are_served_from_cache(server):
+    mcp, lru, state = server
+    results = asyncio.run(_calls(mcp, [
+        ("echo", {"text": "a"}), ("echo", {"text": "a"}),
+        ("echo", {"text": "b"}),
+        ("echo", {"text": "a", "raw": True}),
+        ("other", {"text": "a"}), ("other", {"text": "a"})
+    ]))
+    assert results == ["a" * 10, "a" * 10, "b" * 10, "a" * 10, "a", "a"]
+    # Hanya call kedua echo("a") yang dilayani cache
+    assert state["calls"] == 5
+    assert set(lru._entries) == {("echo", "a"), ("echo", "b")}
+
+
+def test_failed_calls_are_not_cached_and_new_version_drops_entries(server):
+    mcp, lru, state = server
+    asyncio.run(_calls(mcp, [("echo", {"text": "gagal"}), ("echo", {"text": "gagal"}), ("echo", {"text": "a"})]))
+    assert state["calls"] == 3
+
+    state["version"] = 2
+    asyncio.run(_calls(mcp, [("echo", {"text": "a"})]))
+    assert state["calls"] == 4 and lru.invalidations == 1
+
+
+def test_byte_budget_evicts_old_results(server):
+    mcp, lru, state = server
+    asyncio.run(_calls(mcp, [("echo", {"text": "a"})]))
+    entry_size = lru.bytes
+    assert entry_size == result_size(lru.get(("echo", "a"), 1)) > 0
+
+    lru.max_bytes = 2 * entry_size
+    asyncio.run(_calls(mcp, [("echo", {"text": "b"}), ("echo", {"text": "c"})]))
+    assert set(lru._entries) == {("echo", "b"), ("echo", "c")} and lru.bytes <= lru.max_bytes
+    # Hasil yang lebih besar dari seluruh budget tidak disimpan
+    asyncio.run(_calls(mcp, [("echo", {"text": "panjang" * 100})]))
+    assert ("echo", "panjang" * 100) not in lru._entries
+
+
+def test_fetch_key_only_for_whole_document_calls():
+    from server import _fetch_response_key
+
+    assert _fetch_response_key({"id": "doc-1"}) == "doc-1"
+    assert _fetch_response_key({"id": "doc-1", "start": None, "length": None, "cursor": None, "stream": False}) == "doc-1"
+    for arguments in (
+        {"id": "doc-1", "start": 0},
+        {"id": "doc-1", "length": 10},
+        {"id": "doc-1", "cursor": "abc"},
+        {"id": "doc-1", "stream": True},
+        {"id": "doc-1", "lain": 1},
+        {"id": ""},
+        {"id": 5},
+        {}
+    ):
+        assert _fetch_response_key(arguments) is None, arguments
@@ -0,0 +1,227 @@
+"""Index pencarian: dibandingkan dengan scan linear lama, ranking BM25, paging, dan snippet."""
+
+import math
+import random
+import time
+from itertools import accumulate
+
+import pytest
+
+from document_store import InMemoryDocumentStore
+from search_index import (
+    BM25_B, BM25_K1, MAX_EXPANSION_POSTINGS, MAX_EXPANSION_TERMS, MIN_SUBSTRING_CHARS, SNIPPET_CHARS, SearchIndex,
+    tokenize
+)
+
+DOCS = [
+    {"id": "doc-1", "title": "Panduan Server", "text": "Jalankan server.py lalu buka /sse di browser."},
+    {"id": "doc-2", "title": "Kalkulator", "text": "Operasi: a + b, a × b, dan c++ untuk increment."},
+    {"id": "doc-3", "title": "Catatan", "text": "Tanpa simbol sama sekali"},
+    {"id": "doc-4", "title": "Alur → Proses", "text": "input -> output ... selesai!"},
+    {"id": "doc-5", "title": "Underscore", "text": "snake_case dan CamelCase (contoh)"}
+]
+
+QUERIES = [
+    "server", "calc", "kalk", "SERVER", "case", "snake_case", "sim bol",
+    "+", "×", "→", "->", "-", "...", "!", "(", ")", "++", "/", ":",
+    "+ simbol", "→ input", "--", "+++", "#", "tidak-ada"
+]
+
+
+# Kata query yang fragmennya lebih pendek dari MIN_SUBSTRING_CHARS: hanya term utuh/prefix
+SHORT_QUERIES = ["a", "sa", "a + b", "ka", "c", "zz"]
+
+
+def old_scan(docs, query):
+    """Scan linear dari versi awal server.py: kata query sebagai substring title/text."""
+    query_lower = query.lower()
+    results = []
+    for doc in docs:
+        title, text = doc["title"].lower(), doc["text"].lower()
+        title_match = query_lower in title
+        text_match = query_lower in text
+        word_matches = sum(1 for word in query_lower.split() if word in title or word in text)
+        if title_match or text_match or word_matches > 0:
+            results.append(doc["id"])
+    return results
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex.build(DOCS)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_superset_of_old_scan(index, query):
+    found = {hit.doc_id for hit in index.search(query, len(DOCS), fuzzy=False)}
+    assert set(old_scan(DOCS, query)) <= found
+
+
+@pytest.mark.parametrize("query", ["+", "×", "→", "->", "...", "++", "--", "#"])
+def test_symbol_words_match_exactly_like_old_scan(index, query):
+    found = [hit.doc_id for hit in index.search(query, len(DOCS), fuzzy=False)]
+    assert sorted(found) == old_scan(DOCS, query)
+
+
+def test_server_sample_documents(index):
+    from server import DOCUMENTS
+    sample = SearchIndex.build(DOCUMENTS.values())
+    docs = list(DOCUMENTS.values())
+    for query in ["+", "×", "→", "search", "mcp server", "fetch", "-", "api", "xyz"]:
+        found = {hit.doc_id for hit in sample.search(query, len(docs), fuzzy=False)}
+        assert set(old_scan(docs, query)) <= found, query
+
+
+def test_symbols_do_not_change_word_scores():
+    plain = SearchIndex.build([dict(doc, text=doc["text"].replace("+", " ")) for doc in DOCS])
+    with_symbols = SearchIndex.build(DOCS)
+    for query in ["server", "operasi", "case"]:
+        assert [(hit.doc_id, hit.score) for hit in plain.search(query, 5)] == \
+            [(hit.doc_id, hit.score) for hit in with_symbols.search(query, 5)]
+
+
+def prefix_scan(docs, query):
+    """Dokumen yang memuat token berawalan salah satu kata query (aturan fragmen pendek)."""
+    words = query.lower().split()
+    return [
+        doc["id"] for doc in docs
+        if any(token.startswith(word) for word in words for token in tokenize(doc["title"] + " " + doc["text"]))
+    ]
+
+
+@pytest.mark.parametrize("query", SHORT_QUERIES)
+def test_short_fragments_match_whole_terms_and_prefixes(index, query):
+    found = {hit.doc_id for hit in index.search(query, len(DOCS), fuzzy=False)}
+    expected = set(prefix_scan(DOCS, query))
+    if "+" in query.split():
+        expected |= set(old_scan(DOCS, "+"))
+    assert found == expected
+
+
+def _synthetic_corpus(n_docs=5000, n_words=40, vocab_size=20000, seed=7):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnoprstu"
+    vocab = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(vocab_size)})
+    rng.shuffle(vocab)
+    cum_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(vocab))))
+    return [
+        {"id": f"doc-{n}", "title": f"Dokumen {n}", "text": " ".join(rng.choices(vocab, cum_weights=cum_weights, k=n_words))}
+        for n in range(n_docs)
+    ]
+
+
+@pytest.fixture(scope="module")
+def large_index():
+    return SearchIndex.build(_synthetic_corpus())
+
+
+def test_expansion_is_capped(large_index):
+    segment = large_index.segments[0]
+    for fragment in ["a", "ab", "abc", "st"]:
+        terms = segment.expand(fragment)
+        assert 0 < len(terms) <= MAX_EXPANSION_TERMS
+        assert sum(segment.df(term) for term in terms) <= MAX_EXPANSION_POSTINGS or len(terms) == 1
+        # Term terpendek (bobot tertinggi) didahulukan
+        assert [len(term) for term in terms] == sorted(len(term) for term in terms)
+        if len(fragment) < MIN_SUBSTRING_CHARS:
+            assert all(term.startswith(fragment) for term in terms)
+        else:
+            assert all(fragment in term for term in terms)
+
+
+@pytest.mark.parametrize("query", ["a", "e", "ab", "a e st"])
+def test_short_fragment_latency(large_index, query):
+    # Tanpa batas ekspansi query ini menyentuh hampir seluruh posting (>100 ms di corpus ini)
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        large_index.search(query, 10, fuzzy=False)
+        best = min(best, time.perf_counter() - started)
+    assert best < 0.05
+
+
+BM25_DOCS = [
+    {"id": "satu", "title": "Kucing", "text": "kucing tidur di sofa"},
+    {"id": "dua", "title": "Hewan", "text": "kucing dan anjing bermain, kucing menang"},
+    {"id": "tiga", "title": "Panjang", "text": "kucing " + " ".join(f"kata{i}" for i in range(30))},
+    {"id": "empat", "title": "Anjing", "text": "anjing menjaga rumah"},
+    {"id": "lima", "title": "Burung", "text": "burung terbang tinggi"}
+]
+
+
+def _bm25(docs, term):
+    """Skor BM25 yang dihitung langsung dari dokumen (pembanding)."""
+    lengths = {doc["id"]: len(tokenize(doc["title"])) + len(tokenize(doc["text"])) for doc in docs}
+    avgdl = sum(lengths.values()) / len(docs)
+    tfs = {doc["id"]: (tokenize(doc["title"]) + tokenize(doc["text"])).count(term) for doc in docs}
+    df = sum(1 for tf in tfs.values() if tf)
+    idf = math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+    return {
+        doc_id: idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avgdl))
+        for doc_id, tf in tfs.items() if tf
+    }
+
+
+def test_bm25_ranking_matches_formula():
+    index = SearchIndex.build(BM25_DOCS)
+    hits = index.search("kucing", 10, fuzzy=False)
+    expected = _bm25(BM25_DOCS, "kucing")
+    # tf lebih tinggi menang; dengan tf sama, dokumen pendek menang
+    assert [hit.doc_id for hit in hits] == ["satu", "dua", "tiga"]
+    for hit in hits:
+        assert hit.score == pytest.approx(expected[hit.doc_id])
+
+    # Term jarang (idf tinggi) lebih berbobot daripada term yang sering muncul
+    assert index.search("kucing rumah", 1, fuzzy=False)[0].doc_id == "empat"
+
+
+def test_limit_and_offset_page_through_the_ranking():
+    docs = [{"id": f"d{i:02d}", "title": "", "text": "kata " * (i + 1) + "isi " * 5} for i in range(25)]
+    index = SearchIndex.build(docs)
+    ranking = [hit.doc_id for hit in index.search("kata", 100, fuzzy=False)]
+    assert len(ranking) == 25 and ranking[0] == "d24"
+
+    pages = [[hit.doc_id for hit in index.search("kata", 10, offset, fuzzy=False)] for offset in (0, 10, 20, 30)]
+    assert [len(page) for page in pages] == [10, 10, 5, 0]
+    assert sum(pages, []) == ranking
+
+
+def _sentence(i):
+    return f"Kalimat pengisi nomor {i} tentang cuaca dan kota yang ramai. "
+
+
+SNIPPET_DOC = {
+    "id": "artikel",
+    "title": "Hewan Peliharaan",
+    "text": (
+        "".join(_sentence(i) for i in range(6))
+        + "Kucing suka tidur siang di kursi. "
+        + "".join(_sentence(i) for i in range(6, 12))
+        + "Kucing dan anjing café bermain bersama di halaman. "
+        + "".join(_sentence(i) for i in range(12, 18))
+    )
+}
+
+
+def _snippet(query):
+    store = InMemoryDocumentStore({SNIPPET_DOC["id"]: SNIPPET_DOC})
+    hit = SearchIndex.build([SNIPPET_DOC]).search(query, 1, fuzzy=False)[0]
+    return hit.passage, store.get_text_slice(hit.doc_id, hit.passage.start, hit.passage.end)
+
+
+def test_snippet_is_the_passage_covering_most_query_terms():
+    passage, text = _snippet("kucing anjing")
+    # Kedua term ada di passage tengah; passage pertama "kucing" saja kalah
+    assert "Kucing dan anjing café bermain" in text
+    assert not passage.is_first and not passage.is_last
+    assert len(text) <= SNIPPET_CHARS
+
+    passage, text = _snippet("kucing")
+    # Sama kuat: passage paling awal yang dipakai
+    assert "Kucing suka tidur" in text
+
+
+def test_snippet_falls_back_to_first_passage():
+    # Term hanya ada di title: snippet dari awal teks
+    passage, text = _snippet("peliharaan")
+    assert passage.is_first and text.startswith("Kalimat pengisi nomor 0")
@@ -0,0 +1,69 @@
+"""Sharded search: reload dua fase dan shard yang terlambat."""
+
+import asyncio
+import time
+
+import pytest
+
+from sharding import ShardedIndex, shard_of
+
+DOCS = [
+    {"id": f"doc-{n}", "title": f"Dokumen {n}", "text": f"hello world nomor {n}", "metadata": {}}
+    for n in range(12)
+]
+
+
+@pytest.fixture
+def index():
+    sharded = ShardedIndex(3, documents=DOCS, timeout=0.3)
+    yield sharded
+    sharded.close()
+
+
+def _search(index, query):
+    stats = {}
+    hits = asyncio.run(index.search(query, 20, stats=stats, fuzzy=False))
+    return sorted(hit.doc_id for hit in hits), stats["shards_missed"]
+
+
+def test_apply_keeps_old_version_consistent(index):
+    changed = [dict(DOCS[0], text="jello world"), {"id": "doc-new", "title": "Baru", "text": "jello", "metadata": {}}]
+    updated = index.apply(changed, ["doc-5"])
+
+    # Versi lama tetap utuh di semua shard setelah reload
+    assert _search(index, "hello")[0] == sorted(doc["id"] for doc in DOCS)
+    assert _search(index, "jello") == ([], 0)
+    assert len(index) == 12
+
+    assert _search(updated, "jello") == (["doc-0", "doc-new"], 0)
+    assert "doc-5" not in _search(updated, "hello")[0]
+    assert len(updated) == 12
+
+    # Dua reload kemudian versi awal sudah dilepas: shard dilewati, bukan dicampur
+    latest = updated.apply([], ["doc-1"]).apply([], ["doc-2"])
+    assert _search(index, "hello") == ([], 3)
+    assert _search(latest, "jello") == (["doc-0", "doc-new"], 0)
+
+
+def test_lagging_shard_is_skipped_until_caught_up(index):
+    slow = shard_of("doc-0", 3)
+    # Request yang sudah ditinggalkan pemanggilnya (deadline lewat), tapi masih dikerjakan shard
+    index.shards[slow].submit(time.sleep, 1.0).cancel()
+    assert index.shards[slow].lagging
+
+    # Query berikutnya tidak menunggu deadline shard yang masih sibuk
+    started = time.monotonic()
+    hits, missed = _search(index, "hello")
+    assert time.monotonic() - started < 0.2
+    assert missed == 1 and "doc-0" not in hits
+
+    time.sleep(1.0)
+    assert not index.shards[slow].lagging
+    assert _search(index, "hello") == (sorted(doc["id"] for doc in DOCS), 0)
+
+
+def test_late_shard_is_cancelled_and_marked_lagging(index):
+    slow = shard_of("doc-0", 3)
+    index.shards[slow].submit(time.sleep, 1.0)
+    assert _search(index, "hello")[1] >= 1
+    assert index.shards[slow].lagging
@@ -0,0 +1,155 @@
+"""
+Client async client/simple_client.py terhadap server SSE in-process: response
+dicocokkan lewat id, batas concurrency, request dari server, dan stream ditutup.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastmcp import Context, FastMCP
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+
+from simple_client import METHOD_NOT_FOUND, MCPClient, result_text  # noqa: E402
+from transport import build_app  # noqa: E402
+
+MAX_CONCURRENCY = 3
+
+# Diubah oleh tool di thread server, dibaca oleh test
+_state = {"active": 0, "peak": 0}
+_entered = threading.Event()
+
+
+def _test_server():
+    mcp = FastMCP("simple-client-test")
+
+    @mcp.tool()
+    async def echo(value: int, delay: float = 0.0) -> int:
+        await asyncio.sleep(delay)
+        return value
+
+    @mcp.tool()
+    async def tracked() -> int:
+        _state["active"] += 1
+        _state["peak"] = max(_state["peak"], _state["active"])
+        await asyncio.sleep(0.05)
+        _state["active"] -= 1
+        return _state["peak"]
+
+    @mcp.tool()
+    async def ping_client(ctx: Context) -> str:
+        # Request dari server ke client, dengan id dari penomoran milik server
+        await ctx.session.send_ping()
+        return "pong"
+
+    @mcp.tool()
+    async def hang() -> str:
+        _entered.set()
+        await asyncio.sleep(2)
+        return "late"
+
+    return mcp
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    app = build_app(_test_server(), "sse")
+    runner = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=runner.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not runner.started:
+        assert time.monotonic() < deadline, "server did not start"
+        time.sleep(0.02)
+    port = runner.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    runner.should_exit = True
+    thread.join(10)
+
+
+def test_concurrent_calls_are_matched_by_id(server_url):
+    async def run():
+        async with MCPClient(server_url, timeout=10) as client:
+            # Delay menurun: response datang dalam urutan terbalik
+            return await asyncio.gather(*[
+                client.call_tool("echo", {"value": i, "delay": (20 - i) * 0.005})
+                for i in range(20)
+            ])
+
+    results = asyncio.run(run())
+    assert [result_text(result) for result in results] == [str(i) for i in range(20)]
+
+
+def test_in_flight_calls_are_bounded(server_url):
+    _state.update(active=0, peak=0)
+
+    async def run():
+        async with MCPClient(server_url, max_concurrency=MAX_CONCURRENCY, timeout=10) as client:
+            await asyncio.gather(*[client.call_tool("tracked", {}) for _ in range(12)])
+
+    asyncio.run(run())
+    assert _state["peak"] == MAX_CONCURRENCY
+
+
+def test_server_ping_is_answered_and_not_taken_as_a_response(server_url):
+    async def run():
+        async with MCPClient(server_url, timeout=10) as client:
+            return await asyncio.gather(
+                client.call_tool("ping_client", {}),
+                *[client.call_tool("echo", {"value": i, "delay": 0.01}) for i in range(5)]
+            )
+
+    ping, *echoes = asyncio.run(run())
+    assert result_text(ping) == "pong"
+    assert [result_text(result) for result in echoes] == [str(i) for i in range(5)]
+
+
+def test_other_server_requests_are_rejected():
+    client = MCPClient("http://127.0.0.1:1")
+    sent = []
+
+    async def post(message):
+        sent.append(message)
+
+    async def run():
+        client._post = post
+        future = asyncio.get_running_loop().create_future()
+        client._pending[1] = future
+        # Request server dengan id yang sama dengan call yang sedang menunggu
+        client._dispatch("message", json.dumps({"jsonrpc": "2.0", "id": 1, "method": "roots/list"}))
+        client._dispatch("message", json.dumps({"jsonrpc": "2.0", "method": "notifications/message", "params": {}}))
+        client._dispatch("message", json.dumps({"jsonrpc": "2.0", "id": 1}))
+        await asyncio.sleep(0)
+        assert not future.done()
+        client._dispatch("message", json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"ok": True}}))
+        await client.close()
+        return future.result()
+
+    assert asyncio.run(run()) == {"jsonrpc": "2.0", "id": 1, "result": {"ok": True}}
+    assert sent == [{"jsonrpc": "2.0", "id": 1, "error": {
+        "code": METHOD_NOT_FOUND, "message": "Method not supported by this client: roots/list"
+    }}]
+
+
+def test_close_fails_pending_and_later_calls(server_url):
+    _entered.clear()
+
+    async def run():
+        client = MCPClient(server_url, timeout=10)
+        await client.connect()
+        pending = asyncio.ensure_future(client.call_tool("hang", {}))
+        assert await asyncio.to_thread(_entered.wait, 5)
+        await client.close()
+        with pytest.raises(ConnectionError):
+            await pending
+        with pytest.raises(ConnectionError):
+            await client.call_tool("echo", {"value": 1})
+        assert client._pending == {}
+
+    asyncio.run(run())
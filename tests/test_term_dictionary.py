@@ -0,0 +1,120 @@
+"""Kamus trigram untuk pencarian fuzzy: edit distance awalan dan lookup kandidat."""
+
+import itertools
+
+import pytest
+
+import term_dictionary
+from index_snapshot import _GramTable, map_index
+from search_index import SearchIndex
+from term_dictionary import TermDictionary, fuzzy_weight, max_edits, prefix_distance
+
+VOCAB = sorted({
+    "chatgpt", "chat", "chatbot", "integration", "integral", "integer", "interval",
+    "server", "serverless", "service", "severe", "document", "documentation",
+    "dokumen", "search", "searching", "research", "fetch", "fetched", "stretch"
+})
+
+
+@pytest.mark.parametrize("fragment, term, limit, expected", [
+    ("serv", "server", 1, 0),        # awalan persis
+    ("sevr", "server", 1, 1),        # tukar dua huruf bersebelahan
+    ("chatgtp", "chatgpt", 2, 1),
+    ("sxrver", "server", 1, 1),      # ganti
+    ("srver", "server", 1, 1),       # hapus
+    ("seerver", "server", 1, 1),     # sisip
+    ("integrasi", "integration", 2, 1),  # awalan "integrati"
+    ("xyzw", "server", 1, 2),        # di atas batas: limit + 1
+    ("servers", "server", 1, 1),     # fragmen lebih panjang dari term
+    ("serverxx", "server", 1, 2)
+])
+def test_prefix_distance(fragment, term, limit, expected):
+    assert prefix_distance(fragment, term, limit) == expected
+
+
+def _osa(a: str, b: str) -> int:
+    """Optimal string alignment distance, tabel penuh (pembanding)."""
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i, j in itertools.product(range(1, len(a) + 1), range(1, len(b) + 1)):
+        d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+        if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+            d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+def test_prefix_distance_matches_full_table():
+    for fragment in ("sevrer", "docmuent", "serch", "integrasi", "fetc"):
+        for term in VOCAB:
+            for limit in (1, 2):
+                best = min(_osa(fragment, term[:k]) for k in range(len(term) + 1))
+                assert prefix_distance(fragment, term, limit) == (best if best <= limit else limit + 1)
+
+
+def _brute_force(fragment, edits, limit=term_dictionary.MAX_FUZZY_TERMS):
+    weights = {}
+    for term in VOCAB:
+        distance = prefix_distance(fragment, term, edits)
+        if distance <= edits:
+            weights[term] = fuzzy_weight(fragment, term, distance)
+    return term_dictionary.best_terms(weights, limit)
+
+
+def test_lookup_matches_brute_force():
+    dictionary = TermDictionary(VOCAB)
+    for fragment in ("chatgtp", "sevrer", "docmuent", "integrasi", "serch", "fetcj", "reserch"):
+        assert dictionary.lookup(fragment, max_edits(fragment)) == _brute_force(fragment, max_edits(fragment))
+    assert dictionary.lookup("chatgtp", 2)["chatgpt"] == fuzzy_weight("chatgtp", "chatgpt", 1)
+    assert len(dictionary.lookup("serv", 1, limit=2)) == 2
+    assert dictionary.lookup("sevrer", 0) == {}
+
+
+def test_lookup_skips_common_trigrams_past_the_budget(monkeypatch):
+    # "#se" ada di banyak term, "rvx" hanya di satu
+    terms = sorted({f"se{i:04d}" for i in range(500)} | {"servx"})
+    dictionary = TermDictionary(terms)
+    counted = []
+    original = term_dictionary.Counter.update
+
+    def update(self, iterable=None, **kwargs):
+        if iterable is not None:
+            counted.append(len(iterable))
+        return original(self, iterable, **kwargs)
+
+    monkeypatch.setattr(term_dictionary, "MAX_GRAM_POSTINGS", 10)
+    monkeypatch.setattr(term_dictionary.Counter, "update", update)
+    assert "servx" in dictionary.lookup("servxz", 1)
+    assert max(counted) < 500
+
+
+def test_dictionary_is_built_once_at_index_time(monkeypatch):
+    built = []
+
+    class Counting(TermDictionary):
+        def __init__(self, terms, grams=None):
+            if grams is None:
+                built.append(len(terms))
+            super().__init__(terms, grams)
+
+    monkeypatch.setattr("search_index.TermDictionary", Counting)
+    monkeypatch.setattr("index_snapshot.TermDictionary", Counting)
+    index = SearchIndex.build([{"id": "a", "title": "Chatbot", "text": "chatgpt integration server"}])
+    assert len(built) == 1
+    mapped = map_index(index)
+    # Snapshot menyimpan posting trigram: dibaca dari mmap, tidak dibangun ulang
+    assert len(built) == 1
+    assert isinstance(mapped.segments[0]._dictionary._grams, _GramTable)
+    assert "chatgpt" in mapped.segments[0].fuzzy_expand("chatgtp")
+
+
+def test_stored_grams_match_the_built_dictionary():
+    terms = sorted(set(VOCAB + ["émigré", "naïve", "日本語テキスト", "ab"]))
+    docs = [{"id": str(i), "title": term, "text": ""} for i, term in enumerate(terms)]
+    index = SearchIndex.build(docs)
+    built = index.segments[0]._dictionary
+    stored = map_index(index).segments[0]._dictionary
+    assert len(stored._grams) == len(built._grams)
+    for gram, term_nos in built._grams.items():
+        assert list(stored._grams.get(gram)) == list(term_nos)
+    assert stored._grams.get("zzz") is None
+    for fragment in ("emigre", "naive", "日本語テクスト", "integrasi", "servr", "chatgtp"):
+        assert stored.lookup(fragment, 2) == built.lookup(fragment, 2)
@@ -0,0 +1,175 @@
+"""
+Transport SSE dan streamable HTTP serta kompresi respons, diuji in-process:
+app dari build_app dijalankan uvicorn di thread dan dipanggil lewat client MCP.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+import pytest
+import uvicorn
+from mcp import ClientSession
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+
+from mcp_transport import open_transport  # noqa: E402
+from transport import CompressionMiddleware, build_app  # noqa: E402
+
+COMPRESS_MIN_BYTES = 1024
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    import server
+
+    app = build_app(server.mcp, "both", "/mcp", server.HTTP_MIDDLEWARE, compress_min_bytes=COMPRESS_MIN_BYTES)
+    runner = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=runner.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not runner.started:
+        assert time.monotonic() < deadline, "server did not start"
+        time.sleep(0.02)
+    port = runner.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    runner.should_exit = True
+    thread.join(10)
+
+
+async def _call(url, calls, http_client=None):
+    if http_client is None:
+        transport = open_transport(url)
+    else:
+        from mcp.client.streamable_http import streamable_http_client
+        transport = streamable_http_client(url, http_client=http_client)
+    async with transport as (read_stream, write_stream, *_):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            return [await session.call_tool(tool, arguments) for tool, arguments in calls]
+
+
+@pytest.mark.parametrize("path", ["/sse", "/mcp"])
+def test_search_and_fetch(server_url, path):
+    from server import DOCUMENTS
+
+    search, fetch = asyncio.run(_call(server_url + path, [
+        ("search", {"query": "mcp server", "limit": 50}),
+        ("fetch", {"id": "doc-1"})
+    ]))
+    assert not search.is_error and not fetch.is_error
+    ids = [result["id"] for result in search.structured_content["results"]]
+    assert "doc-1" in ids and len(ids) == len(set(ids))
+    assert fetch.structured_content["id"] == "doc-1"
+    assert fetch.structured_content["text"] == DOCUMENTS["doc-1"]["text"].strip()
+
+
+def test_transports_return_the_same_results(server_url):
+    calls = [("search", {"query": "fetch tool", "limit": 50}), ("fetch", {"id": "doc-2"})]
+    over_sse = asyncio.run(_call(server_url + "/sse", calls))
+    over_http = asyncio.run(_call(server_url + "/mcp", calls))
+    assert [r.structured_content for r in over_sse] == [r.structured_content for r in over_http]
+
+
+def test_streamable_http_gzip_above_threshold_only(server_url):
+    import httpx
+
+    encodings = {}
+
+    async def record(response):
+        if response.request.method == "POST":
+            await response.aread()
+            message = json.loads(response.request.content)
+            if message.get("method") == "tools/call":
+                name = message["params"]["name"]
+                encodings[name] = (response.headers.get("content-encoding"), len(response.content))
+
+    async def run():
+        async with httpx.AsyncClient(headers={"Accept-Encoding": "gzip"}, event_hooks={"response": [record]}) as client:
+            return await _call(server_url + "/mcp", [
+                ("search", {"query": "mcp server", "limit": 50}),
+                ("hello", {"name": "test"})
+            ], client)
+
+    search, hello = asyncio.run(run())
+    assert search.structured_content["results"]
+    assert "test" in hello.content[0].text
+    assert encodings["search"][0] == "gzip"
+    assert encodings["search"][1] >= COMPRESS_MIN_BYTES
+    assert encodings["hello"][0] is None
+    assert encodings["hello"][1] < COMPRESS_MIN_BYTES
+
+
+# ============================================================================
+# CompressionMiddleware langsung sebagai ASGI app
+# ============================================================================
+
+def _respond(body, content_type=b"application/json", chunks=1):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", content_type), (b"content-length", str(len(body)).encode())
+        ]})
+        size = -(-len(body) // chunks)
+        for i in range(chunks):
+            part = body[i * size:(i + 1) * size]
+            await send({"type": "http.response.body", "body": part, "more_body": i < chunks - 1})
+    return app
+
+
+def _request(app, accept_encoding="gzip", method="POST", minimum_size=COMPRESS_MIN_BYTES):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size)(scope, receive, send))
+    headers = dict(messages[0]["headers"])
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return headers, body
+
+
+def test_gzip_above_threshold():
+    payload = json.dumps({"results": [{"id": f"doc-{i}", "text": "lorem ipsum " * 10} for i in range(20)]}).encode()
+    headers, body = _request(_respond(payload))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert int(headers[b"content-length"]) == len(body) < len(payload)
+    assert gzip.decompress(body) == payload
+
+
+def test_no_compression_below_threshold():
+    payload = b'{"results": []}'
+    headers, body = _request(_respond(payload))
+    assert b"content-encoding" not in headers
+    assert body == payload
+    assert int(headers[b"content-length"]) == len(payload)
+
+
+def test_deflate_and_unsupported_encodings():
+    payload = b"x" * 4096
+    headers, body = _request(_respond(payload), "deflate")
+    assert headers[b"content-encoding"] == b"deflate"
+    assert zlib.decompress(body) == payload
+    headers, body = _request(_respond(payload), "br, gzip;q=0")
+    assert b"content-encoding" not in headers and body == payload
+
+
+def test_post_event_stream_compressed_per_chunk():
+    payload = b"data: " + b"y" * 4000 + b"\n\n"
+    headers, body = _request(_respond(payload, b"text/event-stream", chunks=3))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(body) == payload
+
+
+def test_get_event_stream_passes_through():
+    payload = b"data: " + b"y" * 4000 + b"\n\n"
+    headers, body = _request(_respond(payload, b"text/event-stream"), method="GET")
+    assert b"content-encoding" not in headers and body == payload
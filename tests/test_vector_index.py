@@ -0,0 +1,193 @@
+"""Vector search: embedder, scan flat dan IVF (dibanding brute force), top_k, mode vector/hybrid."""
+
+import numpy as np
+import pytest
+
+from search_index import HYBRID_ALPHA, SearchIndex, fuse_hybrid, tokenize
+from vector_index import IVF_MIN_DOCS, HashingEmbedder, VectorIndex, top_k
+
+
+def _cosine(embedder, a, b):
+    return float(embedder.embed_tokens(tokenize(a)) @ embedder.embed_tokens(tokenize(b)))
+
+
+def test_feature_cache_is_bounded():
+    embedder = HashingEmbedder(64, feature_cache_size=100)
+    for n in range(5000):
+        embedder.embed_tokens([f"query{n}", "umum"])
+    info = embedder._token_features.cache_info()
+    assert info.currsize == 100
+    assert info.hits > 0
+
+
+def test_cache_size_does_not_change_vectors():
+    tokens = ["server", "mcp", "server", "pencarian", "x"] + [f"kata{n}" for n in range(50)]
+    cached = HashingEmbedder(64)
+    uncached = HashingEmbedder(64, feature_cache_size=0)
+    tiny = HashingEmbedder(64, feature_cache_size=2)
+    for _ in range(2):
+        expected = uncached.embed_tokens(tokens)
+        assert np.array_equal(cached.embed_tokens(tokens), expected)
+        assert np.array_equal(tiny.embed_tokens(tokens), expected)
+    assert abs(float(np.linalg.norm(expected)) - 1.0) < 1e-5
+
+
+def test_embedding_is_normalized_and_deterministic():
+    embedder = HashingEmbedder(128)
+    vector = embedder.embed_tokens(["server", "pencarian", "server"])
+    assert vector.dtype == np.float32 and vector.shape == (128,)
+    assert abs(float(np.linalg.norm(vector)) - 1.0) < 1e-5
+    # CRC32 stabil antar instance (dan antar process)
+    assert np.array_equal(HashingEmbedder(128).embed_tokens(["server", "pencarian", "server"]), vector)
+    assert not np.any(embedder.embed_tokens([]))
+    # Frekuensi sublinear: token berulang tidak sama dengan token tunggal, tetapi tidak linear
+    once = embedder.embed_tokens(["server", "pencarian"])
+    twice = embedder.embed_tokens(["server", "server", "pencarian"])
+    assert not np.allclose(once, twice)
+    assert float(once @ twice) > 0.9
+
+
+def test_typos_stay_similar():
+    embedder = HashingEmbedder(256)
+    assert _cosine(embedder, "pencarian dokumen", "pencarian dokumen") == pytest.approx(1.0, abs=1e-5)
+    typo = _cosine(embedder, "pencarian", "pencarain")
+    assert typo > 0.4
+    assert typo > _cosine(embedder, "pencarian", "kalkulator") + 0.3
+    assert _cosine(embedder, "kalkulator", "kalkulatr") > _cosine(embedder, "kalkulator", "pencarian")
+
+
+def _clustered(n, dim=32, centers=40, seed=1):
+    """Vector ternormalisasi yang mengelompok di sekitar beberapa pusat."""
+    rng = np.random.default_rng(seed)
+    middle = rng.normal(size=(centers, dim))
+    rows = middle[rng.integers(0, centers, n)] + 0.3 * rng.normal(size=(n, dim))
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows.astype(np.float32)
+
+
+def test_flat_scores_are_one_matrix_product():
+    vectors = _clustered(200)
+    index = VectorIndex.build(list(vectors), 32)
+    assert index.centroids is None and len(index) == 200
+    ords, sims = index.scores(vectors[7])
+    assert np.array_equal(ords, np.arange(200))
+    assert np.allclose(sims, vectors @ vectors[7])
+    assert np.array_equal(index.rows_for(np.array([5, 0, 199])), vectors[[5, 0, 199]])
+    assert len(VectorIndex.build([], 32)) == 0
+
+
+@pytest.fixture(scope="module")
+def ivf():
+    vectors = _clustered(IVF_MIN_DOCS)
+    return vectors, VectorIndex.build(list(vectors), 32)
+
+
+def test_ivf_layout(ivf):
+    vectors, index = ivf
+    n_lists = len(index.centroids)
+    assert n_lists == int(np.sqrt(IVF_MIN_DOCS))
+    assert np.allclose(np.linalg.norm(index.centroids, axis=1), 1.0, atol=1e-5)
+    offsets = index.offsets
+    assert offsets[0] == 0 and offsets[-1] == IVF_MIN_DOCS and np.all(np.diff(offsets) >= 0)
+    # Baris dikelompokkan per cluster: tiap baris paling dekat ke centroid cluster-nya
+    assert sorted(index.ords.tolist()) == list(range(IVF_MIN_DOCS))
+    for cluster in range(n_lists):
+        rows = index.matrix[offsets[cluster]:offsets[cluster + 1]]
+        if len(rows):
+            assert np.all(np.argmax(rows @ index.centroids.T, axis=1) == cluster)
+    # rows_for memetakan ordinal kembali ke vector aslinya
+    ords = np.array([0, 17, IVF_MIN_DOCS - 1, 4242])
+    assert np.array_equal(index.rows_for(ords), vectors[ords])
+
+
+def test_ivf_nprobe_prunes_clusters(ivf):
+    vectors, index = ivf
+    query = vectors[123]
+    nearest = int(np.argmax(index.centroids @ query))
+    ords, sims = index.scores(query, nprobe=1)
+    assert len(ords) == index.offsets[nearest + 1] - index.offsets[nearest] < IVF_MIN_DOCS
+    assert np.allclose(sims, vectors[ords] @ query)
+
+    # Semua cluster di-probe: sama persis dengan brute force
+    ords, sims = index.scores(query, nprobe=len(index.centroids))
+    assert sorted(ords.tolist()) == list(range(IVF_MIN_DOCS))
+    brute = vectors @ query
+    assert np.allclose(sims, brute[ords])
+    assert top_k(ords, sims, 10) == top_k(np.arange(IVF_MIN_DOCS), brute, 10)
+
+
+def test_ivf_recall_against_brute_force(ivf):
+    vectors, index = ivf
+    rng = np.random.default_rng(7)
+    found = expected = 0
+    for row in rng.choice(IVF_MIN_DOCS, 30, replace=False):
+        query = vectors[row]
+        exact = {doc for doc, _ in top_k(np.arange(IVF_MIN_DOCS), vectors @ query, 10)}
+        approx = {doc for doc, _ in top_k(*index.scores(query, nprobe=SearchIndex.VECTOR_NPROBE), 10)}
+        found += len(exact & approx)
+        expected += len(exact)
+    assert found / expected >= 0.9
+
+
+def test_top_k():
+    ords = np.array([10, 11, 12, 13, 14])
+    sims = np.array([0.2, 0.9, 0.5, 0.9, -0.1], dtype=np.float32)
+    assert top_k(ords, sims, 2) == [(11, pytest.approx(0.9)), (13, pytest.approx(0.9))]
+    assert [doc for doc, _ in top_k(ords, sims, 10)] == [11, 13, 12, 10, 14]
+    assert top_k(ords, sims, 0) == [] and top_k(ords[:0], sims[:0], 3) == []
+
+
+DOCS = [
+    {"id": "search", "title": "Pencarian dokumen", "text": "Tool search mencari dokumen dengan BM25."},
+    {"id": "fetch", "title": "Mengambil dokumen", "text": "Tool fetch mengembalikan isi dokumen lengkap."},
+    {"id": "calc", "title": "Kalkulator", "text": "Operasi tambah kurang kali bagi."},
+    {"id": "typo", "title": "Catatan", "text": "Kalkulatr dengan salah ketik tetap ditemukan."},
+    {"id": "time", "title": "Waktu", "text": "Zona waktu Asia Jakarta."}
+]
+
+
+@pytest.fixture(scope="module")
+def vector_index():
+    return SearchIndex.build(DOCS, HashingEmbedder(256))
+
+
+def test_vector_mode_matches_brute_force_cosine(vector_index):
+    embedder = vector_index.embedder
+    query = "kalkulator operasi"
+    hits = vector_index.search(query, len(DOCS), mode="vector")
+    query_vector = embedder.embed_tokens(tokenize(query))
+    expected = {
+        doc["id"]: float(embedder.embed_tokens(tokenize(f"{doc['title']} {doc['text']}")) @ query_vector)
+        for doc in DOCS
+    }
+    expected = {doc_id: sim for doc_id, sim in expected.items() if sim > 0}
+    assert [hit.doc_id for hit in hits] == sorted(expected, key=expected.get, reverse=True)
+    for hit in hits:
+        assert hit.score == pytest.approx(expected[hit.doc_id], abs=1e-5)
+
+
+def test_hybrid_fuses_keyword_and_vector_ranking(vector_index):
+    query = "kalkulator"
+    keyword = [hit.doc_id for hit in vector_index.search(query, len(DOCS), fuzzy=False)]
+    hybrid = vector_index.search(query, len(DOCS), mode="hybrid", fuzzy=False)
+    # Keyword saja tidak menemukan salah ketik; hybrid menemukannya lewat cosine
+    assert keyword == ["calc"]
+    assert [hit.doc_id for hit in hybrid][:2] == ["calc", "typo"]
+
+    components = vector_index.hybrid_components(query, len(DOCS), fuzzy=False)
+    fused = fuse_hybrid(components)
+    best_keyword = max(keyword for keyword, _ in components.values())
+    for hit in hybrid:
+        key = vector_index._locate(hit.doc_id)
+        bm25, cosine = components[key]
+        assert hit.score == pytest.approx(HYBRID_ALPHA * bm25 / best_keyword + (1 - HYBRID_ALPHA) * cosine)
+        assert hit.score == pytest.approx(fused[key])
+    # Dokumen yang cocok keyword mendapat bobot penuh bagian BM25
+    assert components[vector_index._locate("calc")][0] == best_keyword
+
+
+def test_vector_modes_need_an_embedder():
+    index = SearchIndex.build(DOCS)
+    for mode in ("vector", "hybrid"):
+        with pytest.raises(ValueError, match="not enabled"):
+            index.search("dokumen", 5, mode=mode)
@@ -0,0 +1,162 @@
+"""Proxy multi-worker: batas body, session kedaluwarsa, dan restart worker."""
+
+import asyncio
+import os
+import signal
+import socket
+import time
+
+import workers
+from workers import WorkerProxy, WorkerSupervisor
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _upstream(port: int, status: bytes = b"200 OK", headers: bytes = b""):
+    """Worker palsu: menjawab setiap request dengan respons kecil."""
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                body = str(port).encode()
+                writer.write(b"HTTP/1.1 " + status + b"\r\n" + headers + b"content-length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", port)
+
+
+async def _call(proxy, method="GET", path="/stats", body=b"", headers=(), chunks=None):
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in (chunks or [])]
+    messages.append({"type": "http.request", "body": body, "more_body": False})
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": method, "path": path, "raw_path": path.encode(),
+        "query_string": b"", "headers": list(headers)
+    }
+    await proxy(scope, receive, send)
+    return sent[0]["status"], b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_body_over_limit_is_rejected():
+    proxy = WorkerProxy([_free_port()], max_body=10)
+
+    async def run():
+        declared = await _call(proxy, "POST", "/mcp", b"x" * 11, headers=[(b"content-length", b"11")])
+        streamed = await _call(proxy, "POST", "/mcp", b"x" * 5, chunks=[b"x" * 6])
+        return declared, streamed
+
+    declared, streamed = asyncio.run(run())
+    assert declared[0] == 413 and streamed[0] == 413
+
+
+def test_round_robin_skips_down_and_refusing_workers():
+    live, dead = _free_port(), _free_port()
+    proxy = WorkerProxy([dead, live])
+
+    async def run():
+        server = await _upstream(live)
+        async with server:
+            # Worker 0 menolak koneksi: request tanpa affinity pindah ke worker 1
+            first = [await _call(proxy) for _ in range(4)]
+            proxy.worker_down(0)
+            second = [await _call(proxy) for _ in range(4)]
+            proxy.worker_down(1)
+            none = await _call(proxy)
+        return first, second, none
+
+    first, second, none = asyncio.run(run())
+    assert all(result == (200, str(live).encode()) for result in first + second)
+    assert none[0] == 503
+
+
+def test_idle_http_sessions_expire_and_dead_worker_sessions_are_dropped():
+    port = _free_port()
+    proxy = WorkerProxy([port], session_idle_timeout=60)
+
+    async def run():
+        server = await _upstream(port, headers=b"mcp-session-id: abc\r\n")
+        async with server:
+            await _call(proxy, "POST", "/mcp", b"{}")
+            assert set(proxy.http_sessions) == {b"abc"}
+            assert await _call(proxy, "POST", "/mcp", b"{}", headers=[(b"mcp-session-id", b"abc")]) == (200, str(port).encode())
+
+            session = proxy.http_sessions[b"abc"]
+            assert proxy.expire_sessions(session.last_seen + 30) == 0
+            session.active = 1
+            assert proxy.expire_sessions(session.last_seen + 120) == 0
+            session.active = 0
+            assert proxy.expire_sessions(session.last_seen + 120) == 1
+            assert proxy.http_sessions == {}
+
+            proxy.sessions["sse"] = 0
+            proxy.http_sessions[b"abc"] = workers._HttpSession(0)
+            proxy.worker_down(0)
+            assert proxy.sessions == {} and proxy.http_sessions == {}
+
+    asyncio.run(run())
+
+
+def _listening_child(port: int) -> int:
+    """Worker palsu di process terpisah: hanya membuka port lalu menunggu."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("127.0.0.1", port))
+            sock.listen()
+            time.sleep(30)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def test_supervisor_restarts_dead_worker(monkeypatch):
+    monkeypatch.setattr(workers, "RESTART_DELAY", 0.01)
+    port = _free_port()
+    spawned = []
+
+    def spawn(worker):
+        pid = _listening_child(port)
+        spawned.append(pid)
+        return pid
+
+    supervisor = WorkerSupervisor(spawn, 1)
+    proxy = WorkerProxy([port], supervisor=supervisor)
+
+    async def run():
+        supervisor.start_all()
+        os.kill(spawned[0], signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while supervisor.restarts == 0 or 0 in proxy.down:
+            assert time.monotonic() < deadline, "worker was not restarted"
+            supervisor.check(proxy)
+            await asyncio.sleep(0.05)
+
+    try:
+        asyncio.run(run())
+        assert len(spawned) == 2
+        assert supervisor.pids[0] == spawned[1]
+        assert not proxy.down
+    finally:
+        supervisor.terminate()